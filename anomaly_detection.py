@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Streaming Sprint Anomaly Detection
+Flags outlier sprints as rows arrive, using constant-memory running statistics per team
+
+Each sprint row is scored against the team's history *before* it is folded into
+the running statistics, so a detector can sit behind any row source (CSV
+ingestion, a workbook reader, a file watcher) and raise events immediately.
+
+Methods:
+    zscore - Welford running mean/variance over all previous sprints
+    mad    - robust z-score (median / MAD) over a bounded window of recent sprints
+"""
+
+from collections import deque
+from dataclasses import dataclass
+import math
+
+import numpy as np
+import pandas as pd
+
+# Metrics watched by default: column name -> display label
+ANOMALY_METRICS = {
+    'Productivity_num': 'Productivity',
+    'Predictability_num': 'Predictability',
+    'Inflation correction': 'Inflation correction',
+}
+
+# Percentage metrics are shown as percentages in events and reports
+PERCENT_METRICS = {'Productivity_num', 'Predictability_num'}
+
+# Hard limits checked from the very first sprint (no history needed)
+DEFAULT_LIMITS = {
+    'Productivity_num': (0.05, None),
+    'Predictability_num': (0.05, None),
+}
+
+DEFAULT_THRESHOLDS = {'zscore': 3.0, 'mad': 3.5}
+
+# Scale factor that makes MAD comparable to a standard deviation
+MAD_SCALE = 0.6745
+
+
+@dataclass
+class AnomalyEvent:
+    """A single flagged metric value for one sprint"""
+    team: str
+    sprint: str
+    metric: str
+    value: float
+    expected: float
+    score: float
+    method: str
+
+    @property
+    def label(self):
+        return ANOMALY_METRICS.get(self.metric, self.metric)
+
+    @property
+    def direction(self):
+        return 'spike' if self.value > self.expected else 'dip'
+
+    def format_value(self, value):
+        if self.metric in PERCENT_METRICS:
+            return f"{value:.0%}"
+        return f"{value:.1f}"
+
+    def describe(self):
+        if self.method == 'limit':
+            return (f"{self.label} {self.format_value(self.value)} is outside the plausible range "
+                    f"(limit {self.format_value(self.expected)})")
+        return (f"{self.label} {self.direction} to {self.format_value(self.value)} "
+                f"(expected ~{self.format_value(self.expected)}, {self.method} score {self.score:+.1f})")
+
+
+class RunningMetricStats:
+    """Constant-memory running statistics for one metric of one team"""
+
+    def __init__(self, window):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.recent = deque(maxlen=window)
+
+    def std(self):
+        if self.count < 2:
+            return 0.0
+        return math.sqrt(self.m2 / (self.count - 1))
+
+    def update(self, value):
+        # Welford's online update
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.recent.append(value)
+
+    def zscore(self, value):
+        """Return (expected, score) or None when the history has no spread"""
+        std = self.std()
+        if std == 0:
+            return None
+        return self.mean, (value - self.mean) / std
+
+    def robust_zscore(self, value):
+        """Return (expected, score) from median/MAD of the recent window"""
+        recent = np.fromiter(self.recent, dtype=float)
+        median = float(np.median(recent))
+        deviations = np.abs(recent - median)
+        mad = float(np.median(deviations))
+        if mad == 0:
+            # Fall back to mean absolute deviation when over half the window is identical
+            mean_abs = float(deviations.mean())
+            if mean_abs == 0:
+                return None
+            return median, (value - median) / (1.2533 * mean_abs)
+        return median, MAD_SCALE * (value - median) / mad
+
+
+class StreamingAnomalyDetector:
+    """Scores sprint rows one at a time and emits AnomalyEvents for outliers"""
+
+    def __init__(self, method='zscore', threshold=None, warmup=4, window=12,
+                 metrics=None, limits=None, on_event=None):
+        if method not in DEFAULT_THRESHOLDS:
+            raise ValueError(f"Unknown anomaly method '{method}' (expected one of: {', '.join(DEFAULT_THRESHOLDS)})")
+        self.method = method
+        self.threshold = threshold if threshold is not None else DEFAULT_THRESHOLDS[method]
+        self.warmup = warmup
+        self.window = window
+        self.metrics = list(metrics) if metrics is not None else list(ANOMALY_METRICS)
+        self.limits = DEFAULT_LIMITS if limits is None else limits
+        self.on_event = on_event
+        self._teams = {}
+
+    def _team_state(self, team):
+        if team not in self._teams:
+            self._teams[team] = {metric: RunningMetricStats(self.window) for metric in self.metrics}
+        return self._teams[team]
+
+    def observe(self, row):
+        """Score one sprint row (dict or Series) and fold it into the team's statistics"""
+        team = str(row.get('Team', '')).strip()
+        sprint = str(row.get('Sprint', '')).strip()
+        state = self._team_state(team)
+        events = []
+
+        for metric in self.metrics:
+            value = row.get(metric)
+            if value is None or pd.isna(value):
+                continue
+            value = float(value)
+            running = state[metric]
+
+            event = self._check_limits(team, sprint, metric, value)
+            if event is None and running.count >= self.warmup:
+                scored = running.zscore(value) if self.method == 'zscore' else running.robust_zscore(value)
+                if scored is not None and abs(scored[1]) >= self.threshold:
+                    event = AnomalyEvent(team, sprint, metric, value, scored[0], scored[1], self.method)
+            if event is not None:
+                events.append(event)
+
+            running.update(value)
+
+        if self.on_event is not None:
+            for event in events:
+                self.on_event(event)
+        return events
+
+    def observe_frame(self, df):
+        """Stream every row of a DataFrame through the detector, in order"""
+        events = []
+        for _, row in df.iterrows():
+            events.extend(self.observe(row))
+        return events
+
+    def _check_limits(self, team, sprint, metric, value):
+        low, high = self.limits.get(metric, (None, None))
+        if low is not None and value < low:
+            return AnomalyEvent(team, sprint, metric, value, low, float('-inf'), 'limit')
+        if high is not None and value > high:
+            return AnomalyEvent(team, sprint, metric, value, high, float('inf'), 'limit')
+        return None
+
+
+def print_anomaly_event(event):
+    """Default event sink used by the CLI"""
+    print(f"  ANOMALY [{event.team} {event.sprint}] {event.describe()}")
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Asynchronous Team Analysis Pipeline
+Streams many teams through ingest -> statistics -> render -> report stages
+connected by bounded asyncio queues.
+
+- Blocking CSV reads, statistics and report writing run in worker threads
+- CPU-heavy dashboard rasterization runs in an executor (a process pool by default;
+  rendering is thread-safe, so a ThreadPoolExecutor works too)
+- Bounded queues give backpressure: a slow render stage pauses ingestion
+- Results are yielded per team as soon as that team finishes
+
+Usage:
+    python async_pipeline.py <csv_file> [<csv_file> ...] [--output-dir DIR] [--concurrency N]
+
+Library:
+    async for result in run_pipeline(sources):
+        print(result.team, result.summary.avg_productivity)
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+
+from anomaly_detection import StreamingAnomalyDetector
+from notes_classifier import NotesClassifier
+from generate_team_analysis import TeamPerformanceAnalyzer
+from stats_export import TeamStatsSummary
+
+# Marks the end of a stage's input
+_DONE = object()
+
+
+@dataclass
+class TeamResult:
+    """Outcome of one team's trip through the pipeline"""
+    source: object
+    team: Optional[str] = None
+    summary: Optional[TeamStatsSummary] = None
+    dashboard_png: Optional[bytes] = None
+    dashboard_html: Optional[str] = None
+    report: Optional[str] = None
+    files: tuple = ()
+    error: Optional[BaseException] = None
+    analyzer: Optional[TeamPerformanceAnalyzer] = None
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+def _render_dashboard_png(team_name, df_clean, stats, dpi):
+    """Executor entry point: rebuild a minimal analyzer and rasterize its dashboard"""
+    analyzer = TeamPerformanceAnalyzer(None)
+    analyzer.team_name = team_name
+    analyzer.df_clean = df_clean
+    analyzer.stats = stats
+    # Cumulative sums are cheap to rebuild here; the estimation-bias fit follows lazily
+    analyzer.select_window()
+    return analyzer.render_dashboard(dpi=dpi).getvalue()
+
+
+class AsyncTeamPipeline:
+    """Bounded multi-stage pipeline around TeamPerformanceAnalyzer"""
+
+    def __init__(self, concurrency=4, queue_size=8, render_executor=None, render_workers=None,
+                 formats=('png',), dpi=300, output_dir=None, anomaly_method='zscore'):
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.render_executor = render_executor
+        self.render_workers = render_workers or min(concurrency, os.cpu_count() or 1)
+        self.formats = tuple(formats)
+        self.dpi = dpi
+        self.output_dir = output_dir
+        self.anomaly_method = anomaly_method
+        # Shared by every team, so recurring notes are classified once per pipeline
+        self.notes_classifier = NotesClassifier()
+
+    # Stage functions: each takes and returns a TeamResult
+
+    async def _ingest(self, result):
+        analyzer = TeamPerformanceAnalyzer(result.source)
+        await asyncio.to_thread(analyzer.read_and_clean_data)
+        result.analyzer = analyzer
+        result.team = analyzer.team_name
+        return result
+
+    async def _statistics(self, result):
+        analyzer = result.analyzer
+
+        def compute():
+            analyzer.detect_anomalies(StreamingAnomalyDetector(method=self.anomaly_method))
+            analyzer.classify_notes(self.notes_classifier)
+            analyzer.calculate_statistics()
+
+        await asyncio.to_thread(compute)
+        result.summary = analyzer.summary
+        return result
+
+    async def _render(self, result):
+        analyzer = result.analyzer
+        if 'png' in self.formats:
+            loop = asyncio.get_running_loop()
+            result.dashboard_png = await loop.run_in_executor(
+                self._executor, _render_dashboard_png,
+                analyzer.team_name, analyzer.df_clean, analyzer.stats, self.dpi)
+        if 'html' in self.formats:
+            result.dashboard_html = await asyncio.to_thread(analyzer.render_html_dashboard)
+        return result
+
+    async def _report(self, result):
+        analyzer = result.analyzer
+        dashboard_file = None
+        if 'png' not in self.formats and 'html' in self.formats:
+            dashboard_file = f'{analyzer.team_name_clean}_Performance_Dashboard.html'
+        result.report = await asyncio.to_thread(analyzer.render_markdown_report, dashboard_file)
+
+        if self.output_dir is not None:
+            result.files = await asyncio.to_thread(self._write_files, result)
+        return result
+
+    def _write_files(self, result):
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, result.analyzer.team_name_clean)
+        artifacts = [
+            (f'{base}_Performance_Dashboard.png', result.dashboard_png, 'wb'),
+            (f'{base}_Performance_Dashboard.html', result.dashboard_html, 'w'),
+            (f'{base}_Performance_Analysis.md', result.report, 'w'),
+        ]
+        written = []
+        for path, content, mode in artifacts:
+            if content is None:
+                continue
+            with open(path, mode, **({} if mode == 'wb' else {'encoding': 'utf-8'})) as f:
+                f.write(content)
+            written.append(path)
+        return tuple(written)
+
+    async def _run_stage(self, func, inbox, outbox, workers):
+        """Run `workers` copies of a stage; forward _DONE once all have finished"""
+        finished = 0
+
+        async def worker():
+            nonlocal finished
+            while True:
+                result = await inbox.get()
+                if result is _DONE:
+                    break
+                if result.error is None:
+                    try:
+                        result = await func(result)
+                    except Exception as e:
+                        result.error = e
+                await outbox.put(result)
+            finished += 1
+            if finished == workers:
+                await outbox.put(_DONE)
+            else:
+                # Let sibling workers see the end of input too
+                await inbox.put(_DONE)
+
+        await asyncio.gather(*(worker() for _ in range(workers)))
+
+    async def run(self, sources):
+        """Async generator yielding a TeamResult per source, in completion order"""
+        owns_executor = self.render_executor is None
+        self._executor = self.render_executor or ProcessPoolExecutor(max_workers=self.render_workers)
+
+        queues = [asyncio.Queue(maxsize=self.queue_size) for _ in range(5)]
+        stages = [self._ingest, self._statistics, self._render, self._report]
+        workers = [self.concurrency, self.concurrency, self.render_workers, self.concurrency]
+
+        async def feed():
+            for source in sources:
+                await queues[0].put(TeamResult(source=source))
+            await queues[0].put(_DONE)
+
+        tasks = [asyncio.create_task(feed())]
+        for stage, count, inbox, outbox in zip(stages, workers, queues, queues[1:]):
+            tasks.append(asyncio.create_task(self._run_stage(stage, inbox, outbox, count)))
+
+        try:
+            while True:
+                result = await queues[-1].get()
+                if result is _DONE:
+                    break
+                # Drop the analyzer so finished teams do not keep their DataFrames alive
+                result.analyzer = None
+                yield result
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            if owns_executor:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def run_pipeline(sources, **options):
+    """Convenience wrapper: `async for result in run_pipeline(paths, concurrency=8): ...`"""
+    async for result in AsyncTeamPipeline(**options).run(sources):
+        yield result
+
+
+async def _main_async(args):
+    formats = ('png', 'html') if args.format == 'both' else (args.format,)
+    pipeline = AsyncTeamPipeline(concurrency=args.concurrency, queue_size=args.queue_size,
+                                 formats=formats, dpi=args.dpi, output_dir=args.output_dir)
+    failures = 0
+    async for result in pipeline.run(args.csv_files):
+        if result.ok:
+            print(f"[done] {result.team}: {result.summary.avg_productivity:.1%} productivity, "
+                  f"{result.summary.cv_productivity:.1f}% CV -> {', '.join(result.files) or 'in memory'}")
+        else:
+            failures += 1
+            print(f"[failed] {result.source}: {result.error}")
+    return failures
+
+
+def main():
+    """Command-line entry point"""
+    parser = argparse.ArgumentParser(description="Analyze many teams concurrently with an asyncio pipeline")
+    parser.add_argument('csv_files', nargs='+', metavar='csv_file', help="Team sprint CSV exports")
+    parser.add_argument('--output-dir', default='.', help="Directory for dashboards and reports (default: .)")
+    parser.add_argument('--format', choices=['png', 'html', 'both'], default='png',
+                        help="Dashboard output (default: png)")
+    parser.add_argument('--concurrency', type=int, default=4, help="Workers per I/O stage (default: 4)")
+    parser.add_argument('--queue-size', type=int, default=8, help="Bound of each inter-stage queue (default: 8)")
+    parser.add_argument('--dpi', type=int, default=300, help="PNG dashboard resolution (default: 300)")
+    args = parser.parse_args()
+
+    failures = asyncio.run(_main_async(args))
+    if failures:
+        print(f"\n{failures} team(s) failed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
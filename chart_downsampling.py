@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Chart Downsampling Helpers
+Keeps dashboard render time roughly flat for long sprint histories.
+
+- lttb_indices: Largest-Triangle-Three-Buckets point selection for trend lines;
+  keeps the peaks and dips that define the shape of the series
+- bucket_starts / bucket_reduce: aggregate bar charts into at most N buckets
+- thin_tick_positions: choose which sprint labels to draw so they never overlap
+"""
+
+import math
+
+import numpy as np
+
+
+def lttb_indices(y, threshold, x=None):
+    """Indices of at most `threshold` points that preserve the visual shape of (x, y)
+
+    NaN points are skipped; the first and last valid points are always kept.
+    """
+    y = np.asarray(y, dtype=float)
+    x = np.arange(len(y), dtype=float) if x is None else np.asarray(x, dtype=float)
+
+    valid = np.flatnonzero(~np.isnan(y))
+    if len(valid) < len(y):
+        return valid[lttb_indices(y[valid], threshold, x[valid])]
+
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    every = (n - 2) / (threshold - 2)
+    sampled = np.empty(threshold, dtype=int)
+    sampled[0] = 0
+    a = 0
+    for i in range(threshold - 2):
+        start = int(math.floor(i * every)) + 1
+        end = int(math.floor((i + 1) * every)) + 1
+        next_end = min(int(math.floor((i + 2) * every)) + 1, n)
+        if end >= next_end:
+            avg_x, avg_y = x[n - 1], y[n - 1]
+        else:
+            avg_x, avg_y = x[end:next_end].mean(), y[end:next_end].mean()
+
+        # Pick the bucket point forming the largest triangle with the previous pick and next bucket's mean
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        sampled[i + 1] = a
+    sampled[-1] = n - 1
+    return sampled
+
+
+def bucket_starts(n, max_buckets):
+    """Start index of each bucket when n values are grouped into at most max_buckets"""
+    if n <= max_buckets:
+        return np.arange(n)
+    return np.unique(np.linspace(0, n, max_buckets, endpoint=False).astype(int))
+
+
+def bucket_reduce(values, starts, how='mean'):
+    """Aggregate values per bucket (NaN-aware sum or mean)"""
+    values = np.asarray(values, dtype=float)
+    present = ~np.isnan(values)
+    sums = np.add.reduceat(np.where(present, values, 0.0), starts)
+    if how == 'sum':
+        return sums
+    counts = np.add.reduceat(present.astype(int), starts)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+
+
+def thin_tick_positions(n, max_labels):
+    """Evenly spaced positions for at most max_labels tick labels out of n"""
+    step = max(1, math.ceil(n / max_labels))
+    return np.arange(0, n, step)
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Coaching Rules
+Declarative rule table behind the report's recommendations, strengths, needs
+and EBP readiness, evaluated as vectorized boolean masks over a teams x metrics
+matrix: one row per team, so a whole portfolio is scored in a single pass.
+
+- Each Rule lists (metric, operator, threshold) conditions that must all hold
+- Thresholds are named and configurable (JSON file or dict overrides)
+- evaluate_rules returns a teams x rules boolean DataFrame; team_findings turns
+  one team's row into the lists the markdown report renders, rule_summary and
+  group_summary aggregate it for portfolio and tribe views
+"""
+
+import json
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_THRESHOLDS = {
+    'productivity_low': 0.65,        # below: blockers analysis
+    'productivity_target': 0.70,     # EBP readiness / need
+    'productivity_strong': 0.75,     # strength
+    'predictability_low': 0.70,      # below: estimation calibration
+    'predictability_strong': 0.75,   # strength
+    'cv_stable': 15.0,               # EBP readiness / need (%)
+    'cv_volatile': 20.0,             # volatility workshop; below: strength (%)
+    'inflation_frequent': 0.30,      # EBP readiness / need
+    'inflation_systematic': 0.50,    # Definition of Ready enhancement
+    'new_model_min_sprints': 5,      # new velocity model still needs a baseline
+}
+
+# Metric columns of the teams x metrics matrix
+METRICS = ('avg_productivity', 'avg_predictability', 'cv_productivity', 'inflation_frequency',
+           'has_transition', 'new_model_count', 'new_velocity', 'capacity_notes')
+
+# Sprint notes mentioning these words count as capacity notes
+CAPACITY_KEYWORDS = ('holiday', 'fte', 'capacity', 'absence')
+
+_OPERATORS = {
+    '<': np.less,
+    '<=': np.less_equal,
+    '>': np.greater,
+    '>=': np.greater_equal,
+    '==': np.equal,
+}
+
+KINDS = ('recommendation', 'strength', 'need', 'ebp_blocker')
+
+# Shown when a team triggers no rule of that kind
+FALLBACKS = {
+    'strength': "Willingness to improve and track metrics",
+    'need': "Continued focus on maintaining stable performance",
+}
+
+
+@dataclass(frozen=True)
+class Rule:
+    """One coaching rule: fires when every (metric, operator, threshold) condition holds
+
+    A threshold is a key of the thresholds dict or a literal number. The text is
+    formatted with the team's metrics and the thresholds.
+    """
+    kind: str
+    key: str
+    when: tuple
+    text: str
+    title: str = ''
+    priority: int = 0
+
+
+RULES = (
+    # Priority interventions
+    Rule('recommendation', 'volatility_workshop', (('cv_productivity', '>', 'cv_volatile'),),
+         "Address {cv_productivity:.1f}% coefficient of variation through root cause analysis",
+         title='Volatility Reduction Workshop', priority=1),
+    Rule('recommendation', 'definition_of_ready', (('inflation_frequency', '>', 'inflation_systematic'),),
+         "Fix systematic inflation pattern affecting {inflation_frequency:.0%} of sprints",
+         title='Definition of Ready Enhancement', priority=1),
+    Rule('recommendation', 'productivity_blockers', (('avg_productivity', '<', 'productivity_low'),),
+         "Identify constraints limiting productivity to {avg_productivity:.1%}",
+         title='Productivity Blockers Analysis', priority=1),
+    Rule('recommendation', 'new_model_baseline', (('has_transition', '>', 0),
+                                                  ('new_model_count', '<', 'new_model_min_sprints')),
+         "Run learning sprints to establish stable baseline under {new_velocity:.1f} SP model",
+         title='New Model Baseline Discovery', priority=2),
+    Rule('recommendation', 'estimation_calibration', (('avg_predictability', '<', 'predictability_low'),),
+         "Improve commitment accuracy from {avg_predictability:.1%} to 75%+",
+         title='Estimation Calibration Workshop', priority=2),
+    Rule('recommendation', 'capacity_planning', (('capacity_notes', '>', 0),),
+         "Implement systematic capacity adjustment for holidays and team changes",
+         title='Capacity-Adjusted Planning Protocol', priority=2),
+
+    # What the team has
+    Rule('strength', 'strong_productivity', (('avg_productivity', '>', 'productivity_strong'),),
+         "Strong productivity capability ({avg_productivity:.1%})"),
+    Rule('strength', 'reliable_commitment', (('avg_predictability', '>', 'predictability_strong'),),
+         "Reliable commitment discipline ({avg_predictability:.1%})"),
+    Rule('strength', 'stable_rhythm', (('cv_productivity', '<', 'cv_volatile'),),
+         "Relatively stable delivery rhythm ({cv_productivity:.1f}% CV)"),
+
+    # What the team needs
+    Rule('need', 'reduce_volatility', (('cv_productivity', '>', 'cv_stable'),),
+         "Volatility reduction from {cv_productivity:.1f}% to <{cv_stable:.0f}% CV"),
+    Rule('need', 'improve_productivity', (('avg_productivity', '<', 'productivity_target'),),
+         "Productivity improvement from {avg_productivity:.0%} to {productivity_target:.0%}+"),
+    Rule('need', 'reduce_inflation', (('inflation_frequency', '>', 'inflation_frequent'),),
+         "Inflation frequency reduction from {inflation_frequency:.0%} to <{inflation_frequent:.0%}"),
+
+    # Epic-Based Pricing readiness: the team is ready when none of these fire
+    Rule('ebp_blocker', 'ebp_volatility', (('cv_productivity', '>=', 'cv_stable'),),
+         "reduce volatility from {cv_productivity:.1f}% to <{cv_stable:.0f}%"),
+    Rule('ebp_blocker', 'ebp_productivity', (('avg_productivity', '<=', 'productivity_target'),),
+         "improve productivity from {avg_productivity:.0%} to {productivity_target:.0%}+"),
+    Rule('ebp_blocker', 'ebp_inflation', (('inflation_frequency', '>=', 'inflation_frequent'),),
+         "reduce inflation frequency from {inflation_frequency:.0%} to <{inflation_frequent:.0%}"),
+)
+
+
+def load_thresholds(path=None, overrides=None):
+    """Default thresholds updated from a JSON file and/or a dict; unknown names are rejected"""
+    thresholds = dict(DEFAULT_THRESHOLDS)
+    updates = {}
+    if path:
+        with open(path, encoding='utf-8') as f:
+            updates.update(json.load(f))
+    updates.update(overrides or {})
+    unknown = sorted(set(updates) - set(DEFAULT_THRESHOLDS))
+    if unknown:
+        raise ValueError(f"Unknown rule threshold(s): {', '.join(unknown)} "
+                         f"(known: {', '.join(DEFAULT_THRESHOLDS)})")
+    thresholds.update({name: float(value) for name, value in updates.items()})
+    return thresholds
+
+
+def count_capacity_notes(notes):
+    """Number of sprint notes that mention capacity changes"""
+    if notes is None:
+        return 0
+    text = notes.dropna().astype(str).str.lower()
+    return int(text.str.contains('|'.join(CAPACITY_KEYWORDS)).sum())
+
+
+def team_metrics(stats, notes=None):
+    """One row of the teams x metrics matrix from a team's stats dict and Notes column"""
+    return {
+        'avg_productivity': stats['avg_productivity'],
+        'avg_predictability': stats['avg_predictability'],
+        'cv_productivity': stats['cv_productivity'],
+        'inflation_frequency': stats['inflation_frequency'],
+        'has_transition': 1.0 if stats['transition_sprint'] else 0.0,
+        'new_model_count': stats['new_model_count'],
+        'new_velocity': np.nan if stats['new_velocity'] is None else stats['new_velocity'],
+        'capacity_notes': count_capacity_notes(notes),
+    }
+
+
+def metrics_frame(rows, teams):
+    """Teams x metrics matrix from team_metrics rows"""
+    return pd.DataFrame(list(rows), index=pd.Index(list(teams), name='team'), columns=list(METRICS), dtype=float)
+
+
+def evaluate_rules(metrics, thresholds=None, rules=RULES):
+    """Boolean teams x rules DataFrame: every rule is one vectorized mask over all teams"""
+    thresholds = thresholds or DEFAULT_THRESHOLDS
+    columns = {}
+    for rule in rules:
+        mask = np.ones(len(metrics), dtype=bool)
+        for metric, operator, threshold in rule.when:
+            value = thresholds[threshold] if isinstance(threshold, str) else threshold
+            with np.errstate(invalid='ignore'):
+                mask &= _OPERATORS[operator](metrics[metric].to_numpy(dtype=float), value)
+        columns[rule.key] = mask
+    return pd.DataFrame(columns, index=metrics.index)
+
+
+def team_findings(metrics, fired, team, thresholds=None, rules=RULES):
+    """Report lists for one team: recommendations (by priority), strengths, needs, EBP blockers"""
+    thresholds = thresholds or DEFAULT_THRESHOLDS
+    values = {**thresholds, **metrics.loc[team].to_dict()}
+    row = fired.loc[team]
+    findings = {kind: [] for kind in KINDS}
+    for rule in rules:
+        if row[rule.key]:
+            findings[rule.kind].append({'key': rule.key, 'title': rule.title, 'priority': rule.priority,
+                                        'description': rule.text.format(**values)})
+    findings['recommendation'].sort(key=lambda item: item['priority'])
+    return findings
+
+
+def ebp_ready(fired, rules=RULES):
+    """Boolean per team: no EBP blocker fired"""
+    blockers = [rule.key for rule in rules if rule.kind == 'ebp_blocker']
+    return ~fired[blockers].any(axis=1)
+
+
+def rule_summary(fired, rules=RULES):
+    """Teams triggering each rule, most common first (portfolio view)"""
+    by_key = {rule.key: rule for rule in rules}
+    counts = fired.sum().sort_values(ascending=False, kind='stable')
+    return pd.DataFrame({
+        'kind': [by_key[key].kind for key in counts.index],
+        'rule': [by_key[key].title or key.replace('_', ' ').capitalize() for key in counts.index],
+        'teams': counts.to_numpy(),
+        'share': counts.to_numpy() / max(len(fired), 1),
+    }, index=counts.index)
+
+
+def group_summary(fired, groups, rules=RULES):
+    """Per group (e.g. tribe): team count, EBP-ready teams and teams per recommendation
+
+    `groups` maps each team in `fired` to its group; one grouped sum over all teams.
+    """
+    recommendations = [rule.key for rule in rules if rule.kind == 'recommendation']
+    counts = fired[recommendations].astype(int).assign(
+        teams=1, ebp_ready=ebp_ready(fired, rules).astype(int))
+    summary = counts.groupby(pd.Series(groups, index=fired.index).to_numpy()).sum()
+    return summary[['teams', 'ebp_ready'] + recommendations]
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Compressed Input Sources
+Reads sprint exports straight out of .gz, .zst and .zip files as decompressing
+streams: nothing is extracted to disk, and only one team's stream is open (and
+decoded incrementally) at a time, so memory stays bounded by a single export.
+
+- file.csv.gz / file.csv.zst: one team export
+- bundle.zip: every *.csv (and *.csv.gz / *.csv.zst) member, in archive order
+- plain .csv paths pass through unchanged
+- tracking.xlsx: every team sheet, streamed by workbook_inputs
+
+zstd support needs the optional `zstandard` package (pip install zstandard).
+"""
+
+import gzip
+import io
+import os
+import zipfile
+from contextlib import contextmanager
+
+from workbook_inputs import count_workbook_sheets, is_workbook, iter_workbook_sheets
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+GZIP_EXTENSIONS = ('.gz', '.gzip')
+ZSTD_EXTENSIONS = ('.zst', '.zstd')
+ZIP_EXTENSIONS = ('.zip',)
+CSV_MEMBER_EXTENSIONS = ('.csv',) + tuple('.csv' + ext for ext in GZIP_EXTENSIONS + ZSTD_EXTENSIONS)
+
+# Read buffer for decompressing streams; also bounds how far the header can be peeked at
+STREAM_BUFFER_SIZE = 1 << 16
+
+
+class _NamedReader(io.BufferedReader):
+    """Buffered (peekable) reader over a raw decompressing stream, labelled for messages"""
+
+    def __init__(self, raw, name):
+        super().__init__(raw, buffer_size=STREAM_BUFFER_SIZE)
+        self._label = name
+
+    @property
+    def name(self):
+        return self._label
+
+
+def _extension(name):
+    return os.path.splitext(str(name))[1].lower()
+
+
+def is_compressed(path):
+    """True for paths this module has to open (gzip, zstd or zip)"""
+    return _extension(path) in GZIP_EXTENSIONS + ZSTD_EXTENSIONS + ZIP_EXTENSIONS
+
+
+def _zip_members(archive):
+    """CSV members of an open ZipFile, skipping directories and macOS metadata"""
+    return [info for info in archive.infolist()
+            if not info.is_dir()
+            and not info.filename.startswith('__MACOSX/')
+            and not os.path.basename(info.filename).startswith('.')
+            and info.filename.lower().endswith(CSV_MEMBER_EXTENSIONS)]
+
+
+def _check_readable(name):
+    """Raise SprintSchemaError (an input error, not a crash) when `name` needs a missing package"""
+    if _extension(name) in ZSTD_EXTENSIONS and zstandard is None:
+        from sprint_schema import SprintSchemaError  # sprint_schema imports this module
+        raise SprintSchemaError(f"Reading '{name}' requires the optional 'zstandard' package "
+                                "(pip install zstandard)")
+
+
+def _decompressor(stream, name):
+    """Wrap a binary stream in the decompressor its name calls for"""
+    extension = _extension(name)
+    if extension in GZIP_EXTENSIONS:
+        return gzip.GzipFile(fileobj=stream, mode='rb', filename=str(name))
+    if extension in ZSTD_EXTENSIONS:
+        _check_readable(name)
+        return _NamedReader(zstandard.ZstdDecompressor().stream_reader(stream, closefd=True), str(name))
+    return stream
+
+
+def count_input_sources(paths):
+    """Number of team exports behind the given paths (zip members counted individually)
+
+    Also checks up front that every input can be decompressed, so a missing
+    optional package stops the run before any team is analyzed.
+    """
+    count = 0
+    for path in paths:
+        if _extension(path) in ZIP_EXTENSIONS:
+            try:
+                with zipfile.ZipFile(path) as archive:
+                    members = _zip_members(archive)
+            except zipfile.BadZipFile as e:
+                raise ValueError(f"{path}: not a readable zip archive ({e})") from None
+            for info in members:
+                _check_readable(f'{path}:{info.filename}')
+            count += len(members)
+        elif is_workbook(path):
+            try:
+                count += count_workbook_sheets(path)
+            except (zipfile.BadZipFile, OSError, KeyError) as e:
+                raise ValueError(f"{path}: not a readable workbook ({e})") from None
+        else:
+            _check_readable(path)
+            count += 1
+    return count
+
+
+@contextmanager
+def open_input_stream(path):
+    """Open a single-export path (.csv, .csv.gz, .csv.zst or a zip with one CSV) as a stream"""
+    if _extension(path) in ZIP_EXTENSIONS:
+        with zipfile.ZipFile(path) as archive:
+            members = _zip_members(archive)
+            if len(members) != 1:
+                raise ValueError(f"{path} contains {len(members)} CSV exports; "
+                                 "pass it on the command line to analyze them in batch mode")
+            with _decompressor(archive.open(members[0]), members[0].filename) as stream:
+                yield stream
+    elif is_compressed(path):
+        # The file gets its own block, so it is closed even if no decompressor can wrap it
+        with open(path, 'rb') as raw, _decompressor(raw, path) as stream:
+            yield stream
+    else:
+        with open(path, 'rb') as stream:
+            yield stream
+
+
+def iter_input_sources(paths):
+    """Yield (label, source) for every team export behind the given paths
+
+    Plain CSVs are yielded as paths; compressed files and zip members as open
+    streams that are closed when the caller advances to the next source, so the
+    caller must finish reading a source before asking for the next one.
+    Workbook sheets are yielded as DataFrames, one sheet at a time.
+    """
+    for path in paths:
+        extension = _extension(path)
+        if extension in ZIP_EXTENSIONS:
+            with zipfile.ZipFile(path) as archive:
+                for info in _zip_members(archive):
+                    with _decompressor(archive.open(info), info.filename) as stream:
+                        yield f'{path}:{info.filename}', stream
+        elif is_workbook(path):
+            yield from iter_workbook_sheets(path)
+        elif is_compressed(path):
+            with open_input_stream(path) as stream:
+                yield str(path), stream
+        else:
+            yield str(path), path
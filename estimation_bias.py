@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Estimation Bias
+Per team and velocity-model phase, how delivered SP responds to committed SP:
+a least-squares line delivered = intercept + slope * committed, the residual
+spread around it, and the trend of inflation corrections per sprint.
+
+- slope < 1: every extra committed point yields less than a point delivered
+  (over-commitment grows with plan size); intercept is the fixed offset
+- residual SD: sprint-to-sprint noise the line does not explain (SP)
+- inflation trend: change in inflation correction per sprint (SP/sprint)
+
+All groups (team x phase) are solved together: series are padded into one
+groups x sprints matrix with a validity mask, and the normal equations of
+every group are reduced along the sprint axis in a single vectorized pass.
+"""
+
+import numpy as np
+import pandas as pd
+
+BIAS_INPUTS = ['Committed SP', 'Delivered SP', 'Inflation correction']
+BIAS_COLUMNS = ['sprints', 'slope', 'intercept', 'residual_sd', 'inflation_trend']
+
+# Fits need at least this many sprints with both committed and delivered values
+MIN_FIT_SPRINTS = 3
+
+
+def _pad(series_list):
+    """Stack 1-D arrays into a NaN-padded groups x max_length matrix"""
+    length = max((len(values) for values in series_list), default=0)
+    matrix = np.full((len(series_list), length), np.nan)
+    for row, values in enumerate(series_list):
+        matrix[row, :len(values)] = values
+    return matrix
+
+
+def _batched_line(x, y):
+    """Least-squares slope, intercept, residual SD and count for every row of x, y (NaN = missing)"""
+    mask = ~(np.isnan(x) | np.isnan(y))
+    x = np.where(mask, x, 0.0)
+    y = np.where(mask, y, 0.0)
+    n = mask.sum(axis=1).astype(float)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # Center each row first so the sums do not cancel
+        x_mean = x.sum(axis=1) / n
+        y_mean = y.sum(axis=1) / n
+        dx = np.where(mask, x - x_mean[:, None], 0.0)
+        dy = np.where(mask, y - y_mean[:, None], 0.0)
+        sxx = (dx * dx).sum(axis=1)
+        slope = (dx * dy).sum(axis=1) / sxx
+        intercept = y_mean - slope * x_mean
+        residuals = np.where(mask, dy - slope[:, None] * dx, 0.0)
+        residual_sd = np.sqrt((residuals ** 2).sum(axis=1) / (n - 2))
+    fitted = (n >= MIN_FIT_SPRINTS) & (sxx > 0)
+    return (np.where(fitted, slope, np.nan), np.where(fitted, intercept, np.nan),
+            np.where(fitted, residual_sd, np.nan), n)
+
+
+def fit_estimation_bias(groups):
+    """Fit every group at once
+
+    `groups` is a list of (key, frame) pairs, each frame holding one group's
+    sprints in order with Committed SP, Delivered SP and Inflation correction.
+    Returns a DataFrame indexed by key with BIAS_COLUMNS.
+    """
+    keys = [key for key, _ in groups]
+    if not groups:
+        return pd.DataFrame(columns=BIAS_COLUMNS)
+    committed = _pad([frame['Committed SP'].to_numpy(dtype=float) for _, frame in groups])
+    delivered = _pad([frame['Delivered SP'].to_numpy(dtype=float) for _, frame in groups])
+    inflation = _pad([frame['Inflation correction'].to_numpy(dtype=float) for _, frame in groups])
+    # Sprint ordinal within the group, NaN in the padding
+    ordinal = np.where(np.isnan(inflation), np.nan, np.arange(inflation.shape[1], dtype=float))
+
+    slope, intercept, residual_sd, sprints = _batched_line(committed, delivered)
+    inflation_trend = _batched_line(ordinal, inflation)[0]
+    index = pd.MultiIndex.from_tuples(keys) if keys and isinstance(keys[0], tuple) else pd.Index(keys)
+    return pd.DataFrame({
+        'sprints': sprints.astype(int),
+        'slope': slope,
+        'intercept': intercept,
+        'residual_sd': residual_sd,
+        'inflation_trend': inflation_trend,
+    }, index=index)
+
+
+def expected_delivery(bias, committed):
+    """Delivered SP the fitted line expects for the given committed SP"""
+    return bias['intercept'] + bias['slope'] * np.asarray(committed, dtype=float)
+
+
+def describe_bias(bias):
+    """One-line reading of a fit, e.g. 'delivers 0.82 SP per extra committed SP'"""
+    if np.isnan(bias['slope']):
+        return "too few sprints to fit"
+    reading = f"delivers {bias['slope']:.2f} SP per extra committed SP"
+    if bias['slope'] < 0.9:
+        reading += " (over-commitment grows with plan size)"
+    elif bias['slope'] > 1.1:
+        reading += " (larger plans are under-committed)"
+    return reading
@@ -4,194 +4,498 @@ Team Performance Analysis Generator
 Generates dashboard and coaching report from team performance CSV
 
 Usage:
-    python generate_team_analysis.py <csv_file_path>
+    python generate_team_analysis.py <csv_file_path> [options]
 
 Example:
     python generate_team_analysis.py MyTeamProductivity20251108.csv
+    python generate_team_analysis.py MyTeamProductivity20251108.csv --anomaly-method mad
+    python generate_team_analysis.py MyTeamProductivity20251108.csv --format html
 """
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
+from matplotlib.artist import setp
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+import argparse
+import io
 import sys
 import os
 from datetime import datetime
 import warnings
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext, redirect_stdout
 warnings.filterwarnings('ignore')
 
-# Set style
-plt.style.use('seaborn-v0_8-darkgrid')
-sns.set_palette("husl")
+from anomaly_detection import StreamingAnomalyDetector, print_anomaly_event
+from estimation_bias import BIAS_INPUTS, describe_bias, expected_delivery, fit_estimation_bias
+from html_dashboard import build_dashboard_payload, render_html_dashboard
+from notes_classifier import CAPACITY_WEIGHT, NotesClassifier, adjusted_productivity
+from compressed_inputs import count_input_sources, iter_input_sources
+from chart_downsampling import bucket_reduce, bucket_starts, lttb_indices, thin_tick_positions
+from coaching_rules import (FALLBACKS, evaluate_rules, load_thresholds, metrics_frame, rule_summary,
+                            team_findings, team_metrics)
+from org_rollups import ROLLUP_COLUMNS, WEIGHTS, OrgRollup, load_org_hierarchy
+from peer_benchmark import PEER_METRICS, PeerIndex, format_percentiles
+from panel_cache import PanelCache, compose_tiles, composite_key, encode_png, panel_key
+from sparkline_sprites import generate_sparklines, index_path
+from sprint_store import SprintStoreWriter
+from sprint_derivation import apply_derivation, format_disagreement
+from sprint_schema import DEFAULT_OUTPUTS, SprintSchemaError, coerce_sprint_frame, read_sprint_csv
+from sprint_windows import WindowSums, resolve_window
+from stats_export import EXPORT_FORMATS, TeamStatsSummary, export_summaries
+from stats_graph import StatsGraph
+from team_correlation import generate_correlations
+
+def _write_artifact(content, output_file):
+    """Write text or bytes to a file path or an already-open stream"""
+    if hasattr(output_file, 'write'):
+        output_file.write(content)
+    elif isinstance(content, bytes):
+        with open(output_file, 'wb') as f:
+            f.write(content)
+    else:
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write(content)
+
 
 class TeamPerformanceAnalyzer:
-    """Analyzes team performance data and generates reports"""
+    """Analyzes team performance data and generates reports
+
+    The source may be a CSV file path, a file-like object, raw CSV bytes, or an
+    already-loaded DataFrame. The render_* methods return artifacts in memory;
+    the generate_* methods additionally write them to a path or stream.
+    """
 
-    def __init__(self, csv_file):
-        self.csv_file = csv_file
+    def __init__(self, source, outputs=DEFAULT_OUTPUTS, thresholds=None):
+        self.source = source
+        self.outputs = outputs
+        self.thresholds = thresholds
         self.df = None
         self.df_clean = None
         self.team_name = None
         self.stats = {}
+        self.summary = None
+        self.anomalies = []
+        self.derivation_issues = None
+        self.peer_position = None
+        self.history = None
+        self.window_sums = None
+        self.window = None
+        self.graph = StatsGraph()
 
     def read_and_clean_data(self):
         """Read CSV and clean data"""
-        print(f"Reading CSV data from: {self.csv_file}")
-        self.df = pd.read_csv(self.csv_file, encoding='utf-8-sig')
+        if isinstance(self.source, pd.DataFrame):
+            # Workbook sheets carry their 'book.xlsx:Sheet' label
+            label = self.source.attrs.get('source', 'in-memory DataFrame')
+            print(f"Reading CSV data from: {label}")
+            self.df = coerce_sprint_frame(self.source, self.outputs, label)
+        else:
+            label = 'in-memory bytes' if isinstance(self.source, (bytes, bytearray)) else getattr(self.source, 'name', self.source)
+            print(f"Reading CSV data from: {label}")
+            # Schema-driven parse: sentinels ("/", "#VALUE!") become NaN and
+            # percentages become fractions while reading
+            self.df = read_sprint_csv(self.source, self.outputs)
+
+        if len(self.df) == 0:
+            raise SprintSchemaError("No data found: the file has a header but no sprint rows")
 
         # Extract team name from first row
         self.team_name = str(self.df.iloc[0]['Team']).strip()
         print(f"Team name: {self.team_name}")
 
-        # Clean the data - replace "/" and "#VALUE!" with NaN
-        print("Cleaning data...")
-        self.df = self.df.replace('/', np.nan)
-        self.df = self.df.replace('#VALUE!', np.nan)
-        self.df['Inflation correction'] = self.df['Inflation correction'].replace('', np.nan)
-
-        # Convert numeric columns
-        numeric_cols = ['Target Velocity', 'Committed SP', 'Delivered SP', 'Inflation correction',
-                        'Normalized Target Velocity', 'Normalized Planned SP', 'Normalized Delivered SP',
-                        'Normalized Inflation SP']
-
-        for col in numeric_cols:
-            if col in self.df.columns:
-                self.df[col] = pd.to_numeric(self.df[col], errors='coerce')
+        # Recompute formula columns from the raw inputs; fills '#VALUE!'/blank cells
+        # and supports raw-only exports without Productivity/Predictability columns
+        self.derivation_issues, filled = apply_derivation(self.df)
+        if filled:
+            print(f"Derived {filled} missing formula cell(s) from raw inputs")
+        if len(self.derivation_issues):
+            print(f"Supplied values disagreeing with raw inputs: {len(self.derivation_issues)}")
+            for _, issue in self.derivation_issues.head(5).iterrows():
+                print(f"  {format_disagreement(issue)}")
+            if len(self.derivation_issues) > 5:
+                print(f"  ...and {len(self.derivation_issues) - 5} more")
 
         # Fill NaN inflation corrections with 0
+        print("Cleaning data...")
         self.df['Inflation correction'] = self.df['Inflation correction'].fillna(0)
 
-        # Convert percentage columns
-        def clean_percentage(val):
-            if pd.isna(val):
-                return np.nan
-            if isinstance(val, str):
-                return float(val.strip('%')) / 100 if '%' in val else float(val)
-            return val
-
-        self.df['Productivity_num'] = self.df['Productivity'].apply(clean_percentage)
-        self.df['Predictability_num'] = self.df['Predictability'].apply(clean_percentage)
-
         # Filter to rows with actual data
         self.df_clean = self.df[self.df['Productivity_num'].notna()].copy()
 
         print(f"Total sprints in file: {len(self.df)}")
         print(f"Sprints with complete data: {len(self.df_clean)}")
 
+        if len(self.df_clean) == 0:
+            raise SprintSchemaError("No data found: no sprint rows have a Productivity value")
+
+    def select_window(self, window=None, since=None):
+        """Restrict the analysis to the last `window` sprints and/or those from sprint `since` on
+
+        Cumulative sums over the full history are built once, so statistics for
+        the window (and rolling trends reaching back before it) cost O(1).
+        """
+        if self.history is None:
+            self.history = self.df_clean
+        self.window_sums = WindowSums(self.history)
+        try:
+            start, stop = resolve_window(self.history['Sprint'], window, since)
+        except ValueError as e:
+            raise SprintSchemaError(f"{self.team_name}: {str(e)}") from None
+        self.window = (start, stop)
+        self.df_clean = self.history.iloc[start:stop]
+        self.graph.set_inputs(df=self.df_clean, window_sums=self.window_sums, window=self.window)
+        if (start, stop) != (0, len(self.history)):
+            print(f"Analysis window: {self.df_clean.iloc[0]['Sprint']} to {self.df_clean.iloc[-1]['Sprint']} "
+                  f"({stop - start} of {len(self.history)} sprints)")
+        return self.window
+
+    def moving_average(self, n):
+        """Rolling mean productivity of the analyzed sprints, reaching back before the window"""
+        start, stop = self.window
+        return pd.Series(self.window_sums.rolling_mean('productivity', n)[start:stop], index=self.df_clean.index)
+
+    def detect_anomalies(self, detector=None):
+        """Stream cleaned sprint rows through an anomaly detector"""
+        if detector is None:
+            detector = StreamingAnomalyDetector(on_event=print_anomaly_event)
+
+        print("\nScanning sprints for anomalies...")
+        self.anomalies = detector.observe_frame(self.df_clean)
+        print(f"Anomalies flagged: {len(self.anomalies)}")
+
+        return self.anomalies
+
+    def classify_notes(self, classifier=None):
+        """Tag each analyzed sprint's note; a shared classifier reuses tags across teams and runs"""
+        if self.window is None:
+            self.select_window()
+        self.graph.set_inputs(notes_classifier=classifier)
+        tagged = self.note_tags.sum()
+        if tagged.any():
+            print("Note tags: " + ", ".join(f"{tag.replace('_', ' ')} {count}"
+                                            for tag, count in tagged.items() if count))
+        return self.note_tags
+
+    @property
+    def note_tags(self):
+        """Sprints x tags flags of the analyzed sprints' notes"""
+        return self.graph['note_tags']
+
+    @property
+    def estimation_bias(self):
+        """Delivered-vs-committed fit per phase (see estimation_groups)"""
+        return self.graph['estimation_bias']
+
+    def metric(self, name):
+        """One statistic, computing only the metrics it depends on (see stats_graph.METRICS)
+
+        Values are memoized until the analyzed sprints change, so asking for a
+        single number never pays for the full calculate_statistics pass.
+        """
+        if self.window is None:
+            self.select_window()
+        return self.graph[name]
+
+    def capacity_affected(self):
+        """Boolean Series: sprints whose notes report holiday or absence"""
+        return self.metric('capacity_affected_mask')
+
+    def adjusted_productivity(self):
+        """Productivity with capacity-affected sprints masked out (NaN)"""
+        return adjusted_productivity(self.df_clean['Productivity_num'], self.capacity_affected())
+
     def calculate_statistics(self):
         """Calculate performance statistics"""
-        df = self.df_clean
-
-        # Overall statistics
-        avg_productivity = df['Productivity_num'].mean()
-        avg_predictability = df['Predictability_num'].mean()
-        std_productivity = df['Productivity_num'].std()
-        cv_productivity = (std_productivity / avg_productivity) * 100
-
-        # Find model transition (significant change in Target Velocity)
-        velocities = df['Target Velocity'].unique()
-        transition_sprint = None
-        old_velocity = None
-        new_velocity = None
-
-        if len(velocities) > 1:
-            # Find where velocity changes
-            for i in range(1, len(df)):
-                if df.iloc[i]['Target Velocity'] != df.iloc[i-1]['Target Velocity']:
-                    transition_sprint = df.iloc[i]['Sprint']
-                    old_velocity = df.iloc[i-1]['Target Velocity']
-                    new_velocity = df.iloc[i]['Target Velocity']
-                    break
-
-        # Phase analysis
-        if old_velocity is not None:
-            old_model = df[df['Target Velocity'] == old_velocity]
-            new_model = df[df['Target Velocity'] == new_velocity]
-        else:
-            old_model = df
-            new_model = pd.DataFrame()
-            old_velocity = df['Target Velocity'].iloc[0]
-
-        # Inflation analysis
-        total_inflation = df['Inflation correction'].sum()
-        inflation_count = len(df[df['Inflation correction'] != 0])
-
-        self.stats = {
-            'avg_productivity': avg_productivity,
-            'avg_predictability': avg_predictability,
-            'std_productivity': std_productivity,
-            'cv_productivity': cv_productivity,
-            'min_productivity': df['Productivity_num'].min(),
-            'max_productivity': df['Productivity_num'].max(),
-            'min_predictability': df['Predictability_num'].min(),
-            'max_predictability': df['Predictability_num'].max(),
-            'avg_committed': df['Committed SP'].mean(),
-            'avg_delivered': df['Delivered SP'].mean(),
-            'total_inflation': total_inflation,
-            'inflation_count': inflation_count,
-            'total_sprints': len(df),
-            'transition_sprint': transition_sprint,
-            'old_velocity': old_velocity,
-            'new_velocity': new_velocity,
-            'old_model': old_model,
-            'new_model': new_model,
-            'old_model_productivity': old_model['Productivity_num'].mean() if len(old_model) > 0 else None,
-            'old_model_predictability': old_model['Predictability_num'].mean() if len(old_model) > 0 else None,
-            'new_model_productivity': new_model['Productivity_num'].mean() if len(new_model) > 0 else None,
-            'new_model_predictability': new_model['Predictability_num'].mean() if len(new_model) > 0 else None,
-        }
+        if self.window is None:
+            self.select_window()
+        # Every summary field is a graph metric; shared intermediates are computed once
+        fields = [name for name in TeamStatsSummary.field_names() if name != 'team']
+        self.summary = TeamStatsSummary(team=self.team_name, **self.graph.collect(fields))
+        self.stats = self.summary.to_dict()
+        stats = self.stats
 
         # Print statistics
         print(f"\n{'='*60}")
         print("STATISTICS SUMMARY")
         print(f"{'='*60}")
-        print(f"Average Productivity: {avg_productivity:.1%}")
-        print(f"Average Predictability: {avg_predictability:.1%}")
-        print(f"Coefficient of Variation: {cv_productivity:.1f}%")
-        print(f"Total Inflation: {total_inflation:.0f} SP across {inflation_count} sprints")
-
-        if transition_sprint:
-            print(f"\nModel Transition at: {transition_sprint}")
-            print(f"  {old_velocity} SP → {new_velocity} SP")
-            print(f"  Old Model Productivity: {self.stats['old_model_productivity']:.1%}")
-            print(f"  New Model Productivity: {self.stats['new_model_productivity']:.1%}")
-
-    def generate_dashboard(self):
-        """Generate 7-chart performance dashboard"""
-        print("\nGenerating performance dashboard...")
+        print(f"Average Productivity: {stats['avg_productivity']:.1%}")
+        print(f"Average Predictability: {stats['avg_predictability']:.1%}")
+        print(f"Coefficient of Variation: {stats['cv_productivity']:.1f}%")
+        print(f"Total Inflation: {stats['total_inflation']:.0f} SP across {stats['inflation_count']} sprints")
+        if stats['capacity_affected_sprints']:
+            print(f"Capacity-Adjusted Productivity: {stats['adjusted_productivity']:.1%} "
+                  f"(excluding {stats['capacity_affected_sprints']} holiday/absence sprints)")
 
-        df = self.df_clean
-        stats = self.stats
+        if stats['transition_sprint']:
+            print(f"\nModel Transition at: {stats['transition_sprint']}")
+            print(f"  {stats['old_velocity']} SP → {stats['new_velocity']} SP")
+            print(f"  Old Model Productivity: {stats['old_model_productivity']:.1%}")
+            print(f"  New Model Productivity: {stats['new_model_productivity']:.1%}")
+
+        # The estimation-bias fit is only needed by reports and dashboards
+        if 'report' in self.outputs:
+            print(f"Estimation bias: {describe_bias(self.estimation_bias.iloc[0])}")
+
+    def estimation_groups(self):
+        """(phase, sprints) groups for the estimation-bias fit: all sprints, plus each model after a transition"""
+        return self.metric('estimation_groups')
+
+    def expected_delivery(self):
+        """Delivered SP the phase's estimation-bias fit expects for each sprint's commitment"""
+        groups = self.estimation_groups()
+        expected = pd.Series(np.nan, index=self.df_clean.index)
+        for phase, sprints in (groups[1:] if len(groups) > 1 else groups):
+            expected[sprints.index] = expected_delivery(self.estimation_bias.loc[phase], sprints['Committed SP'])
+        return expected
+
+    def coaching_metrics(self):
+        """This team's row of the coaching rules' teams x metrics matrix"""
+        notes = self.df_clean['Notes'] if 'Notes' in self.df_clean.columns else None
+        return team_metrics(self.stats, notes)
+
+    def coaching_findings(self):
+        """Recommendations, strengths, needs and EBP blockers from the coaching rule table"""
+        metrics = metrics_frame([self.coaching_metrics()], [self.team_name])
+        fired = evaluate_rules(metrics, self.thresholds)
+        return team_findings(metrics, fired, self.team_name, self.thresholds)
+
+    def rank_against_peers(self, peer_index):
+        """Record this team's portfolio percentiles (adding or refreshing its PeerIndex entry)"""
+        peer_index.update_team(self.team_name, self.stats)
+        self.peer_position = format_percentiles(peer_index.team_percentiles(self.team_name), len(peer_index))
+        if self.peer_position:
+            print(f"Portfolio position: {self.peer_position}")
+        return self.peer_position
+
+    @property
+    def team_name_clean(self):
+        """Team name as used in output file names"""
+        return self.team_name.replace(' ', '').replace('-', '')
+
+    def model_phases(self):
+        """Return (old_model, new_model) sprint slices for the detected velocity models"""
+        return self.metric('model_phases')
+
+    # Dashboard grid: panel name -> (row, column, column span); panels are drawn in this order
+    DASHBOARD_LAYOUT = {
+        'productivity_trend': (0, 0, 2),
+        'predictability': (0, 2, 1),
+        'commitment_delivery': (1, 0, 2),
+        'model_comparison': (1, 2, 1),
+        'inflation': (2, 0, 1),
+        'scatter': (2, 1, 1),
+        'moving_averages': (2, 2, 1),
+    }
+
+    # Data each panel depends on: (columns of df_clean, keys of self.stats)
+    PANEL_INPUTS = {
+        'productivity_trend': (['Sprint', 'Productivity_num'],
+                               ['avg_productivity', 'transition_sprint', 'old_velocity', 'new_velocity',
+                                'capacity_affected_sprints', 'adjusted_productivity']),
+        'predictability': (['Sprint', 'Predictability_num'], ['avg_predictability', 'transition_sprint']),
+        'commitment_delivery': (['Sprint', 'Target Velocity', 'Committed SP', 'Delivered SP'],
+                                ['transition_sprint', 'old_velocity', 'new_velocity']),
+        'model_comparison': (['Target Velocity', 'Productivity_num'],
+                             ['transition_sprint', 'old_velocity', 'new_velocity']),
+        'inflation': (['Sprint', 'Inflation correction'], []),
+        'scatter': (['Target Velocity', 'Productivity_num', 'Predictability_num'],
+                    ['avg_productivity', 'avg_predictability', 'transition_sprint', 'old_velocity', 'new_velocity']),
+        'moving_averages': (['Sprint', 'Productivity_num'], []),
+    }
+
+    # Size of one grid cell and of the title band, in inches
+    PANEL_SIZE = (20 / 3, 4.0)
+    TITLE_HEIGHT = 0.8
+
+    # Long histories: trend lines are LTTB-downsampled, bars bucketed, tick labels thinned
+    MAX_LINE_POINTS = 120
+    MAX_MARKERS = 60
+    MAX_BARS = 60
+    MAX_TICK_LABELS = 20  # per grid column spanned
+
+    # Define colors
+    COLORS = {
+        'primary': '#1f77b4',
+        'secondary': '#ff7f0e',
+        'success': '#2ca02c',
+        'danger': '#d62728',
+        'old': '#ff6b6b',
+        'new': '#51cf66',
+    }
+
+    # Per-Axes dark-grid style (matches the former global 'seaborn-v0_8-darkgrid' style)
+    AXES_STYLE = {
+        'facecolor': '#EAEAF2',
+        'grid': 'white',
+        'text': '.15',
+        'median': '#bb9832',  # second color of the former husl palette
+    }
+
+    def render_dashboard(self, dpi=300, panel_cache=None):
+        """Render 7-chart performance dashboard to an in-memory PNG buffer
+
+        Each panel is rasterized on its own and keyed by a hash of its input data;
+        with a PanelCache, panels whose inputs are unchanged are reused instead of
+        redrawn, and only the final compositing step always runs.
+        """
+        print("\nGenerating performance dashboard...")
 
-        fig = plt.figure(figsize=(20, 12))
-        gs = fig.add_gridspec(3, 3, hspace=0.35, wspace=0.3)
+        panel_w, panel_h = (int(round(size * dpi)) for size in self.PANEL_SIZE)
+        title_h = int(round(self.TITLE_HEIGHT * dpi))
+
+        keys = {}
+        for name, (row, col, span) in self.DASHBOARD_LAYOUT.items():
+            columns, stat_keys = self.PANEL_INPUTS[name]
+            scalars = [self.stats[k] for k in stat_keys]
+            if name == 'moving_averages' and self.window[0] > 0:
+                # Moving averages at the window start reach back into earlier sprints
+                scalars.append(self.history['Productivity_num'].iloc[max(self.window[0] - 2, 0):self.window[0]].tolist())
+            keys[name] = panel_key(name, self.df_clean[columns], scalars, span, dpi)
+        title_inputs = [self.team_name] + ([self.peer_position] if self.peer_position else [])
+        keys['title'] = panel_key('title', self.df_clean.iloc[0:0], title_inputs, 3, dpi)
+
+        # Nothing changed at all: reuse the encoded dashboard
+        dashboard_key = composite_key(list(keys.values()))
+        if panel_cache is not None:
+            cached = panel_cache.get_image(dashboard_key)
+            if cached is not None:
+                print(f"Panels redrawn: 0/{len(self.DASHBOARD_LAYOUT)}")
+                return io.BytesIO(cached)
+
+        context = None
+        placements = []
+        redrawn = 0
+        for name, (row, col, span) in self.DASHBOARD_LAYOUT.items():
+            tile = panel_cache.get(keys[name]) if panel_cache is not None else None
+            if tile is None:
+                if context is None:
+                    context = self._dashboard_context()
+                tile = self._render_panel(getattr(self, f'_draw_{name}'), context, span, dpi)
+                redrawn += 1
+                if panel_cache is not None:
+                    panel_cache.put(keys[name], tile)
+            placements.append((tile, title_h + row * panel_h, col * panel_w))
 
-        # Define colors
-        color_primary = '#1f77b4'
-        color_secondary = '#ff7f0e'
-        color_success = '#2ca02c'
-        color_danger = '#d62728'
-        color_old = '#ff6b6b'
-        color_new = '#51cf66'
+        # Add main title
+        title = panel_cache.get(keys['title']) if panel_cache is not None else None
+        if title is None:
+            title = self._render_title(dpi)
+            if panel_cache is not None:
+                panel_cache.put(keys['title'], title)
+        placements.append((title, 0, 0))
+
+        print(f"Panels redrawn: {redrawn}/{len(self.DASHBOARD_LAYOUT)}")
+
+        canvas = compose_tiles(placements, 3 * panel_w, title_h + 3 * panel_h)
+        buffer = encode_png(canvas, dpi)
+        if panel_cache is not None:
+            panel_cache.put_image(dashboard_key, buffer.getvalue())
+        return buffer
+
+    def _dashboard_context(self):
+        """Values shared by several dashboard panels"""
+        df = self.df_clean
 
         # Find transition point for visualization
-        transition_idx = None
         transition_pos = None
-        if stats['transition_sprint']:
-            if stats['transition_sprint'] in df['Sprint'].values:
-                transition_idx = df[df['Sprint'] == stats['transition_sprint']].index[0]
+        if self.stats['transition_sprint']:
+            if self.stats['transition_sprint'] in df['Sprint'].values:
+                transition_idx = df[df['Sprint'] == self.stats['transition_sprint']].index[0]
                 transition_pos = df.index.get_loc(transition_idx)
 
+        old_model, new_model = self.model_phases()
+        return {'df': df, 'stats': self.stats, 'transition_pos': transition_pos,
+                'old_model': old_model, 'new_model': new_model}
+
+    def _new_figure(self, width, height, dpi):
+        """Standalone Agg figure; no pyplot state, so threads can render concurrently"""
+        fig = Figure(figsize=(width, height), dpi=dpi, facecolor='white')
+        FigureCanvasAgg(fig)
+        return fig
+
+    def _rasterize(self, fig):
+        fig.canvas.draw()
+        return np.asarray(fig.canvas.buffer_rgba()).copy()
+
+    def _style_axes(self, ax):
+        """Dark-grid look applied per Axes instead of through global rcParams"""
+        ax.set_facecolor(self.AXES_STYLE['facecolor'])
+        ax.set_axisbelow(True)
+        for spine in ax.spines.values():
+            spine.set_visible(False)
+        ax.grid(True, color=self.AXES_STYLE['grid'], linestyle='-')
+        ax.tick_params(axis='both', which='both', length=0, colors=self.AXES_STYLE['text'])
+
+    def _finish_axes(self, ax):
+        """Colour titles and labels, round line caps and drop legend frames after a panel is drawn"""
+        text_color = self.AXES_STYLE['text']
+        for text in (ax.title, ax.xaxis.label, ax.yaxis.label):
+            text.set_color(text_color)
+        for line in ax.get_lines():
+            line.set_solid_capstyle('round')
+        legend = ax.get_legend()
+        if legend is not None:
+            legend.set_frame_on(False)
+            for text in legend.get_texts():
+                text.set_color(text_color)
+            for line in legend.get_lines():
+                line.set_solid_capstyle('round')
+
+    def _render_panel(self, draw, context, span, dpi):
+        """Draw one panel on its own figure and return its RGBA pixels"""
+        fig = self._new_figure(self.PANEL_SIZE[0] * span, self.PANEL_SIZE[1], dpi)
+        ax = fig.add_subplot(1, 1, 1)
+        self._style_axes(ax)
+        draw(ax, context)
+        self._finish_axes(ax)
+        fig.tight_layout(pad=1.2)
+        return self._rasterize(fig)
+
+    def _render_title(self, dpi):
+        fig = self._new_figure(self.PANEL_SIZE[0] * 3, self.TITLE_HEIGHT, dpi)
+        fig.text(0.5, 0.62 if self.peer_position else 0.5, f'{self.team_name} Team Performance Dashboard',
+                 ha='center', va='center', fontsize=20, fontweight='bold', color=self.AXES_STYLE['text'])
+        if self.peer_position:
+            fig.text(0.5, 0.18, f'Portfolio position: {self.peer_position}',
+                     ha='center', va='center', fontsize=12, color=self.AXES_STYLE['text'])
+        return self._rasterize(fig)
+
+    def _set_sprint_ticks(self, ax, sprints, span, axis='x', positions=None):
+        """Label at most MAX_TICK_LABELS sprints per grid column"""
+        sprints = np.asarray(sprints)
+        ticks = thin_tick_positions(len(sprints), self.MAX_TICK_LABELS * span)
+        tick_positions = ticks if positions is None else np.asarray(positions)[ticks]
+        if axis == 'x':
+            ax.set_xticks(tick_positions)
+            ax.set_xticklabels(sprints[ticks])
+        else:
+            ax.set_yticks(tick_positions)
+            ax.set_yticklabels(sprints[ticks])
+
+    def _trend_line(self, values):
+        """Positions and values to draw for a trend line, downsampled when long"""
+        values = np.asarray(values, dtype=float)
+        keep = lttb_indices(values, self.MAX_LINE_POINTS)
+        return keep, values[keep]
+
+    def _draw_productivity_trend(self, ax1, context):
         # Chart 1: Productivity Trend Line (Top Left, spans 2 columns)
-        ax1 = fig.add_subplot(gs[0, :2])
-        ax1.plot(df['Sprint'], df['Productivity_num'] * 100,
-                 marker='o', linewidth=2.5, markersize=8, color=color_primary, label='Productivity')
-        ax1.fill_between(range(len(df)), df['Productivity_num'] * 100, alpha=0.3, color=color_primary)
-        ax1.axhline(y=stats['avg_productivity'] * 100, color=color_success, linestyle='--', linewidth=2,
+        df, stats, transition_pos = context['df'], context['stats'], context['transition_pos']
+        colors = self.COLORS
+        x_pos, productivity = self._trend_line(df['Productivity_num'] * 100)
+        markers = dict(marker='o', markersize=8) if len(x_pos) <= self.MAX_MARKERS else {}
+        ax1.plot(x_pos, productivity, linewidth=2.5, color=colors['primary'], label='Productivity', **markers)
+        ax1.fill_between(x_pos, productivity, alpha=0.3, color=colors['primary'])
+        ax1.axhline(y=stats['avg_productivity'] * 100, color=colors['success'], linestyle='--', linewidth=2,
                     label=f'Average ({stats["avg_productivity"]:.0%})', alpha=0.7)
+        if stats['capacity_affected_sprints']:
+            ax1.axhline(y=stats['adjusted_productivity'] * 100, color=colors['secondary'], linestyle=':', linewidth=2,
+                        label=f'Capacity-Adjusted ({stats["adjusted_productivity"]:.0%})', alpha=0.8)
 
         if transition_pos is not None:
-            ax1.axvline(x=transition_pos, color=color_danger, linestyle='--', linewidth=2.5,
+            ax1.axvline(x=transition_pos, color=colors['danger'], linestyle='--', linewidth=2.5,
                         label=f'Model Transition ({stats["old_velocity"]:.1f}→{stats["new_velocity"]:.1f} SP)', alpha=0.8)
 
         ax1.set_title('Productivity Trend Over Sprints', fontsize=16, fontweight='bold', pad=15)
@@ -200,19 +504,23 @@ class TeamPerformanceAnalyzer:
         ax1.legend(fontsize=10, loc='best')
         ax1.grid(True, alpha=0.3)
         ax1.set_ylim([0, max(df['Productivity_num'] * 100) * 1.2])
+        self._set_sprint_ticks(ax1, df['Sprint'], span=2)
         ax1.tick_params(axis='both', labelsize=8, width=1.5)
-        plt.setp(ax1.xaxis.get_majorticklabels(), rotation=45, ha='right', fontweight='bold')
-        plt.setp(ax1.yaxis.get_majorticklabels(), fontweight='bold')
+        setp(ax1.xaxis.get_majorticklabels(), rotation=45, ha='right', fontweight='bold')
+        setp(ax1.yaxis.get_majorticklabels(), fontweight='bold')
 
+    def _draw_predictability(self, ax2, context):
         # Chart 2: Predictability Trend Line (Top Right)
-        ax2 = fig.add_subplot(gs[0, 2])
-        ax2.plot(df['Sprint'], df['Predictability_num'] * 100,
-                 marker='s', linewidth=2.5, markersize=7, color=color_secondary, label='Predictability')
-        ax2.axhline(y=stats['avg_predictability'] * 100, color=color_success, linestyle='--', linewidth=2,
+        df, stats, transition_pos = context['df'], context['stats'], context['transition_pos']
+        colors = self.COLORS
+        x_pos, predictability = self._trend_line(df['Predictability_num'] * 100)
+        markers = dict(marker='s', markersize=7) if len(x_pos) <= self.MAX_MARKERS else {}
+        ax2.plot(x_pos, predictability, linewidth=2.5, color=colors['secondary'], label='Predictability', **markers)
+        ax2.axhline(y=stats['avg_predictability'] * 100, color=colors['success'], linestyle='--', linewidth=2,
                     label=f'Average ({stats["avg_predictability"]:.0%})', alpha=0.7)
 
         if transition_pos is not None:
-            ax2.axvline(x=transition_pos, color=color_danger, linestyle='--', linewidth=2, alpha=0.8)
+            ax2.axvline(x=transition_pos, color=colors['danger'], linestyle='--', linewidth=2, alpha=0.8)
 
         ax2.set_title('Predictability Evolution', fontsize=14, fontweight='bold', pad=15)
         ax2.set_xlabel('Sprint', fontsize=11, fontweight='bold')
@@ -221,47 +529,65 @@ class TeamPerformanceAnalyzer:
         ax2.grid(True, alpha=0.3)
         y_max = max(105, max(df['Predictability_num'] * 100) * 1.1)
         ax2.set_ylim([0, y_max])
+        self._set_sprint_ticks(ax2, df['Sprint'], span=1)
         ax2.tick_params(axis='both', labelsize=8, width=1.5)
-        plt.setp(ax2.xaxis.get_majorticklabels(), rotation=45, ha='right', fontweight='bold')
-        plt.setp(ax2.yaxis.get_majorticklabels(), fontweight='bold')
+        setp(ax2.xaxis.get_majorticklabels(), rotation=45, ha='right', fontweight='bold')
+        setp(ax2.yaxis.get_majorticklabels(), fontweight='bold')
 
+    def _draw_commitment_delivery(self, ax3, context):
         # Chart 3: Commitment vs Delivery Bar Chart (Middle Left, spans 2 columns)
-        ax3 = fig.add_subplot(gs[1, :2])
-        x_pos = np.arange(len(df))
+        df, transition_pos = context['df'], context['transition_pos']
+        colors = self.COLORS
+        # Long histories: one bar pair per bucket of sprints (average SP per sprint)
+        starts = bucket_starts(len(df), self.MAX_BARS)
+        committed = bucket_reduce(df['Committed SP'], starts)
+        delivered = bucket_reduce(df['Delivered SP'], starts)
+        bucketed = len(starts) < len(df)
+        x_pos = np.arange(len(starts))
         width = 0.35
 
-        bars1 = ax3.bar(x_pos - width/2, df['Committed SP'], width,
-                        label='Committed SP', color=color_secondary, alpha=0.8)
-        bars2 = ax3.bar(x_pos + width/2, df['Delivered SP'], width,
-                        label='Delivered SP', color=color_primary, alpha=0.8)
+        ax3.bar(x_pos - width/2, committed, width,
+                label='Committed SP', color=colors['secondary'], alpha=0.8)
+        ax3.bar(x_pos + width/2, delivered, width,
+                label='Delivered SP', color=colors['primary'], alpha=0.8)
+
+        # Estimation-bias fit per velocity model: what the team's commitments predict it delivers
+        expected = bucket_reduce(self.expected_delivery(), starts)
+        ax3.plot(x_pos, expected, color=colors['success'], linestyle='--', linewidth=2.5,
+                 label='Expected Delivery (fit)')
 
         if transition_pos is not None:
-            ax3.axvline(x=transition_pos, color=color_danger, linestyle='--', linewidth=2.5,
+            bucket_pos = np.searchsorted(starts, transition_pos, side='right') - 1
+            ax3.axvline(x=bucket_pos, color=colors['danger'], linestyle='--', linewidth=2.5,
                         label='Model Transition', alpha=0.8)
 
-        ax3.set_title('Commitment vs Delivery Comparison', fontsize=16, fontweight='bold', pad=15)
+        title = 'Commitment vs Delivery Comparison'
+        if bucketed:
+            title += f' (avg per ~{len(df) / len(starts):.0f} sprints)'
+        ax3.set_title(title, fontsize=16, fontweight='bold', pad=15)
         ax3.set_xlabel('Sprint', fontsize=12, fontweight='bold')
         ax3.set_ylabel('Story Points', fontsize=12, fontweight='bold')
-        ax3.set_xticks(x_pos)
-        ax3.set_xticklabels(df['Sprint'], rotation=45, ha='right')
+        self._set_sprint_ticks(ax3, df['Sprint'].to_numpy()[starts], span=2)
+        setp(ax3.xaxis.get_majorticklabels(), rotation=45, ha='right')
         ax3.legend(fontsize=10, loc='best')
         ax3.grid(True, alpha=0.3, axis='y')
         ax3.tick_params(axis='both', labelsize=8, width=1.5)
-        plt.setp(ax3.xaxis.get_majorticklabels(), fontweight='bold')
-        plt.setp(ax3.yaxis.get_majorticklabels(), fontweight='bold')
+        setp(ax3.xaxis.get_majorticklabels(), fontweight='bold')
+        setp(ax3.yaxis.get_majorticklabels(), fontweight='bold')
 
+    def _draw_model_comparison(self, ax4, context):
         # Chart 4: Model Comparison Box Plot (Middle Right)
-        ax4 = fig.add_subplot(gs[1, 2])
-        old_model = stats['old_model']
-        new_model = stats['new_model']
+        stats, old_model, new_model = context['stats'], context['old_model'], context['new_model']
+        colors = self.COLORS
 
         if len(old_model) > 0 and len(new_model) > 0:
             box_data = [old_model['Productivity_num'] * 100, new_model['Productivity_num'] * 100]
             bp = ax4.boxplot(box_data, labels=[f'Old Model\n({stats["old_velocity"]:.1f} SP)',
                                                 f'New Model\n({stats["new_velocity"]:.1f} SP)'],
-                             patch_artist=True, widths=0.6)
-            bp['boxes'][0].set_facecolor(color_old)
-            bp['boxes'][1].set_facecolor(color_new)
+                             patch_artist=True, widths=0.6,
+                             medianprops={'color': self.AXES_STYLE['median']})
+            bp['boxes'][0].set_facecolor(colors['old'])
+            bp['boxes'][1].set_facecolor(colors['new'])
             for box in bp['boxes']:
                 box.set_alpha(0.7)
         else:
@@ -272,35 +598,48 @@ class TeamPerformanceAnalyzer:
         ax4.set_ylabel('Productivity (%)', fontsize=11, fontweight='bold')
         ax4.grid(True, alpha=0.3, axis='y')
         ax4.tick_params(axis='both', labelsize=8, width=1.5)
-        plt.setp(ax4.xaxis.get_majorticklabels(), fontweight='bold')
-        plt.setp(ax4.yaxis.get_majorticklabels(), fontweight='bold')
+        setp(ax4.xaxis.get_majorticklabels(), fontweight='bold')
+        setp(ax4.yaxis.get_majorticklabels(), fontweight='bold')
 
+    def _draw_inflation(self, ax5, context):
         # Chart 5: Inflation Corrections Horizontal Bar (Bottom Left)
-        ax5 = fig.add_subplot(gs[2, 0])
-        colors_inflation = [color_danger if x < 0 else color_success if x > 0 else 'gray'
-                            for x in df['Inflation correction']]
-        ax5.barh(df['Sprint'], df['Inflation correction'], color=colors_inflation, alpha=0.7)
-        ax5.set_title('Inflation Corrections', fontsize=14, fontweight='bold', pad=15)
+        df = context['df']
+        colors = self.COLORS
+        # Long histories: one bar per bucket of sprints (total SP in the bucket)
+        starts = bucket_starts(len(df), self.MAX_BARS)
+        inflation = bucket_reduce(df['Inflation correction'], starts, how='sum')
+        colors_inflation = np.where(inflation < 0, colors['danger'],
+                                    np.where(inflation > 0, colors['success'], 'gray'))
+        y_pos = np.arange(len(starts))
+        ax5.barh(y_pos, inflation, color=colors_inflation, alpha=0.7)
+        self._set_sprint_ticks(ax5, df['Sprint'].to_numpy()[starts], span=1, axis='y')
+        title = 'Inflation Corrections'
+        if len(starts) < len(df):
+            title += f' (per ~{len(df) / len(starts):.0f} sprints)'
+        ax5.set_title(title, fontsize=14, fontweight='bold', pad=15)
         ax5.set_xlabel('Story Points', fontsize=11, fontweight='bold')
         ax5.set_ylabel('Sprint', fontsize=11, fontweight='bold')
         ax5.axvline(x=0, color='black', linewidth=1)
         ax5.grid(True, alpha=0.3, axis='x')
         ax5.invert_yaxis()
         ax5.tick_params(axis='both', labelsize=8, width=1.5)
-        plt.setp(ax5.xaxis.get_majorticklabels(), fontweight='bold')
-        plt.setp(ax5.yaxis.get_majorticklabels(), fontweight='bold')
+        setp(ax5.xaxis.get_majorticklabels(), fontweight='bold')
+        setp(ax5.yaxis.get_majorticklabels(), fontweight='bold')
 
+    def _draw_scatter(self, ax6, context):
         # Chart 6: Productivity vs Predictability Scatter (Bottom Center)
-        ax6 = fig.add_subplot(gs[2, 1])
+        df, stats = context['df'], context['stats']
+        old_model, new_model = context['old_model'], context['new_model']
+        colors = self.COLORS
         if len(old_model) > 0:
             ax6.scatter(old_model['Productivity_num'] * 100, old_model['Predictability_num'] * 100,
-                        s=120, c=color_old, alpha=0.7, label='Old Model', edgecolors='black', linewidth=1)
+                        s=120, c=colors['old'], alpha=0.7, label='Old Model', edgecolors='black', linewidth=1)
         if len(new_model) > 0:
             ax6.scatter(new_model['Productivity_num'] * 100, new_model['Predictability_num'] * 100,
-                        s=120, c=color_new, alpha=0.7, label='New Model', edgecolors='black', linewidth=1)
+                        s=120, c=colors['new'], alpha=0.7, label='New Model', edgecolors='black', linewidth=1)
         if len(new_model) == 0:
             ax6.scatter(df['Productivity_num'] * 100, df['Predictability_num'] * 100,
-                        s=120, c=color_primary, alpha=0.7, label='All Sprints', edgecolors='black', linewidth=1)
+                        s=120, c=colors['primary'], alpha=0.7, label='All Sprints', edgecolors='black', linewidth=1)
 
         # Add quadrant lines
         ax6.axhline(y=stats['avg_predictability'] * 100, color='gray', linestyle='--', linewidth=1, alpha=0.5)
@@ -312,20 +651,24 @@ class TeamPerformanceAnalyzer:
         ax6.legend(fontsize=9, loc='best')
         ax6.grid(True, alpha=0.3)
         ax6.tick_params(axis='both', labelsize=8, width=1.5)
-        plt.setp(ax6.xaxis.get_majorticklabels(), fontweight='bold')
-        plt.setp(ax6.yaxis.get_majorticklabels(), fontweight='bold')
+        setp(ax6.xaxis.get_majorticklabels(), fontweight='bold')
+        setp(ax6.yaxis.get_majorticklabels(), fontweight='bold')
 
+    def _draw_moving_averages(self, ax7, context):
         # Chart 7: Moving Average Trends (Bottom Right)
-        ax7 = fig.add_subplot(gs[2, 2])
-        ax7.plot(df['Sprint'], df['Productivity_num'] * 100,
-                 marker='o', linewidth=2, markersize=6, alpha=0.5, label='Actual', color=color_primary)
+        df = context['df']
+        colors = self.COLORS
+        x_pos, actual = self._trend_line(df['Productivity_num'] * 100)
+        markers = dict(marker='o', markersize=6) if len(x_pos) <= self.MAX_MARKERS else {}
+        ax7.plot(x_pos, actual, linewidth=2, alpha=0.5, label='Actual', color=colors['primary'], **markers)
 
-        # Calculate moving averages
-        ma2 = df['Productivity_num'].rolling(window=2).mean() * 100
-        ma3 = df['Productivity_num'].rolling(window=3).mean() * 100
+        # Moving averages from the cumulative sums; inside a window they include earlier sprints
+        ma2 = self.moving_average(2) * 100
+        ma3 = self.moving_average(3) * 100
 
-        ax7.plot(df['Sprint'], ma2, linewidth=2.5, label='MA(2)', color=color_secondary)
-        ax7.plot(df['Sprint'], ma3, linewidth=2.5, label='MA(3)', color=color_success, linestyle='--')
+        ax7.plot(*self._trend_line(ma2), linewidth=2.5, label='MA(2)', color=colors['secondary'])
+        ax7.plot(*self._trend_line(ma3), linewidth=2.5, label='MA(3)', color=colors['success'], linestyle='--')
+        self._set_sprint_ticks(ax7, df['Sprint'], span=1)
 
         ax7.set_title('Moving Averages', fontsize=14, fontweight='bold', pad=15)
         ax7.set_xlabel('Sprint', fontsize=11, fontweight='bold')
@@ -333,42 +676,63 @@ class TeamPerformanceAnalyzer:
         ax7.legend(fontsize=9, loc='best')
         ax7.grid(True, alpha=0.3)
         ax7.tick_params(axis='both', labelsize=8, width=1.5)
-        plt.setp(ax7.xaxis.get_majorticklabels(), rotation=45, ha='right', fontweight='bold')
-        plt.setp(ax7.yaxis.get_majorticklabels(), fontweight='bold')
+        setp(ax7.xaxis.get_majorticklabels(), rotation=45, ha='right', fontweight='bold')
+        setp(ax7.yaxis.get_majorticklabels(), fontweight='bold')
 
-        # Add main title
-        team_name_clean = self.team_name.replace(' ', '').replace('-', '')
-        fig.suptitle(f'{self.team_name} Team Performance Dashboard',
-                     fontsize=20, fontweight='bold', y=0.98)
+    def generate_dashboard(self, output_file=None, panel_cache=None):
+        """Generate 7-chart performance dashboard and write it to a path or binary stream"""
+        if output_file is None:
+            output_file = f'{self.team_name_clean}_Performance_Dashboard.png'
 
-        # Save dashboard
-        output_file = f'{team_name_clean}_Performance_Dashboard.png'
-        plt.savefig(output_file, dpi=300, bbox_inches='tight', facecolor='white')
-        print(f"Dashboard saved: {output_file}")
-        plt.close()
+        _write_artifact(self.render_dashboard(panel_cache=panel_cache).getvalue(), output_file)
+        print(f"Dashboard saved: {getattr(output_file, 'name', output_file)}")
 
         return output_file
 
-    def generate_markdown_report(self):
-        """Generate coaching-focused markdown analysis report"""
+    def render_html_dashboard(self):
+        """Render interactive self-contained HTML dashboard as a string"""
+        print("\nGenerating interactive HTML dashboard...")
+        return render_html_dashboard(build_dashboard_payload(self))
+
+    def generate_html_dashboard(self, output_file=None):
+        """Generate interactive HTML dashboard and write it to a path or text stream"""
+        if output_file is None:
+            output_file = f'{self.team_name_clean}_Performance_Dashboard.html'
+
+        html = self.render_html_dashboard()
+        _write_artifact(html, output_file)
+        print(f"HTML dashboard saved: {getattr(output_file, 'name', output_file)} "
+              f"({len(html.encode('utf-8')) / 1024:.0f} KB)")
+
+        return output_file
+
+    def render_markdown_report(self, dashboard_file=None):
+        """Render coaching-focused markdown analysis report as a string"""
         print("\nGenerating markdown analysis report...")
 
         df = self.df_clean
         stats = self.stats
-        team_name_clean = self.team_name.replace(' ', '').replace('-', '')
+        if dashboard_file is None:
+            dashboard_file = f'{self.team_name_clean}_Performance_Dashboard.png'
+        if dashboard_file.endswith('.html'):
+            dashboard_embed = f"[Open interactive {self.team_name} Performance Dashboard]({dashboard_file})"
+        else:
+            dashboard_embed = f"![{self.team_name} Performance Dashboard]({dashboard_file})"
 
         # Determine sprint range
         first_sprint = df.iloc[0]['Sprint']
         last_sprint = df.iloc[-1]['Sprint']
+        history = len(self.history) if self.history is not None else len(df)
+        window_note = f" of {history} in the export" if history != len(df) else ""
 
         # Analyze key patterns
         productivity_status = "exceeding 75-85% benchmark" if stats['avg_productivity'] > 0.75 else "below 75-85% benchmark"
         cv_status = "mature and stable" if stats['cv_productivity'] < 15 else "volatile and unstable"
-        inflation_frequency = stats['inflation_count'] / stats['total_sprints']
+        inflation_frequency = stats['inflation_frequency']
 
         # Generate report
         report = f"""# {self.team_name} Team Performance Analysis Report
-**Sprint Range:** {first_sprint} to {last_sprint} ({stats['total_sprints']} sprints)
+**Sprint Range:** {first_sprint} to {last_sprint} ({stats['total_sprints']} sprints{window_note})
 **Team:** {self.team_name}
 **Analysis Date:** {datetime.now().strftime('%Y-%m-%d')}
 
@@ -382,28 +746,22 @@ class TeamPerformanceAnalyzer:
 - **Volatility:** {stats['cv_productivity']:.1f}% coefficient of variation ({cv_status}, benchmark: <15%)
 - **Inflation:** {stats['total_inflation']:.0f} SP across {stats['inflation_count']} sprints ({inflation_frequency:.0%} of sprints)
 """
+        if self.peer_position:
+            report += f"- **Portfolio Position:** {self.peer_position}\n"
 
         if stats['transition_sprint']:
-            productivity_change = stats['new_model_productivity'] - stats['old_model_productivity']
+            productivity_change = self.metric('productivity_change')
             change_direction = "improved" if productivity_change > 0 else "declined"
             report += f"- **Model Transition Impact:** Productivity {change_direction} from {stats['old_model_productivity']:.1%} to {stats['new_model_productivity']:.1%} after switching from {stats['old_velocity']:.1f} SP to {stats['new_velocity']:.1f} SP at {stats['transition_sprint']}\n"
 
         # EBP Readiness Assessment
-        ebp_ready = (stats['cv_productivity'] < 15 and
-                     stats['avg_productivity'] > 0.70 and
-                     inflation_frequency < 0.3)
+        findings = self.coaching_findings()
 
         report += f"\n**Bottom Line:** "
-        if ebp_ready:
+        if not findings['ebp_blocker']:
             report += f"Team demonstrates stable performance and is ready for Epic-Based Pricing consideration.\n"
         else:
-            issues = []
-            if stats['cv_productivity'] >= 15:
-                issues.append(f"reduce volatility from {stats['cv_productivity']:.1f}% to <15%")
-            if stats['avg_productivity'] <= 0.70:
-                issues.append(f"improve productivity from {stats['avg_productivity']:.0%} to 70%+")
-            if inflation_frequency >= 0.3:
-                issues.append(f"reduce inflation frequency from {inflation_frequency:.0%} to <30%")
+            issues = [item['description'] for item in findings['ebp_blocker']]
             report += f"Not ready for EBP until: {', '.join(issues)}.\n"
 
         report += f"""
@@ -427,7 +785,7 @@ class TeamPerformanceAnalyzer:
 |--------|-------|
 | Average Committed SP | {stats['avg_committed']:.1f} |
 | Average Delivered SP | {stats['avg_delivered']:.1f} |
-| Average Gap | {stats['avg_committed'] - stats['avg_delivered']:.1f} SP |
+| Average Gap | {self.metric('avg_gap'):.1f} SP |
 | Total Inflation | {stats['total_inflation']:.0f} SP |
 | Sprints with Inflation | {stats['inflation_count']}/{stats['total_sprints']} ({inflation_frequency:.0%}) |
 """
@@ -440,9 +798,53 @@ class TeamPerformanceAnalyzer:
 
 | Metric | Old Model | New Model | Change |
 |--------|-----------|-----------|--------|
-| Avg Productivity | {stats['old_model_productivity']:.1%} | {stats['new_model_productivity']:.1%} | {(stats['new_model_productivity'] - stats['old_model_productivity']):.1%} |
-| Avg Predictability | {stats['old_model_predictability']:.1%} | {stats['new_model_predictability']:.1%} | {(stats['new_model_predictability'] - stats['old_model_predictability']):.1%} |
-| Sprint Count | {len(stats['old_model'])} | {len(stats['new_model'])} | - |
+| Avg Productivity | {stats['old_model_productivity']:.1%} | {stats['new_model_productivity']:.1%} | {self.metric('productivity_change'):.1%} |
+| Avg Predictability | {stats['old_model_predictability']:.1%} | {stats['new_model_predictability']:.1%} | {self.metric('predictability_change'):.1%} |
+| Sprint Count | {stats['old_model_count']} | {stats['new_model_count']} | - |
+"""
+
+        report += """
+### Estimation Bias
+
+Least-squares fit of delivered against committed SP per velocity model
+(drawn as *Expected Delivery* on the Commitment vs Delivery chart).
+
+| Phase | Sprints | Slope | Intercept | Residual SD | Inflation Trend |
+|-------|---------|-------|-----------|-------------|-----------------|
+"""
+        for phase, bias in self.estimation_bias.iterrows():
+            if np.isnan(bias['slope']):
+                report += f"| {phase} | {int(bias['sprints'])} | - | - | - | - |\n"
+                continue
+            report += (f"| {phase} | {int(bias['sprints'])} | {bias['slope']:.2f} | {bias['intercept']:+.1f} SP | "
+                       f"{bias['residual_sd']:.1f} SP | {bias['inflation_trend']:+.2f} SP/sprint |\n")
+        overall = self.estimation_bias.iloc[0]
+        if np.isnan(overall['slope']):
+            report += "\n**Reading:** too few sprints with commitments to fit a line.\n"
+        else:
+            report += f"\n**Reading:** the team {describe_bias(overall)}.\n"
+
+        if self.note_tags is not None and self.note_tags.any().any():
+            report += """
+### Capacity-Adjusted Productivity
+
+Sprint notes tagged by the notes classifier; holiday and absence sprints had
+less capacity than planned, so they are excluded or down-weighted below.
+
+| Tag | Sprints |
+|-----|---------|
+"""
+            for tag, sprints in self.note_tags.items():
+                if sprints.any():
+                    labels = ', '.join(str(sprint) for sprint in df.loc[sprints[sprints].index, 'Sprint'])
+                    report += f"| {tag.replace('_', ' ').title()} | {labels} |\n"
+            if stats['capacity_affected_sprints']:
+                report += f"""
+| Metric | All Sprints | Excluding Affected | Reweighted (×{CAPACITY_WEIGHT:g}) |
+|--------|-------------|--------------------|-------------------|
+| Avg Productivity | {stats['avg_productivity']:.1%} | {stats['adjusted_productivity']:.1%} | {stats['reweighted_productivity']:.1%} |
+| CV | {stats['cv_productivity']:.1f}% | {stats['adjusted_cv_productivity']:.1f}% | - |
+| Sprints | {stats['total_sprints']} | {stats['total_sprints'] - stats['capacity_affected_sprints']} | {stats['total_sprints']} |
 """
 
         report += """
@@ -487,9 +889,27 @@ class TeamPerformanceAnalyzer:
         else:
             report += "- **Clean Estimation:** No inflation corrections needed\n"
 
+        if self.anomalies:
+            report += "\n### Sprint Anomalies\n\n"
+            report += "| Sprint | Metric | Value | Expected | Score |\n"
+            report += "|--------|--------|-------|----------|-------|\n"
+            for event in self.anomalies:
+                score = 'limit' if event.method == 'limit' else f"{event.score:+.1f}"
+                report += (f"| {event.sprint} | {event.label} | {event.format_value(event.value)} | "
+                           f"{event.format_value(event.expected)} | {score} |\n")
+
+        if self.derivation_issues is not None and len(self.derivation_issues):
+            report += "\n### Data Consistency\n\n"
+            report += (f"{len(self.derivation_issues)} supplied value(s) disagree with the value derived from "
+                       "Target Velocity, Committed, Delivered and Inflation SP:\n\n")
+            for _, issue in self.derivation_issues.head(10).iterrows():
+                report += f"- {format_disagreement(issue)}\n"
+            if len(self.derivation_issues) > 10:
+                report += f"- *...and {len(self.derivation_issues) - 10} more*\n"
+
         # Add sprint notes if available
         notes_list = []
-        for idx, row in df.iterrows():
+        for idx, row in (df.iterrows() if 'Notes' in df.columns else []):
             if pd.notna(row['Notes']) and row['Notes'].strip():
                 notes_list.append(f"- **{row['Sprint']}:** {row['Notes']}")
 
@@ -505,12 +925,12 @@ class TeamPerformanceAnalyzer:
 
 ## Visual Analysis Dashboard
 
-![{self.team_name} Performance Dashboard]({team_name_clean}_Performance_Dashboard.png)
+{dashboard_embed}
 
 **Dashboard Insights:**
 - **Top Left:** Productivity trend shows {'stable progression' if stats['cv_productivity'] < 15 else 'high volatility'} over sprint range
 - **Top Right:** Predictability evolution indicates {'consistent delivery' if stats['avg_predictability'] > 0.75 else 'variable commitment accuracy'}
-- **Middle Left:** Commitment vs delivery gap averages {stats['avg_committed'] - stats['avg_delivered']:.1f} SP per sprint
+- **Middle Left:** Commitment vs delivery gap averages {self.metric('avg_gap'):.1f} SP per sprint
 - **Bottom Left:** Inflation corrections total {stats['total_inflation']:.0f} SP across {stats['inflation_count']} sprints
 - **Bottom Center:** Scatter plot reveals {'clustered performance pattern' if stats['cv_productivity'] < 20 else 'dispersed performance pattern'}
 - **Bottom Right:** Moving averages {'converge toward stable baseline' if stats['cv_productivity'] < 20 else 'show continued volatility'}
@@ -522,55 +942,7 @@ class TeamPerformanceAnalyzer:
 ### Priority Interventions
 """
 
-        # Generate recommendations based on data
-        recommendations = []
-
-        if stats['cv_productivity'] > 20:
-            recommendations.append({
-                'title': 'Volatility Reduction Workshop',
-                'priority': 1,
-                'description': f"Address {stats['cv_productivity']:.1f}% coefficient of variation through root cause analysis"
-            })
-
-        if inflation_frequency > 0.5:
-            recommendations.append({
-                'title': 'Definition of Ready Enhancement',
-                'priority': 1,
-                'description': f"Fix systematic inflation pattern affecting {inflation_frequency:.0%} of sprints"
-            })
-
-        if stats['avg_productivity'] < 0.65:
-            recommendations.append({
-                'title': 'Productivity Blockers Analysis',
-                'priority': 1,
-                'description': f"Identify constraints limiting productivity to {stats['avg_productivity']:.1%}"
-            })
-
-        if stats['transition_sprint'] and len(stats['new_model']) < 5:
-            recommendations.append({
-                'title': 'New Model Baseline Discovery',
-                'priority': 2,
-                'description': f"Run learning sprints to establish stable baseline under {stats['new_velocity']:.1f} SP model"
-            })
-
-        if stats['avg_predictability'] < 0.70:
-            recommendations.append({
-                'title': 'Estimation Calibration Workshop',
-                'priority': 2,
-                'description': f"Improve commitment accuracy from {stats['avg_predictability']:.1%} to 75%+"
-            })
-
-        # Add capacity planning if there are notes about holidays/capacity
-        capacity_notes = [note for note in notes_list if any(word in note.lower() for word in ['holiday', 'fte', 'capacity', 'absence'])]
-        if capacity_notes:
-            recommendations.append({
-                'title': 'Capacity-Adjusted Planning Protocol',
-                'priority': 2,
-                'description': "Implement systematic capacity adjustment for holidays and team changes"
-            })
-
-        # Sort by priority and add to report
-        recommendations.sort(key=lambda x: x['priority'])
+        recommendations = findings['recommendation']
 
         for i, rec in enumerate(recommendations[:6], 1):
             report += f"\n#### {i}. {rec['title']}\n"
@@ -589,30 +961,14 @@ class TeamPerformanceAnalyzer:
 **What the Team Has:**
 """
 
-        strengths = []
-        if stats['avg_productivity'] > 0.75:
-            strengths.append(f"Strong productivity capability ({stats['avg_productivity']:.1%})")
-        if stats['avg_predictability'] > 0.75:
-            strengths.append(f"Reliable commitment discipline ({stats['avg_predictability']:.1%})")
-        if stats['cv_productivity'] < 20:
-            strengths.append(f"Relatively stable delivery rhythm ({stats['cv_productivity']:.1f}% CV)")
-        if not strengths:
-            strengths.append("Willingness to improve and track metrics")
+        strengths = [item['description'] for item in findings['strength']] or [FALLBACKS['strength']]
 
         for strength in strengths[:3]:
             report += f"- {strength}\n"
 
         report += "\n**What the Team Needs:**\n"
 
-        needs = []
-        if stats['cv_productivity'] > 15:
-            needs.append(f"Volatility reduction from {stats['cv_productivity']:.1f}% to <15% CV")
-        if stats['avg_productivity'] < 0.70:
-            needs.append(f"Productivity improvement from {stats['avg_productivity']:.0%} to 70%+")
-        if inflation_frequency > 0.3:
-            needs.append(f"Inflation frequency reduction from {inflation_frequency:.0%} to <30%")
-        if not needs:
-            needs.append("Continued focus on maintaining stable performance")
+        needs = [item['description'] for item in findings['need']] or [FALLBACKS['need']]
 
         for need in needs[:3]:
             report += f"- {need}\n"
@@ -628,66 +984,437 @@ Focus on {'celebrating strengths while addressing specific process gaps' if stre
 **Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 """
 
-        # Save report
-        output_file = f'{team_name_clean}_Performance_Analysis.md'
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(report)
+        return report
 
-        print(f"Analysis report saved: {output_file}")
+    def generate_markdown_report(self, dashboard_file=None, output_file=None):
+        """Generate markdown analysis report and write it to a path or text stream"""
+        if output_file is None:
+            output_file = f'{self.team_name_clean}_Performance_Analysis.md'
+
+        report = self.render_markdown_report(dashboard_file)
+        _write_artifact(report, output_file)
+
+        print(f"Analysis report saved: {getattr(output_file, 'name', output_file)}")
         print(f"Report word count: {len(report.split())}")
 
         return output_file
 
 
-def main():
-    """Main execution function"""
-    if len(sys.argv) < 2:
-        print("Usage: python generate_team_analysis.py <csv_file_path>")
-        print("\nExample:")
-        print("  python generate_team_analysis.py MyTeamProductivity20251108.csv")
-        sys.exit(1)
+# Batch mode lets reports run ahead of PNG rasterization by at most this many teams
+MAX_PENDING_RENDERS = 16
+
+
+def analyze_team(csv_file, args, render_pool, pending=None, label=None):
+    """Run the analysis pipeline for one team and return the analyzer
+
+    The PNG dashboard is rasterized on `render_pool` while the HTML dashboard and
+    the report are written on the calling thread; the report only needs the
+    statistics and the dashboard file name, so it overlaps the slow render.
+    With `pending` (batch mode) the render future is appended there instead of
+    being awaited, so reports for later teams are not held up by images.
+    `label` names a stream source (e.g. a zip member) in failure messages.
+    """
+    # Create analyzer instance, reading only the columns the requested outputs need
+    outputs = ('stats',) if args.stats_only else DEFAULT_OUTPUTS
+    if args.check_formulas:
+        # The Normalized* and moving-average columns are only read for exports
+        outputs += ('export',)
+    analyzer = TeamPerformanceAnalyzer(csv_file, outputs=outputs, thresholds=args.thresholds)
+
+    # Read and clean data
+    analyzer.read_and_clean_data()
+    analyzer.select_window(args.window, args.since)
+
+    # Flag anomalous sprints as they stream in
+    analyzer.detect_anomalies(StreamingAnomalyDetector(method=args.anomaly_method,
+                                                       threshold=args.anomaly_threshold,
+                                                       on_event=print_anomaly_event))
+
+    # Tag sprint notes (the classifier's cache is shared by every team of the run)
+    analyzer.classify_notes(args.notes_classifier)
+
+    # Calculate statistics
+    analyzer.calculate_statistics()
+
+    if args.peers is not None:
+        analyzer.rank_against_peers(args.peers)
+
+    if args.stats_only:
+        return analyzer
+
+    # Start the PNG dashboard first, then write the cheap outputs while it renders
+    dashboard_files = []
+    renders = []
+    if args.format in ('png', 'both'):
+        png_file = f'{analyzer.team_name_clean}_Performance_Dashboard.png'
+        panel_cache = PanelCache(args.panel_cache) if args.panel_cache else None
+        renders.append(render_pool.submit(analyzer.generate_dashboard, png_file, panel_cache))
+        dashboard_files.append(png_file)
+    if args.format in ('html', 'both'):
+        dashboard_files.append(analyzer.generate_html_dashboard())
+
+    # Generate markdown report
+    report_file = analyzer.generate_markdown_report(dashboard_files[0])
+
+    if pending is None:
+        for future in renders:
+            future.result()
+    else:
+        pending.extend((label or csv_file, future) for future in renders)
 
-    csv_file = sys.argv[1]
+    print(f"\n{'='*60}")
+    print("ANALYSIS COMPLETE")
+    print(f"{'='*60}")
+    print(f"\nGenerated files:")
+    for dashboard_file in dashboard_files:
+        queued = any(not future.done() for future in renders) and dashboard_file.endswith('.png')
+        print(f"  - Dashboard: {dashboard_file}{' (rendering)' if queued else ''}")
+    print(f"  - Report:    {report_file}")
+    print(f"\nTeam: {analyzer.team_name}")
+    print(f"Sprints analyzed: {analyzer.stats['total_sprints']}")
+    print(f"Average productivity: {analyzer.stats['avg_productivity']:.1%}")
+    print(f"Coefficient of variation: {analyzer.stats['cv_productivity']:.1f}%")
+    print(f"Anomalies flagged: {len(analyzer.anomalies)}")
+
+    return analyzer
+
+
+def index_peers(csv_files, args):
+    """Add every team's peer metrics to args.peers before any team is ranked
+
+    Reports then rank against the complete portfolio whatever the input order.
+    Only the windowed sums are needed, so this pass is cheap; files that fail
+    are skipped here and reported by the analysis pass.
+    """
+    indexed = 0
+    for label, source in iter_input_sources(csv_files):
+        analyzer = TeamPerformanceAnalyzer(source, outputs=('stats',), thresholds=args.thresholds)
+        try:
+            # The analysis pass prints the per-team details
+            with redirect_stdout(io.StringIO()):
+                analyzer.read_and_clean_data()
+                analyzer.select_window(args.window, args.since)
+        except Exception:
+            continue
+        args.peers.update_team(analyzer.team_name, {metric: analyzer.metric(metric) for metric in PEER_METRICS})
+        indexed += 1
+    return indexed
+
+
+def _report_failure(csv_file, error, failures):
+    if isinstance(error, SprintSchemaError):
+        print(f"\nInvalid input: {str(error)}")
+    else:
+        print(f"\nError during analysis of '{csv_file}': {str(error)}")
+        import traceback
+        traceback.print_exception(type(error), error, error.__traceback__)
+    failures.append(csv_file)
+
+
+def _store_team(store_writer, analyzer):
+    """Append a team to the sprint store; a team seen again in the same run keeps its first snapshot"""
+    if analyzer.team_name in store_writer:
+        print(f"Warning: team '{analyzer.team_name}' appears more than once; "
+              f"the sprint store keeps its first snapshot")
+        return
+    store_writer.add_team(analyzer.team_name, analyzer.history)
+
+
+def wait_for_renders(pending, failures, keep=0):
+    """Wait for queued dashboard renders, oldest first, until at most `keep` remain"""
+    while len(pending) > keep:
+        csv_file, future = pending.pop(0)
+        try:
+            future.result()
+        except Exception as e:
+            _report_failure(csv_file, e, failures)
+
+
+def iter_team_summaries(csv_files, args, failures, render_pool, pending=None, collectors=()):
+    """Analyze teams one at a time, yielding each TeamStatsSummary
+
+    Paths may be plain CSVs, .csv.gz/.csv.zst files or zips of exports; compressed
+    inputs are decompressed as streams, one team at a time.
+
+    Each analyzer (and its DataFrames) is released before the next team is read,
+    or once its queued dashboard has rendered when `pending` is given, so a
+    streaming exporter only ever holds the current team's scalars.
+    Each of `collectors` is called with the analyzer before it is released, e.g. to
+    keep the few sprint columns org rollups need or to append to a sprint store.
+    Files that fail are appended to `failures` and skipped.
+    """
+    for label, source in iter_input_sources(csv_files):
+        try:
+            analyzer = analyze_team(source, args, render_pool, pending, label)
+        except Exception as e:
+            _report_failure(label, e, failures)
+            continue
+        for collect in collectors:
+            collect(analyzer)
+        if pending is not None:
+            # Backpressure: bound how far reports may run ahead of the image queue
+            wait_for_renders(pending, failures, keep=MAX_PENDING_RENDERS)
+        yield analyzer.summary
+
+
+def generate_coaching_portfolio(coaching_rows, args):
+    """Evaluate the coaching rules for every team of the run in one pass
+
+    Prints how many teams trigger each rule and, with --portfolio-rules, writes
+    the teams x rules matrix as CSV. Returns the boolean matrix.
+    """
+    teams = [team for team, _ in coaching_rows]
+    metrics = metrics_frame([row for _, row in coaching_rows], teams)
+    fired = evaluate_rules(metrics, args.thresholds)
+
+    print(f"\n{'='*60}")
+    print("PORTFOLIO COACHING RULES")
+    print(f"{'='*60}")
+    for _, row in rule_summary(fired).iterrows():
+        if row['teams']:
+            print(f"{row['rule']} ({row['kind']}): {int(row['teams'])} of {len(fired)} teams")
+    if args.portfolio_rules:
+        metrics.join(fired.astype(int)).to_csv(args.portfolio_rules)
+        print(f"Portfolio rule matrix saved: {args.portfolio_rules}")
+    return fired
+
+
+def generate_estimation_bias(bias_groups, args):
+    """Fit every team's estimation-bias lines in one batched pass and write them to CSV"""
+    bias = fit_estimation_bias(bias_groups)
+    bias.index.names = ['team', 'phase']
+    bias.to_csv(args.estimation_bias)
+    overall = bias.xs('All sprints', level='phase')
+    over = overall[overall['slope'] < 0.9]
+    print(f"\nEstimation bias for {len(overall)} team(s) saved: {args.estimation_bias}")
+    print(f"Median slope: {overall['slope'].median():.2f} delivered SP per committed SP; "
+          f"{len(over)} team(s) below 0.90")
+    return bias
+
+
+def generate_rollups(rollup_rows, hierarchy, args, coaching=None):
+    """Roll this run's teams up the org hierarchy and write the rollup outputs"""
+    rollup = OrgRollup(hierarchy, weight=args.rollup_weight)
+    if args.rollup_state:
+        rollup.load(args.rollup_state)
+    if rollup_rows:
+        # One grouped pass over this run's sprint rows; saved teams not in this run are kept
+        rollup.update_team(rollup_rows)
+    if rollup.partials.empty:
+        print("\nNo teams to roll up")
+        return None
+    if args.rollup_state:
+        rollup.save(args.rollup_state)
+        print(f"Rollup state saved: {args.rollup_state}")
 
-    if not os.path.exists(csv_file):
-        print(f"Error: File '{csv_file}' not found")
+    print(f"\n{'='*60}")
+    print("ORGANIZATION ROLLUP")
+    print(f"{'='*60}")
+    for _, row in rollup.level('department').iterrows():
+        print(f"{row['name']}: {row['productivity']:.1%} productivity, "
+              f"{row['predictability']:.1%} predictability ({int(row['teams'])} teams)")
+    if rollup.unmapped_teams():
+        print(f"Not in org hierarchy: {', '.join(rollup.unmapped_teams())}")
+    rollup.generate_outputs(coaching=coaching)
+    return rollup
+
+
+def main():
+    """Main execution function"""
+    parser = argparse.ArgumentParser(
+        description="Generate performance dashboard and coaching report from team sprint CSV",
+        epilog=("Examples:\n"
+                "  python generate_team_analysis.py MyTeamProductivity20251108.csv\n"
+                "  python generate_team_analysis.py *.csv --stats-only --export-stats portfolio.ndjson"),
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('csv_files', nargs='+', metavar='csv_file',
+                        help="Path(s) to team sprint CSV exports (.csv, .csv.gz, .csv.zst or .zip bundles) or "
+                             "tracking workbooks (.xlsx, one team per sheet); "
+                             "several exports run in batch mode")
+    parser.add_argument('--format', choices=['png', 'html', 'both'], default='png',
+                        help="Dashboard output: 300 DPI PNG, interactive HTML, or both (default: png)")
+    parser.add_argument('--panel-cache', metavar='DIR',
+                        help="Cache rendered dashboard panels in DIR and redraw only panels whose data changed")
+    parser.add_argument('--stats-only', action='store_true',
+                        help="Calculate statistics without writing dashboards or reports")
+    parser.add_argument('--export-stats', metavar='PATH',
+                        help="Stream every team's statistics summary to PATH (.json, .ndjson/.jsonl or .csv)")
+    parser.add_argument('--export-format', choices=EXPORT_FORMATS, default=None,
+                        help="Override the export format inferred from --export-stats")
+    parser.add_argument('--check-formulas', action='store_true',
+                        help="Also read the Normalized SP and moving-average columns and report any that "
+                             "disagree with values derived from the raw inputs")
+    parser.add_argument('--org-map', metavar='CSV',
+                        help="Team,Tribe,Department mapping; writes tribe/department rollup report and dashboard")
+    parser.add_argument('--rollup-weight', choices=sorted(WEIGHTS), default='target',
+                        help="Weight sprints by Target Velocity or Delivered SP in rollups (default: target)")
+    parser.add_argument('--rollup-state', metavar='PATH',
+                        help="Keep per-team rollup sums in PATH so later runs only re-read changed teams")
+    parser.add_argument('--sprint-store', metavar='DIR',
+                        help="Write every team's cleaned sprints to a memory-mapped store in DIR "
+                             "(query it with sprint_store.py)")
+    parser.add_argument('--rule-thresholds', metavar='JSON',
+                        help="JSON file overriding coaching rule thresholds by name, e.g. {\"cv_stable\": 12} "
+                             "(see coaching_rules.DEFAULT_THRESHOLDS)")
+    parser.add_argument('--portfolio-rules', metavar='PATH',
+                        help="Write every team's coaching metrics and fired rules to PATH (CSV)")
+    parser.add_argument('--peer-index', metavar='PATH',
+                        help="Rank each team against all teams kept in PATH (updated with this run's teams) "
+                             "and show its portfolio percentiles in the report and dashboard")
+    parser.add_argument('--estimation-bias', metavar='PATH',
+                        help="Write every team's delivered-vs-committed fit per velocity model to PATH (CSV)")
+    parser.add_argument('--window', type=int, metavar='N',
+                        help="Analyze only each team's last N sprints")
+    parser.add_argument('--since', metavar='SPRINT',
+                        help="Analyze only sprints from SPRINT on, given as a label or sprint number such as S25.8 "
+                             "(with --window: the last N of those)")
+    parser.add_argument('--sparklines', metavar='PNG',
+                        help="Draw every team's productivity/predictability sparklines into one sprite sheet PNG "
+                             "(coordinate index written next to it as .json)")
+    parser.add_argument('--correlations', metavar='PATH',
+                        help="Correlate every pair of teams' sprint-aligned productivity and delivered SP and "
+                             "write the top co-moving pairs and clusters to PATH (markdown)")
+    parser.add_argument('--notes-cache', metavar='PATH',
+                        help="Keep sprint-note tags in PATH (JSON) so later runs only classify new notes")
+    parser.add_argument('--anomaly-method', choices=['zscore', 'mad'], default='zscore',
+                        help="Outlier test for streaming anomaly detection (default: zscore)")
+    parser.add_argument('--anomaly-threshold', type=float, default=None,
+                        help="Score threshold for flagging anomalies (default: 3.0 zscore, 3.5 mad)")
+    args = parser.parse_args()
+
+    for csv_file in args.csv_files + ([args.org_map] if args.org_map else []):
+        if not os.path.exists(csv_file):
+            print(f"Error: File '{csv_file}' not found")
+            sys.exit(1)
+
+    if args.window is not None and args.window < 1:
+        print(f"Error: --window must be at least 1 (got {args.window})")
         sys.exit(1)
 
     print(f"\n{'='*60}")
     print("TEAM PERFORMANCE ANALYSIS GENERATOR")
     print(f"{'='*60}\n")
 
-    try:
-        # Create analyzer instance
-        analyzer = TeamPerformanceAnalyzer(csv_file)
-
-        # Read and clean data
-        analyzer.read_and_clean_data()
+    # Validate the org hierarchy before spending time on the teams
+    hierarchy = None
+    if args.org_map:
+        try:
+            hierarchy = load_org_hierarchy(args.org_map)
+        except ValueError as e:
+            print(f"Error: {str(e)}")
+            sys.exit(1)
 
-        # Calculate statistics
-        analyzer.calculate_statistics()
-
-        # Generate dashboard
-        dashboard_file = analyzer.generate_dashboard()
+    try:
+        args.thresholds = load_thresholds(args.rule_thresholds)
+    except (OSError, ValueError) as e:
+        print(f"Error: rule thresholds: {str(e)}")
+        sys.exit(1)
 
-        # Generate markdown report
-        report_file = analyzer.generate_markdown_report()
+    args.peers = PeerIndex().load(args.peer_index) if args.peer_index else None
+    try:
+        args.notes_classifier = NotesClassifier(args.notes_cache)
+    except (OSError, ValueError) as e:
+        print(f"Error: notes cache: {str(e)}")
+        sys.exit(1)
 
-        print(f"\n{'='*60}")
-        print("ANALYSIS COMPLETE")
-        print(f"{'='*60}")
-        print(f"\nGenerated files:")
-        print(f"  1. Dashboard: {dashboard_file}")
-        print(f"  2. Report:    {report_file}")
-        print(f"\nTeam: {analyzer.team_name}")
-        print(f"Sprints analyzed: {analyzer.stats['total_sprints']}")
-        print(f"Average productivity: {analyzer.stats['avg_productivity']:.1%}")
-        print(f"Coefficient of variation: {analyzer.stats['cv_productivity']:.1f}%")
-
-    except Exception as e:
-        print(f"\nError during analysis: {str(e)}")
-        import traceback
-        traceback.print_exc()
+    failures = []
+    # Batch mode queues PNG renders so every team's report is written before the images finish
+    try:
+        source_count = count_input_sources(args.csv_files)
+    except (ValueError, ImportError) as e:
+        print(f"Error: {str(e)}")
+        sys.exit(1)
+    if args.peers is not None and source_count > 1:
+        indexed = index_peers(args.csv_files, args)
+        print(f"Peer index: {indexed} team(s) of this run indexed before ranking ({len(args.peers)} in total)")
+    pending = [] if source_count > 1 else None
+    # Rendering uses no pyplot state, so batch runs can rasterize several teams at once
+    render_workers = min(4, os.cpu_count() or 1) if pending is not None else 1
+    store_writer = SprintStoreWriter(args.sprint_store) if args.sprint_store else None
+    # The store is published when the run completes and its temp file removed if the run dies
+    with ThreadPoolExecutor(max_workers=render_workers, thread_name_prefix='dashboard-render') as render_pool, \
+            store_writer or nullcontext():
+        collectors = []
+        rollup_rows = []
+        if args.org_map:
+            collectors.append(lambda analyzer: rollup_rows.append(
+                analyzer.df_clean[ROLLUP_COLUMNS].assign(Team=analyzer.team_name)))
+        # Coaching metrics are a few scalars per team; rules run once over all of them
+        coaching_rows = []
+        collectors.append(lambda analyzer: coaching_rows.append((analyzer.team_name, analyzer.coaching_metrics())))
+        bias_groups = []
+        if args.estimation_bias:
+            # Three columns per phase; all teams are fitted together after the run
+            collectors.append(lambda analyzer: bias_groups.extend(
+                ((analyzer.team_name, phase), sprints[BIAS_INPUTS])
+                for phase, sprints in analyzer.estimation_groups()))
+        sparkline_rows = []
+        if args.sparklines:
+            collectors.append(lambda analyzer: sparkline_rows.append(
+                (analyzer.team_name, analyzer.df_clean['Productivity_num'].to_numpy(),
+                 analyzer.df_clean['Predictability_num'].to_numpy())))
+        correlation_rows = []
+        if args.correlations:
+            collectors.append(lambda analyzer: correlation_rows.append(
+                (analyzer.team_name, analyzer.df_clean['Sprint'].to_numpy(),
+                 analyzer.df_clean['Productivity_num'].to_numpy(), analyzer.df_clean['Delivered SP'].to_numpy())))
+        if store_writer is not None:
+            collectors.append(lambda analyzer: _store_team(store_writer, analyzer))
+        summaries = iter_team_summaries(args.csv_files, args, failures, render_pool, pending, collectors)
+
+        if args.export_stats:
+            try:
+                count = export_summaries(summaries, args.export_stats, args.export_format)
+            except ValueError as e:
+                print(f"Error: {str(e)}")
+                sys.exit(1)
+            print(f"\nStatistics for {count} team(s) exported: {args.export_stats}")
+        else:
+            for _ in summaries:
+                pass
+
+        if pending:
+            print(f"\nWaiting for {len(pending)} queued dashboard render(s)...")
+            wait_for_renders(pending, failures)
+
+    if store_writer is not None:
+        print(f"\nSprint store written: {args.sprint_store} ({len(store_writer.teams)} teams)")
+
+    if args.peers is not None:
+        args.peers.save(args.peer_index)
+        print(f"\nPeer index saved: {args.peer_index} ({len(args.peers)} teams)")
+
+    classifier = args.notes_classifier
+    if classifier.hits + classifier.misses:
+        print(f"\nSprint notes classified: {classifier.misses} new, {classifier.hits} from cache")
+    if args.notes_cache:
+        classifier.save()
+        print(f"Notes cache saved: {args.notes_cache} ({len(classifier)} notes)")
+
+    if sparkline_rows:
+        generate_sparklines(sparkline_rows, args.sparklines)
+        print(f"\nSparklines for {len(sparkline_rows)} team(s) saved: {args.sparklines} "
+              f"(index: {index_path(args.sparklines)})")
+
+    if len(correlation_rows) > 1:
+        result = generate_correlations(correlation_rows, args.correlations)
+        print(f"\nCross-team correlation for {len(correlation_rows)} teams saved: {args.correlations} "
+              f"({len(result['clusters'])} co-moving cluster(s))")
+    elif args.correlations:
+        print("\nCross-team correlation needs at least two teams; skipped")
+
+    if bias_groups:
+        generate_estimation_bias(bias_groups, args)
+
+    coaching = None
+    if len(coaching_rows) > 1 or (coaching_rows and args.portfolio_rules):
+        coaching = generate_coaching_portfolio(coaching_rows, args)
+
+    if args.org_map:
+        generate_rollups(rollup_rows, hierarchy, args, coaching)
+
+    if failures:
+        print(f"\nAnalysis failed for {len(failures)} file(s): {', '.join(failures)}")
         sys.exit(1)
 
 
@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+"""
+Interactive HTML Dashboard
+Writes the 7-chart dashboard as one self-contained HTML file: a compact JSON payload
+of the chart series plus a small inline SVG renderer with hover values.
+
+No external scripts or images are referenced, so the file can be opened offline,
+zoomed without pixelation, and attached to emails like the PNG version.
+"""
+
+import html
+import json
+
+import numpy as np
+import pandas as pd
+
+
+def _round_series(values, digits=1):
+    """Round a sequence for the payload, mapping NaN to null"""
+    result = []
+    for value in values:
+        if value is None or pd.isna(value):
+            result.append(None)
+        else:
+            result.append(round(float(value), digits))
+    return result
+
+
+def _box_summary(values):
+    """Box plot statistics matching matplotlib's defaults (1.5 IQR whiskers)"""
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        return None
+    q1, median, q3 = np.percentile(values, [25, 50, 75])
+    iqr = q3 - q1
+    low_limit, high_limit = q1 - 1.5 * iqr, q3 + 1.5 * iqr
+    inside = values[(values >= low_limit) & (values <= high_limit)]
+    outliers = values[(values < low_limit) | (values > high_limit)]
+    return {
+        'q1': round(float(q1), 1),
+        'med': round(float(median), 1),
+        'q3': round(float(q3), 1),
+        'lo': round(float(inside.min()), 1),
+        'hi': round(float(inside.max()), 1),
+        'out': _round_series(outliers),
+    }
+
+
+def build_dashboard_payload(analyzer):
+    """Collect the series behind the seven dashboard panels into a JSON-ready dict"""
+    df = analyzer.df_clean
+    stats = analyzer.stats
+
+    productivity = df['Productivity_num'] * 100
+    predictability = df['Predictability_num'] * 100
+
+    transition_pos = None
+    if stats['transition_sprint'] and stats['transition_sprint'] in df['Sprint'].values:
+        transition_pos = int(np.flatnonzero(df['Sprint'].values == stats['transition_sprint'])[0])
+
+    old_model, new_model = analyzer.model_phases()
+    phase = None
+    box = None
+    if len(old_model) > 0 and len(new_model) > 0:
+        phase = df.index.isin(new_model.index).astype(int).tolist()
+        box = [
+            dict(_box_summary(old_model['Productivity_num'] * 100), label=f'Old Model ({stats["old_velocity"]:.1f} SP)'),
+            dict(_box_summary(new_model['Productivity_num'] * 100), label=f'New Model ({stats["new_velocity"]:.1f} SP)'),
+        ]
+
+    payload = {
+        'team': analyzer.team_name,
+        'sprints': [str(sprint) for sprint in df['Sprint']],
+        'prod': _round_series(productivity),
+        'pred': _round_series(predictability),
+        'committed': _round_series(df['Committed SP']),
+        'delivered': _round_series(df['Delivered SP']),
+        'inflation': _round_series(df['Inflation correction']),
+        'expected': _round_series(analyzer.expected_delivery()),
+        'ma2': _round_series(analyzer.moving_average(2) * 100),
+        'ma3': _round_series(analyzer.moving_average(3) * 100),
+        'avgProd': round(float(stats['avg_productivity']) * 100, 1),
+        'avgPred': round(float(stats['avg_predictability']) * 100, 1),
+        'adjProd': (round(float(stats['adjusted_productivity']) * 100, 1)
+                    if stats['capacity_affected_sprints'] else None),
+        'transition': transition_pos,
+        'transitionLabel': (f'Model Transition ({stats["old_velocity"]:.1f}→{stats["new_velocity"]:.1f} SP)'
+                            if transition_pos is not None else None),
+        'phase': phase,
+        'box': box,
+        'peerPosition': analyzer.peer_position,
+    }
+    return payload
+
+
+def render_html_dashboard(payload):
+    """Render the self-contained dashboard HTML for a payload"""
+    # Compact separators keep the payload small; escape "</" so notes cannot close the script tag
+    data = json.dumps(payload, separators=(',', ':'), ensure_ascii=False).replace('</', '<\\/')
+    title = f"{payload['team']} Team Performance Dashboard"
+    position = payload.get('peerPosition')
+    # Team names come from the CSVs and reach both the title and the peer position
+    subtitle = f'<p class="subtitle">Portfolio position: {html.escape(position)}</p>' if position else ''
+    return (HTML_TEMPLATE
+            .replace('__SUBTITLE__', subtitle)
+            .replace('__TITLE__', html.escape(title))
+            .replace('__DATA__', data)
+            .replace('__SCRIPT__', RENDERER_JS))
+
+
+HTML_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="UTF-8">
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<title>__TITLE__</title>
+<style>
+    body { font-family: -apple-system, 'Segoe UI', system-ui, sans-serif; margin: 0; padding: 24px; background: #fff; color: #1d1d1f; }
+    h1 { text-align: center; font-size: 1.6rem; margin: 0 0 20px; }
+    .subtitle { text-align: center; margin: -12px 0 20px; color: #555; }
+    .grid { display: grid; grid-template-columns: repeat(3, 1fr); gap: 24px 20px; max-width: 1800px; margin: 0 auto; }
+    .panel { background: #fff; min-width: 0; }
+    .panel.wide { grid-column: span 2; }
+    .panel h2 { font-size: 1rem; text-align: center; margin: 0 0 6px; }
+    svg { width: 100%; height: auto; display: block; font-size: 10px; font-weight: bold; }
+    .plot-bg { fill: #eaeaf2; }
+    .gridline { stroke: #fff; stroke-width: 1; }
+    .axis-title { font-size: 11px; }
+    #tooltip { position: absolute; display: none; pointer-events: none; background: rgba(29, 29, 31, 0.9); color: #fff;
+               padding: 4px 8px; border-radius: 4px; font-size: 12px; white-space: pre; }
+</style>
+</head>
+<body>
+<h1>__TITLE__</h1>
+__SUBTITLE__
+<div class="grid">
+    <div class="panel wide"><h2>Productivity Trend Over Sprints</h2><div id="p1"></div></div>
+    <div class="panel"><h2>Predictability Evolution</h2><div id="p2"></div></div>
+    <div class="panel wide"><h2>Commitment vs Delivery Comparison</h2><div id="p3"></div></div>
+    <div class="panel"><h2>Productivity by Model</h2><div id="p4"></div></div>
+    <div class="panel"><h2>Inflation Corrections</h2><div id="p5"></div></div>
+    <div class="panel"><h2>Productivity vs Predictability</h2><div id="p6"></div></div>
+    <div class="panel"><h2>Moving Averages</h2><div id="p7"></div></div>
+</div>
+<div id="tooltip"></div>
+<script id="dashboard-data" type="application/json">__DATA__</script>
+<script>
+__SCRIPT__
+</script>
+</body>
+</html>
+"""
+
+RENDERER_JS = r"""
+const D = JSON.parse(document.getElementById('dashboard-data').textContent);
+const C = {primary: '#1f77b4', secondary: '#ff7f0e', success: '#2ca02c', danger: '#d62728',
+           old: '#ff6b6b', new: '#51cf66', gray: '#808080'};
+const NS = 'http://www.w3.org/2000/svg';
+const tip = document.getElementById('tooltip');
+
+function el(tag, attrs, parent) {
+    const node = document.createElementNS(NS, tag);
+    for (const key in attrs) node.setAttribute(key, attrs[key]);
+    if (parent) parent.appendChild(node);
+    return node;
+}
+
+function hover(node, text) {
+    node.style.cursor = 'pointer';
+    node.addEventListener('mousemove', ev => {
+        tip.textContent = text;
+        tip.style.display = 'block';
+        tip.style.left = (ev.pageX + 12) + 'px';
+        tip.style.top = (ev.pageY + 12) + 'px';
+    });
+    node.addEventListener('mouseleave', () => { tip.style.display = 'none'; });
+}
+
+function niceTicks(lo, hi, count) {
+    const span = hi - lo || 1;
+    const raw = span / count;
+    const mag = Math.pow(10, Math.floor(Math.log10(raw)));
+    const step = [1, 2, 2.5, 5, 10].map(f => f * mag).find(s => s >= raw);
+    const ticks = [];
+    for (let t = Math.ceil(lo / step) * step; t <= hi + 1e-9; t += step) ticks.push(+t.toFixed(6));
+    return ticks;
+}
+
+function extent(arrays) {
+    const vals = arrays.flat().filter(v => v !== null);
+    return [Math.min(...vals), Math.max(...vals)];
+}
+
+// Create a panel: numeric y axis, categorical (labels) or numeric x axis
+function panel(id, opts) {
+    const wide = document.getElementById(id).parentElement.classList.contains('wide');
+    const W = wide ? 820 : 400, H = 300;
+    const m = {l: 52, r: 12, t: 10, b: opts.xLabels ? 62 : 40};
+    const svg = el('svg', {viewBox: `0 0 ${W} ${H}`}, document.getElementById(id));
+    const pw = W - m.l - m.r, ph = H - m.t - m.b;
+    el('rect', {x: m.l, y: m.t, width: pw, height: ph, class: 'plot-bg'}, svg);
+
+    const [ylo, yhi] = opts.y;
+    const y = v => m.t + ph - (v - ylo) / (yhi - ylo) * ph;
+    let x;
+    if (opts.xLabels) {
+        const n = opts.xLabels.length;
+        x = i => m.l + (i + 0.5) * pw / n;
+        const every = Math.max(1, Math.ceil(n / (wide ? 40 : 20)));
+        opts.xLabels.forEach((label, i) => {
+            if (i % every) return;
+            el('text', {x: x(i), y: m.t + ph + 8, 'text-anchor': 'end',
+                        transform: `rotate(-45 ${x(i)} ${m.t + ph + 8})`}, svg).textContent = label;
+        });
+    } else {
+        const [xlo, xhi] = opts.x;
+        x = v => m.l + (v - xlo) / (xhi - xlo) * pw;
+        niceTicks(xlo, xhi, 6).forEach(t => {
+            el('line', {x1: x(t), x2: x(t), y1: m.t, y2: m.t + ph, class: 'gridline'}, svg);
+            el('text', {x: x(t), y: m.t + ph + 14, 'text-anchor': 'middle'}, svg).textContent = t;
+        });
+    }
+    niceTicks(ylo, yhi, 6).forEach(t => {
+        el('line', {x1: m.l, x2: m.l + pw, y1: y(t), y2: y(t), class: 'gridline'}, svg);
+        el('text', {x: m.l - 6, y: y(t) + 3, 'text-anchor': 'end'}, svg).textContent = t;
+    });
+    if (opts.yTitle) {
+        el('text', {x: 12, y: m.t + ph / 2, 'text-anchor': 'middle', class: 'axis-title',
+                    transform: `rotate(-90 12 ${m.t + ph / 2})`}, svg).textContent = opts.yTitle;
+    }
+    if (opts.xTitle) {
+        el('text', {x: m.l + pw / 2, y: H - 4, 'text-anchor': 'middle', class: 'axis-title'}, svg).textContent = opts.xTitle;
+    }
+    return {svg, x, y, m, pw, ph, W, H, legend: []};
+}
+
+function legend(p) {
+    p.legend.forEach((item, i) => {
+        const ly = p.m.t + 12 + i * 14, lx = p.m.l + p.pw - 170;
+        el('line', {x1: lx, x2: lx + 18, y1: ly, y2: ly, stroke: item.color, 'stroke-width': 3,
+                    'stroke-dasharray': item.dash || ''}, p.svg);
+        el('text', {x: lx + 24, y: ly + 3}, p.svg).textContent = item.label;
+    });
+}
+
+function hline(p, value, color, label) {
+    el('line', {x1: p.m.l, x2: p.m.l + p.pw, y1: p.y(value), y2: p.y(value), stroke: color,
+                'stroke-width': 2, 'stroke-dasharray': '6 4', opacity: 0.7}, p.svg);
+    if (label) p.legend.push({label, color, dash: '6 4'});
+}
+
+function transition(p, label) {
+    if (D.transition === null) return;
+    const tx = p.x(D.transition);
+    el('line', {x1: tx, x2: tx, y1: p.m.t, y2: p.m.t + p.ph, stroke: C.danger, 'stroke-width': 2.5,
+                'stroke-dasharray': '6 4', opacity: 0.8}, p.svg);
+    if (label) p.legend.push({label: D.transitionLabel, color: C.danger, dash: '6 4'});
+}
+
+function polyline(p, values, style) {
+    const pts = values.map((v, i) => v === null ? null : `${p.x(i)},${p.y(v)}`).filter(Boolean).join(' ');
+    el('polyline', Object.assign({points: pts, fill: 'none', 'stroke-width': 2.5,
+                                  'stroke-linejoin': 'round'}, style), p.svg);
+}
+
+function markers(p, values, color, shape, name, suffix) {
+    values.forEach((v, i) => {
+        if (v === null) return;
+        const node = shape === 'square'
+            ? el('rect', {x: p.x(i) - 4, y: p.y(v) - 4, width: 8, height: 8, fill: color}, p.svg)
+            : el('circle', {cx: p.x(i), cy: p.y(v), r: 4.5, fill: color}, p.svg);
+        hover(node, `${D.sprints[i]}\n${name}: ${v}${suffix}`);
+    });
+}
+
+// Chart 1: Productivity Trend Line
+(function () {
+    const top = Math.max(...D.prod.filter(v => v !== null)) * 1.2;
+    const p = panel('p1', {xLabels: D.sprints, y: [0, top], yTitle: 'Productivity (%)', xTitle: 'Sprint'});
+    const area = D.prod.map((v, i) => `${p.x(i)},${p.y(v === null ? 0 : v)}`);
+    el('polygon', {points: `${p.x(0)},${p.y(0)} ${area.join(' ')} ${p.x(D.prod.length - 1)},${p.y(0)}`,
+                   fill: C.primary, opacity: 0.3}, p.svg);
+    polyline(p, D.prod, {stroke: C.primary});
+    markers(p, D.prod, C.primary, 'circle', 'Productivity', '%');
+    p.legend.push({label: 'Productivity', color: C.primary});
+    hline(p, D.avgProd, C.success, `Average (${Math.round(D.avgProd)}%)`);
+    if (D.adjProd !== null) hline(p, D.adjProd, C.secondary, `Capacity-Adjusted (${Math.round(D.adjProd)}%)`);
+    transition(p, true);
+    legend(p);
+})();
+
+// Chart 2: Predictability Trend Line
+(function () {
+    const top = Math.max(105, Math.max(...D.pred.filter(v => v !== null)) * 1.1);
+    const p = panel('p2', {xLabels: D.sprints, y: [0, top], yTitle: 'Predictability (%)', xTitle: 'Sprint'});
+    polyline(p, D.pred, {stroke: C.secondary});
+    markers(p, D.pred, C.secondary, 'square', 'Predictability', '%');
+    p.legend.push({label: 'Predictability', color: C.secondary});
+    hline(p, D.avgPred, C.success, `Average (${Math.round(D.avgPred)}%)`);
+    transition(p, false);
+    legend(p);
+})();
+
+// Chart 3: Commitment vs Delivery Bar Chart
+(function () {
+    const top = extent([D.committed, D.delivered])[1] * 1.1;
+    const p = panel('p3', {xLabels: D.sprints, y: [0, top], yTitle: 'Story Points', xTitle: 'Sprint'});
+    const slot = p.pw / D.sprints.length, bw = slot * 0.35;
+    [[D.committed, C.secondary, 'Committed SP', -1], [D.delivered, C.primary, 'Delivered SP', 0]].forEach(([vals, color, name, off]) => {
+        vals.forEach((v, i) => {
+            if (v === null) return;
+            const bar = el('rect', {x: p.x(i) + off * bw, y: p.y(Math.max(v, 0)), width: bw,
+                                    height: Math.abs(p.y(0) - p.y(v)), fill: color, opacity: 0.8}, p.svg);
+            hover(bar, `${D.sprints[i]}\n${name}: ${v}`);
+        });
+        p.legend.push({label: name, color});
+    });
+    polyline(p, D.expected, {stroke: C.success, 'stroke-dasharray': '6 4'});
+    p.legend.push({label: 'Expected Delivery (fit)', color: C.success, dash: '6 4'});
+    transition(p, false);
+    legend(p);
+})();
+
+// Chart 4: Model Comparison Box Plot
+(function () {
+    if (!D.box) {
+        const svg = el('svg', {viewBox: '0 0 400 300'}, document.getElementById('p4'));
+        el('rect', {x: 52, y: 10, width: 336, height: 250, class: 'plot-bg'}, svg);
+        el('text', {x: 220, y: 140, 'text-anchor': 'middle', 'font-size': 14}, svg).textContent = 'No model transition detected';
+        return;
+    }
+    const [lo, hi] = extent(D.box.map(b => [b.lo, b.hi].concat(b.out)));
+    const pad = (hi - lo) * 0.1 || 5;
+    const p = panel('p4', {x: [0, 1], y: [lo - pad, hi + pad], yTitle: 'Productivity (%)'});
+    D.box.forEach((b, i) => {
+        const cx = p.m.l + p.pw * (i + 0.5) / 2, bw = p.pw * 0.3;
+        const color = i === 0 ? C.old : C.new;
+        el('line', {x1: cx, x2: cx, y1: p.y(b.lo), y2: p.y(b.hi), stroke: '#333'}, p.svg);
+        [b.lo, b.hi].forEach(v => el('line', {x1: cx - bw / 4, x2: cx + bw / 4, y1: p.y(v), y2: p.y(v), stroke: '#333'}, p.svg));
+        const rect = el('rect', {x: cx - bw / 2, y: p.y(b.q3), width: bw, height: p.y(b.q1) - p.y(b.q3),
+                                 fill: color, opacity: 0.7, stroke: '#333'}, p.svg);
+        hover(rect, `${b.label}\nMedian: ${b.med}%\nQ1-Q3: ${b.q1}% - ${b.q3}%\nWhiskers: ${b.lo}% - ${b.hi}%`);
+        el('line', {x1: cx - bw / 2, x2: cx + bw / 2, y1: p.y(b.med), y2: p.y(b.med), stroke: C.secondary, 'stroke-width': 2}, p.svg);
+        b.out.forEach(v => hover(el('circle', {cx, cy: p.y(v), r: 4, fill: 'none', stroke: '#333'}, p.svg), `${b.label}\nOutlier: ${v}%`));
+        el('text', {x: cx, y: p.m.t + p.ph + 16, 'text-anchor': 'middle'}, p.svg).textContent = b.label;
+    });
+})();
+
+// Chart 5: Inflation Corrections Horizontal Bar
+(function () {
+    const [lo, hi] = extent([D.inflation, [0]]);
+    const pad = (hi - lo) * 0.05 || 1;
+    const n = D.sprints.length;
+    const H = 300, m = {l: 90, r: 12, t: 10, b: 40};
+    const svg = el('svg', {viewBox: `0 0 400 ${H}`}, document.getElementById('p5'));
+    const pw = 400 - m.l - m.r, ph = H - m.t - m.b;
+    el('rect', {x: m.l, y: m.t, width: pw, height: ph, class: 'plot-bg'}, svg);
+    const x = v => m.l + (v - (lo - pad)) / ((hi + pad) - (lo - pad)) * pw;
+    const slot = ph / n;
+    niceTicks(lo - pad, hi + pad, 5).forEach(t => {
+        el('line', {x1: x(t), x2: x(t), y1: m.t, y2: m.t + ph, class: 'gridline'}, svg);
+        el('text', {x: x(t), y: m.t + ph + 14, 'text-anchor': 'middle'}, svg).textContent = t;
+    });
+    const every = Math.max(1, Math.ceil(n / 25));
+    D.inflation.forEach((v, i) => {
+        const cy = m.t + (i + 0.5) * slot;
+        if (i % every === 0) el('text', {x: m.l - 6, y: cy + 3, 'text-anchor': 'end'}, svg).textContent = D.sprints[i];
+        if (v === null) return;
+        const color = v < 0 ? C.danger : v > 0 ? C.success : C.gray;
+        const bar = el('rect', {x: Math.min(x(0), x(v)), y: cy - slot * 0.4, width: Math.max(Math.abs(x(v) - x(0)), 1),
+                                height: slot * 0.8, fill: color, opacity: 0.7}, svg);
+        hover(bar, `${D.sprints[i]}\nInflation correction: ${v} SP`);
+    });
+    el('line', {x1: x(0), x2: x(0), y1: m.t, y2: m.t + ph, stroke: 'black'}, svg);
+    el('text', {x: m.l + pw / 2, y: H - 4, 'text-anchor': 'middle', class: 'axis-title'}, svg).textContent = 'Story Points';
+})();
+
+// Chart 6: Productivity vs Predictability Scatter
+(function () {
+    const [xlo, xhi] = extent([D.prod]), [ylo, yhi] = extent([D.pred]);
+    const xp = (xhi - xlo) * 0.08 || 5, yp = (yhi - ylo) * 0.08 || 5;
+    const p = panel('p6', {x: [xlo - xp, xhi + xp], y: [ylo - yp, yhi + yp],
+                           yTitle: 'Predictability (%)', xTitle: 'Productivity (%)'});
+    el('line', {x1: p.m.l, x2: p.m.l + p.pw, y1: p.y(D.avgPred), y2: p.y(D.avgPred), stroke: C.gray, 'stroke-dasharray': '5 4', opacity: 0.5}, p.svg);
+    el('line', {x1: p.x(D.avgProd), x2: p.x(D.avgProd), y1: p.m.t, y2: p.m.t + p.ph, stroke: C.gray, 'stroke-dasharray': '5 4', opacity: 0.5}, p.svg);
+    D.prod.forEach((v, i) => {
+        if (v === null || D.pred[i] === null) return;
+        const color = D.phase ? (D.phase[i] ? C.new : C.old) : C.primary;
+        const dot = el('circle', {cx: p.x(v), cy: p.y(D.pred[i]), r: 6, fill: color, opacity: 0.7, stroke: 'black'}, p.svg);
+        hover(dot, `${D.sprints[i]}\nProductivity: ${v}%\nPredictability: ${D.pred[i]}%`);
+    });
+    if (D.phase) p.legend.push({label: 'Old Model', color: C.old}, {label: 'New Model', color: C.new});
+    else p.legend.push({label: 'All Sprints', color: C.primary});
+    legend(p);
+})();
+
+// Chart 7: Moving Average Trends
+(function () {
+    const [lo, hi] = extent([D.prod, D.ma2, D.ma3]);
+    const pad = (hi - lo) * 0.08 || 5;
+    const p = panel('p7', {xLabels: D.sprints, y: [Math.max(0, lo - pad), hi + pad], yTitle: 'Productivity (%)', xTitle: 'Sprint'});
+    polyline(p, D.prod, {stroke: C.primary, opacity: 0.5, 'stroke-width': 2});
+    markers(p, D.prod, C.primary, 'circle', 'Actual', '%');
+    polyline(p, D.ma2, {stroke: C.secondary});
+    polyline(p, D.ma3, {stroke: C.success, 'stroke-dasharray': '6 4'});
+    markers(p, D.ma2, 'transparent', 'circle', 'MA(2)', '%');
+    markers(p, D.ma3, 'transparent', 'circle', 'MA(3)', '%');
+    p.legend.push({label: 'Actual', color: C.primary}, {label: 'MA(2)', color: C.secondary},
+                  {label: 'MA(3)', color: C.success, dash: '6 4'});
+    legend(p);
+})();
+"""
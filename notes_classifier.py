@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Sprint Notes Classifier
+Tags free-text sprint notes (holiday, absence, scope change, skills gap,
+estimation model change) and derives capacity-adjusted productivity from the
+sprints whose notes report lost capacity.
+
+- Each distinct note is classified once: tags are cached under a hash of the
+  normalised note text, so notes repeated across sprints, teams and runs
+  (e.g. "Christmas holidays") cost one dictionary lookup
+- The cache can be kept in a JSON file between runs; its version is bumped
+  whenever the patterns change, so stale tags are never reused
+- Capacity-adjusted statistics either exclude the affected sprints or
+  down-weight them (CAPACITY_WEIGHT)
+"""
+
+import hashlib
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+# Bump when CATEGORIES change so cached tags are recomputed
+CLASSIFIER_VERSION = 1
+
+# Tag -> pattern over the normalised (lower-case, single-spaced) note text
+CATEGORIES = {
+    'holiday': r'holiday|vacation|christmas|easter|diwali|eid\b|new year|public hol|bank hol|\bpto\b|time off',
+    'absence': r'\bsick|\bill(ness)?\b|absen|\bon leave|parental|maternity|paternity|\bfte\b|out of \d+|'
+               r'reduced capacity|capacity (drop|loss|reduced)|left the team|leaving the team',
+    'scope_change': r'scope|increased from|decreased from|re-?estimat|carr(y|ied) over|added mid|'
+                    r'pulled in|priority change|reprioriti',
+    'skills_gap': r'skill|support needed|knowledge|onboard|ramp(ing)? up|learning curve|new joiner|'
+                  r'junior|lack of experience',
+    'estimation_model_change': r'estimation model|old and new|new model|old model|previous team|'
+                               r'velocity model|re-?baselin',
+}
+TAGS = tuple(CATEGORIES)
+
+# Tags that mean the team had fewer people than planned for
+CAPACITY_TAGS = ('holiday', 'absence')
+
+# Weight of capacity-affected sprints in the reweighted average (unaffected sprints weigh 1)
+CAPACITY_WEIGHT = 0.5
+
+_PATTERNS = {tag: re.compile(pattern) for tag, pattern in CATEGORIES.items()}
+
+
+def normalize_note(note):
+    """Lower-case, single-spaced note text ('' for blank cells)"""
+    if note is None or (isinstance(note, float) and np.isnan(note)):
+        return ''
+    return ' '.join(str(note).lower().split())
+
+
+def note_hash(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def classify_text(text):
+    """Tags of one normalised note, in TAGS order"""
+    return [tag for tag in TAGS if _PATTERNS[tag].search(text)]
+
+
+class NotesClassifier:
+    """Note tagger with a hash-keyed cache, shared by every team of a run
+
+    With `cache_path` the cache is loaded on creation and written by save(), so
+    later runs only classify notes they have not seen.
+    """
+
+    def __init__(self, cache_path=None):
+        self.cache_path = cache_path
+        self.cache = {}
+        self.hits = 0
+        self.misses = 0
+        if cache_path and os.path.exists(cache_path):
+            with open(cache_path, encoding='utf-8') as f:
+                stored = json.load(f)
+            if stored.get('version') == CLASSIFIER_VERSION:
+                self.cache = stored.get('tags', {})
+
+    def __len__(self):
+        return len(self.cache)
+
+    def tags(self, note):
+        """Tags of one note, classified at most once per distinct text"""
+        text = normalize_note(note)
+        if not text:
+            return []
+        key = note_hash(text)
+        tags = self.cache.get(key)
+        if tags is None:
+            tags = self.cache[key] = classify_text(text)
+            self.misses += 1
+        else:
+            self.hits += 1
+        return tags
+
+    def classify(self, notes):
+        """Sprints x TAGS boolean DataFrame for a Notes column (blank notes have no tags)"""
+        flags = pd.DataFrame(False, index=notes.index, columns=list(TAGS))
+        # Repeated notes within a team are looked up once
+        for note, positions in notes.groupby(notes.map(normalize_note), sort=False).groups.items():
+            tags = self.tags(note)
+            if tags:
+                flags.loc[positions, tags] = True
+        return flags
+
+    def save(self, path=None):
+        """Write the cache as JSON (atomically, so an interrupted run keeps the old file)"""
+        path = path or self.cache_path
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': CLASSIFIER_VERSION, 'tags': self.cache}, f, sort_keys=True)
+        os.replace(tmp_path, path)
+        return path
+
+
+def capacity_affected(flags):
+    """Boolean Series: the sprint's note reports holiday or absence"""
+    return flags[list(CAPACITY_TAGS)].any(axis=1)
+
+
+def adjusted_productivity(productivity, affected):
+    """Productivity series with capacity-affected sprints masked out (NaN)"""
+    return productivity.where(~affected)
+
+
+def capacity_adjusted_stats(productivity, affected, weight=CAPACITY_WEIGHT):
+    """Productivity mean/CV excluding capacity-affected sprints, and the reweighted mean"""
+    values = productivity.to_numpy(dtype=float)
+    affected = affected.to_numpy(dtype=bool)
+    valid = ~np.isnan(values)
+    kept = values[valid & ~affected]
+    weights = np.where(affected, weight, 1.0)[valid]
+    avg = kept.mean() if len(kept) else np.nan
+    std = kept.std(ddof=1) if len(kept) > 1 else np.nan
+    return {
+        'capacity_affected_sprints': int((affected & valid).sum()),
+        'adjusted_productivity': avg,
+        'adjusted_cv_productivity': std / avg * 100 if len(kept) > 1 else np.nan,
+        'reweighted_productivity': np.average(values[valid], weights=weights) if weights.sum() else np.nan,
+    }
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Organization Rollups
+Weighted productivity and predictability for every level of the org hierarchy
+(team -> tribe -> department -> organization).
+
+- The hierarchy is a CSV mapping with Team, Tribe and Department columns
+- Sprint rows of all teams are reduced to per-team partial sums in one grouped
+  vectorized pass; tribe, department and organization figures are sums of those
+  partials, so every level is exact (not an average of averages)
+- Weighting by Target Velocity or by Delivered SP
+- update_team() replaces one team's partials, so a changed export only costs
+  that team's rows; partials can be saved and reloaded between runs
+
+Usage:
+    python generate_team_analysis.py *.csv --org-map org_hierarchy.csv
+"""
+
+import io
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from coaching_rules import RULES, group_summary
+
+LEVELS = ('team', 'tribe', 'department', 'organization')
+UNASSIGNED = 'Unassigned'
+
+# Column holding the weight of each sprint row
+WEIGHTS = {
+    'target': 'Target Velocity',
+    'delivered': 'Delivered SP',
+}
+
+# Sprint columns a rollup needs; callers may pass full df_clean frames
+ROLLUP_COLUMNS = ['Team', 'Target Velocity', 'Committed SP', 'Delivered SP', 'Inflation correction',
+                  'Productivity_num', 'Predictability_num']
+
+# Additive per-team partial sums
+PARTIAL_COLUMNS = ['sprints', 'prod_weight', 'prod_weighted', 'pred_weight', 'pred_weighted',
+                   'target', 'committed', 'delivered', 'inflation']
+
+COLORS = {
+    'productivity': '#1f77b4',
+    'predictability': '#ff7f0e',
+    'facecolor': '#EAEAF2',
+    'text': '.15',
+}
+
+
+def load_org_hierarchy(path):
+    """Read a Team,Tribe,Department CSV mapping into a DataFrame indexed by team"""
+    hierarchy = pd.read_csv(path, dtype=str, encoding='utf-8-sig').rename(columns=str.strip)
+    missing = [column for column in ('Team', 'Tribe', 'Department') if column not in hierarchy.columns]
+    if missing:
+        raise ValueError(f"{path}: org hierarchy is missing column(s) {', '.join(missing)}")
+    hierarchy = hierarchy[['Team', 'Tribe', 'Department']].apply(lambda column: column.str.strip())
+    duplicated = hierarchy['Team'][hierarchy['Team'].duplicated()]
+    if len(duplicated):
+        raise ValueError(f"{path}: team '{duplicated.iloc[0]}' is mapped more than once")
+    return hierarchy.fillna(UNASSIGNED).set_index('Team')
+
+
+def team_partials(frames, weight='target'):
+    """Per-team partial sums from sprint rows, in one grouped pass over all rows"""
+    if weight not in WEIGHTS:
+        raise ValueError(f"Unknown rollup weight '{weight}' (use {', '.join(WEIGHTS)})")
+    if isinstance(frames, pd.DataFrame):
+        frames = [frames]
+    rows = pd.concat([frame[ROLLUP_COLUMNS] for frame in frames], ignore_index=True)
+    rows['Team'] = rows['Team'].astype(str).str.strip()
+
+    w = rows[WEIGHTS[weight]].fillna(0).to_numpy(dtype=float)
+    productivity = rows['Productivity_num'].to_numpy(dtype=float)
+    predictability = rows['Predictability_num'].to_numpy(dtype=float)
+    prod_weight = np.where(np.isnan(productivity), 0.0, w)
+    pred_weight = np.where(np.isnan(predictability), 0.0, w)
+
+    values = pd.DataFrame({
+        'Team': rows['Team'],
+        'sprints': 1,
+        'prod_weight': prod_weight,
+        'prod_weighted': prod_weight * np.nan_to_num(productivity),
+        'pred_weight': pred_weight,
+        'pred_weighted': pred_weight * np.nan_to_num(predictability),
+        'target': rows['Target Velocity'].fillna(0),
+        'committed': rows['Committed SP'].fillna(0),
+        'delivered': rows['Delivered SP'].fillna(0),
+        'inflation': rows['Inflation correction'].fillna(0),
+    })
+    return values.groupby('Team', sort=True)[PARTIAL_COLUMNS].sum()
+
+
+class OrgRollup:
+    """Weighted rollups over an org hierarchy, updatable one team at a time"""
+
+    def __init__(self, hierarchy, weight='target'):
+        if weight not in WEIGHTS:
+            raise ValueError(f"Unknown rollup weight '{weight}' (use {', '.join(WEIGHTS)})")
+        self.hierarchy = hierarchy
+        self.weight = weight
+        self.partials = pd.DataFrame(columns=PARTIAL_COLUMNS, dtype=float).rename_axis('Team')
+        self._table = None
+
+    def build(self, frames):
+        """Replace all partials with those computed from the given sprint frames"""
+        self.partials = team_partials(frames, self.weight)
+        self._table = None
+        return self
+
+    def update_team(self, df):
+        """Recompute the partials of the team(s) in `df`; other teams are untouched"""
+        fresh = team_partials(df, self.weight)
+        self.partials = pd.concat([self.partials.drop(fresh.index, errors='ignore'), fresh]).sort_index()
+        self._table = None
+        return self
+
+    def set_partials(self, partials):
+        """Use precomputed per-team partial sums (e.g. from a SprintStore)"""
+        self.partials = partials[PARTIAL_COLUMNS].astype(float).sort_index()
+        self._table = None
+        return self
+
+    def remove_team(self, team):
+        self.partials = self.partials.drop(team, errors='ignore')
+        self._table = None
+        return self
+
+    def save(self, path):
+        """Persist partial sums so a later run can update only changed teams"""
+        self.partials.assign(weight=self.weight).to_csv(path)
+
+    def load(self, path):
+        """Load partials saved by save(); ignored when they used a different weight"""
+        if not os.path.exists(path):
+            return self
+        saved = pd.read_csv(path, index_col='Team')
+        if saved.empty or (saved['weight'] == self.weight).all():
+            self.partials = saved[PARTIAL_COLUMNS].astype(float)
+            self._table = None
+        else:
+            print(f"Rollup state {path} was computed with another weight; rebuilding from this run only")
+        return self
+
+    def table(self):
+        """One row per node of every level, with weighted productivity and predictability"""
+        if self._table is not None:
+            return self._table
+
+        partials = self.partials.copy()
+        mapped = self.hierarchy.reindex(partials.index)
+        partials['tribe'] = mapped['Tribe'].fillna(UNASSIGNED).to_numpy()
+        partials['department'] = mapped['Department'].fillna(UNASSIGNED).to_numpy()
+        partials['teams'] = 1
+
+        # Each level is a grouped sum of the team partials below it
+        sums = [partials[PARTIAL_COLUMNS + ['teams']].assign(
+                    level='team', name=partials.index, parent=partials['tribe'])]
+        for level, key, parent in (('tribe', ['department', 'tribe'], 'department'),
+                                   ('department', ['department'], None)):
+            grouped = partials.groupby(key)[PARTIAL_COLUMNS + ['teams']].sum().reset_index()
+            grouped['level'] = level
+            grouped['name'] = grouped[level]
+            grouped['parent'] = grouped[parent] if parent else 'Organization'
+            sums.append(grouped)
+        total = partials[PARTIAL_COLUMNS + ['teams']].sum().to_frame().T
+        sums.append(total.assign(level='organization', name='Organization', parent=None))
+
+        table = pd.concat(sums, ignore_index=True)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            table['productivity'] = table['prod_weighted'] / table['prod_weight']
+            table['predictability'] = table['pred_weighted'] / table['pred_weight']
+        table['level'] = pd.Categorical(table['level'], categories=LEVELS, ordered=True)
+        table = table.sort_values(['level', 'parent', 'name'], kind='stable').reset_index(drop=True)
+        self._table = table[['level', 'name', 'parent', 'teams', 'sprints', 'productivity', 'predictability',
+                             'target', 'committed', 'delivered', 'inflation']]
+        return self._table
+
+    def level(self, level):
+        return self.table()[self.table()['level'] == level]
+
+    def unmapped_teams(self):
+        return sorted(set(self.partials.index) - set(self.hierarchy.index))
+
+    # Outputs
+
+    def render_report(self, coaching=None):
+        """Markdown rollup report as a string
+
+        `coaching` is the teams x rules matrix from coaching_rules.evaluate_rules;
+        when given, the report counts EBP-ready teams and recommendations per tribe.
+        """
+        weight_label = WEIGHTS[self.weight]
+        org = self.level('organization').iloc[0]
+        lines = [
+            "# Organization Performance Rollup",
+            "",
+            f"**Teams:** {int(org['teams'])}  ",
+            f"**Sprints:** {int(org['sprints'])}  ",
+            f"**Weighting:** {weight_label}",
+            "",
+            "## Organization Summary",
+            "",
+            f"- **Weighted Productivity:** {org['productivity']:.1%}",
+            f"- **Weighted Predictability:** {org['predictability']:.1%}",
+            f"- **Delivered:** {org['delivered']:.0f} SP of {org['committed']:.0f} SP committed "
+            f"(target {org['target']:.0f} SP)",
+            "",
+        ]
+        for level, title, parent_label in (('department', 'Departments', None),
+                                           ('tribe', 'Tribes', 'Department'),
+                                           ('team', 'Teams', 'Tribe')):
+            rows = self.level(level).sort_values('productivity', ascending=False)
+            columns = [level.title()] + ([parent_label] if parent_label else []) + \
+                      (['Teams'] if level != 'team' else []) + \
+                      ['Sprints', 'Productivity', 'Predictability', 'Delivered SP']
+            lines += [f"## {title}", "", "| " + " | ".join(columns) + " |", "|" + "---|" * len(columns)]
+            for _, row in rows.iterrows():
+                cells = [row['name']] + ([row['parent']] if parent_label else []) + \
+                        ([str(int(row['teams']))] if level != 'team' else []) + \
+                        [str(int(row['sprints'])), f"{row['productivity']:.1%}",
+                         f"{row['predictability']:.1%}", f"{row['delivered']:.0f}"]
+                lines.append("| " + " | ".join(cells) + " |")
+            lines.append("")
+
+        if coaching is not None and len(coaching):
+            lines += self._coaching_lines(coaching)
+
+        unmapped = self.unmapped_teams()
+        if unmapped:
+            lines += [f"**Note:** not in the org hierarchy, rolled up under '{UNASSIGNED}': "
+                      f"{', '.join(unmapped)}", ""]
+        lines += ["---", "", f"**Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", ""]
+        return "\n".join(lines)
+
+    def _coaching_lines(self, coaching):
+        """Markdown table of coaching rule hits per tribe"""
+        tribes = self.hierarchy['Tribe'].reindex(coaching.index).fillna(UNASSIGNED)
+        summary = group_summary(coaching, tribes).sort_index()
+        titles = {rule.key: rule.title for rule in RULES if rule.kind == 'recommendation'}
+        fired = [key for key in titles if summary[key].any()]
+        columns = ['Tribe', 'Teams', 'EBP Ready'] + [titles[key] for key in fired]
+        lines = ["## Coaching Priorities by Tribe", "",
+                 "Teams per tribe triggering each coaching recommendation.", "",
+                 "| " + " | ".join(columns) + " |", "|" + "---|" * len(columns)]
+        for tribe, row in summary.iterrows():
+            cells = [tribe, str(row['teams']), str(row['ebp_ready'])] + [str(row[key]) for key in fired]
+            lines.append("| " + " | ".join(cells) + " |")
+        lines.append("")
+        return lines
+
+    def render_dashboard(self, dpi=150):
+        """PNG with weighted productivity and predictability per department, tribe and team"""
+        panels = [self.level(level) for level in ('department', 'tribe', 'team')]
+        heights = [max(2.0, 0.45 * len(rows) + 1.2) for rows in panels]
+        fig = Figure(figsize=(12, sum(heights) + 0.8), dpi=dpi, facecolor='white', layout='constrained')
+        FigureCanvasAgg(fig)
+        grid = fig.add_gridspec(len(panels), 1, height_ratios=heights)
+        fig.suptitle(f'Organization Performance Rollup (weighted by {WEIGHTS[self.weight]})',
+                     fontsize=16, fontweight='bold', color=COLORS['text'])
+
+        for i, (rows, title) in enumerate(zip(panels, ('Departments', 'Tribes', 'Teams'))):
+            ax = fig.add_subplot(grid[i])
+            ax.set_facecolor(COLORS['facecolor'])
+            ax.set_axisbelow(True)
+            for spine in ax.spines.values():
+                spine.set_visible(False)
+            ax.grid(True, axis='x', color='white', linestyle='-')
+            ax.tick_params(axis='both', length=0, colors=COLORS['text'], labelsize=9)
+
+            rows = rows.sort_values(['parent', 'name'])
+            y_pos = np.arange(len(rows))
+            labels = rows['name'] if i == 0 else [f'{name} ({parent})' for name, parent in zip(rows['name'], rows['parent'])]
+            ax.barh(y_pos - 0.2, rows['productivity'] * 100, height=0.4,
+                    color=COLORS['productivity'], alpha=0.85, label='Productivity')
+            ax.barh(y_pos + 0.2, rows['predictability'] * 100, height=0.4,
+                    color=COLORS['predictability'], alpha=0.85, label='Predictability')
+            ax.axvline(x=100, color='gray', linestyle='--', linewidth=1, alpha=0.6)
+            ax.set_yticks(y_pos)
+            ax.set_yticklabels(labels, fontweight='bold')
+            ax.invert_yaxis()
+            ax.set_xlabel('Weighted %', fontsize=9, fontweight='bold', color=COLORS['text'])
+            ax.set_title(title, fontsize=12, fontweight='bold', color=COLORS['text'])
+            if i == 0:
+                ax.legend(fontsize=9, loc='lower right', frameon=False)
+
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='png', dpi=dpi, facecolor='white')
+        buffer.seek(0)
+        return buffer
+
+    def generate_outputs(self, report_file='Org_Rollup_Report.md', dashboard_file='Org_Rollup_Dashboard.png',
+                         coaching=None):
+        """Write the rollup report and dashboard; returns their paths"""
+        with open(report_file, 'w', encoding='utf-8') as f:
+            f.write(self.render_report(coaching))
+        print(f"Rollup report saved: {report_file}")
+        with open(dashboard_file, 'wb') as f:
+            f.write(self.render_dashboard().getvalue())
+        print(f"Rollup dashboard saved: {dashboard_file}")
+        return report_file, dashboard_file
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Dashboard Panel Cache
+Keeps rasterized dashboard panels keyed by a hash of each panel's input data, so
+re-rendering a dashboard only redraws the panels whose inputs changed.
+
+Tiles live in an in-memory LRU and, optionally, in a directory of PNG files that
+persists across runs (e.g. nightly re-renders after one sprint is appended).
+"""
+
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from PIL import Image
+
+# Bump when panel drawing code changes so stale on-disk tiles are not reused
+RENDER_VERSION = 2
+
+
+def panel_key(name, frame, scalars, span, dpi):
+    """Stable hash of everything a panel's pixels depend on"""
+    digest = hashlib.sha1()
+    digest.update(f'{RENDER_VERSION}|{name}|{span}|{dpi}|'.encode())
+    digest.update(pd.util.hash_pandas_object(frame, index=False).values.tobytes())
+    digest.update(repr(scalars).encode())
+    return f'{name}-{digest.hexdigest()[:20]}'
+
+
+class PanelCache:
+    """In-memory LRU of panel rasters with an optional on-disk PNG store
+
+    Safe to share between threads rendering dashboards concurrently.
+    """
+
+    def __init__(self, directory=None, max_entries=64):
+        self.directory = directory
+        self.max_entries = max_entries
+        self._tiles = OrderedDict()
+        self._images = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f'{key}.png')
+
+    def _temp_path(self, key):
+        return f'{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp'
+
+    def get(self, key):
+        """Return the cached RGBA tile for key, or None"""
+        with self._lock:
+            tile = self._tiles.get(key)
+        if tile is None and self.directory and os.path.exists(self._path(key)):
+            with Image.open(self._path(key)) as image:
+                tile = np.asarray(image.convert('RGBA'))
+            self._remember(key, tile)
+        with self._lock:
+            if tile is None:
+                self.misses += 1
+                return None
+            if key in self._tiles:
+                self._tiles.move_to_end(key)
+            self.hits += 1
+        return tile
+
+    def put(self, key, tile):
+        """Store a freshly rendered RGBA tile"""
+        self._remember(key, tile)
+        if self.directory:
+            # Write-then-rename so concurrent renderers never read a partial tile
+            temp_path = self._temp_path(key)
+            Image.fromarray(tile).save(temp_path, format='PNG', compress_level=1)
+            os.replace(temp_path, self._path(key))
+
+    def get_image(self, key):
+        """Return cached encoded dashboard bytes for key, or None"""
+        with self._lock:
+            data = self._images.get(key)
+        if data is None and self.directory and os.path.exists(self._path(key)):
+            with open(self._path(key), 'rb') as f:
+                data = f.read()
+            self._store_image(key, data)
+        elif data is not None:
+            with self._lock:
+                if key in self._images:
+                    self._images.move_to_end(key)
+        return data
+
+    def put_image(self, key, data):
+        """Store an encoded dashboard so fully unchanged dashboards skip compositing"""
+        self._store_image(key, data)
+        if self.directory:
+            temp_path = self._temp_path(key)
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, self._path(key))
+
+    def _store_image(self, key, data):
+        with self._lock:
+            self._images[key] = data
+            self._images.move_to_end(key)
+            while len(self._images) > max(1, self.max_entries // 8):
+                self._images.popitem(last=False)
+
+    def _remember(self, key, tile):
+        with self._lock:
+            self._tiles[key] = tile
+            self._tiles.move_to_end(key)
+            while len(self._tiles) > self.max_entries:
+                self._tiles.popitem(last=False)
+
+
+def composite_key(keys):
+    """Key for a whole dashboard built from the given panel keys"""
+    return 'dashboard-' + hashlib.sha1('|'.join(keys).encode()).hexdigest()[:20]
+
+
+def compose_tiles(placements, width, height):
+    """Paste RGBA tiles at (top, left) pixel offsets onto a white canvas"""
+    canvas = np.full((height, width, 4), 255, dtype=np.uint8)
+    for tile, top, left in placements:
+        tile_h = min(tile.shape[0], height - top)
+        tile_w = min(tile.shape[1], width - left)
+        canvas[top:top + tile_h, left:left + tile_w] = tile[:tile_h, :tile_w]
+    return canvas
+
+
+def encode_png(canvas, dpi):
+    """Encode an RGBA canvas as PNG bytes in a BytesIO buffer"""
+    buffer = io.BytesIO()
+    Image.fromarray(canvas[..., :3]).save(buffer, format='PNG', dpi=(dpi, dpi))
+    buffer.seek(0)
+    return buffer
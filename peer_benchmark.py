@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Peer Benchmark Index
+Where a team sits among its peers: one sorted array per key metric over every
+team analyzed so far, so a percentile rank is two binary searches instead of a
+rescan of the portfolio.
+
+- update_team() replaces one team's values in the sorted arrays (re-analysis)
+- percentile ranks are mid-rank: teams below plus half of the ties, over all teams
+- metrics where lower is better (CV, inflation frequency) are ranked inverted,
+  so a higher percentile is always better
+- the index is saved as a small CSV and reloaded between runs
+
+Usage:
+    python generate_team_analysis.py *.csv --stats-only --peer-index peers.csv   # seed
+    python generate_team_analysis.py DNE_latest.csv --peer-index peers.csv
+"""
+
+import os
+from bisect import bisect_left, bisect_right, insort
+
+import numpy as np
+import pandas as pd
+
+# Stats key -> (label, higher is better)
+PEER_METRICS = {
+    'avg_productivity': ('productivity', True),
+    'avg_predictability': ('predictability', True),
+    'cv_productivity': ('stability', False),
+    'inflation_frequency': ('inflation discipline', False),
+}
+
+
+def ordinal(n):
+    """1 -> '1st', 22 -> '22nd', 13 -> '13th'"""
+    n = int(n)
+    suffix = 'th' if 10 <= n % 100 <= 20 else {1: 'st', 2: 'nd', 3: 'rd'}.get(n % 10, 'th')
+    return f'{n}{suffix}'
+
+
+class PeerIndex:
+    """Sorted per-metric arrays over all teams, updatable one team at a time"""
+
+    def __init__(self):
+        self.teams = {}
+        self.sorted = {metric: [] for metric in PEER_METRICS}
+
+    def __len__(self):
+        return len(self.teams)
+
+    def update_team(self, team, stats):
+        """Insert or replace a team's metrics from its stats dict"""
+        self.remove_team(team)
+        values = {metric: float(stats[metric]) for metric in PEER_METRICS}
+        self.teams[team] = values
+        for metric, value in values.items():
+            if not np.isnan(value):
+                insort(self.sorted[metric], value)
+        return self
+
+    def remove_team(self, team):
+        values = self.teams.pop(team, None)
+        if values is None:
+            return self
+        for metric, value in values.items():
+            if not np.isnan(value):
+                column = self.sorted[metric]
+                del column[bisect_left(column, value)]
+        return self
+
+    def percentile(self, metric, value):
+        """Mid-rank percentile (0-100, higher is better) of `value` among the indexed teams"""
+        column = self.sorted[metric]
+        if not column or np.isnan(value):
+            return np.nan
+        below = bisect_left(column, value)
+        ties = bisect_right(column, value) - below
+        rank = (below + 0.5 * ties) / len(column) * 100
+        return rank if PEER_METRICS[metric][1] else 100 - rank
+
+    def team_percentiles(self, team):
+        """Percentile of every peer metric for an indexed team"""
+        values = self.teams[team]
+        return {metric: self.percentile(metric, value) for metric, value in values.items()}
+
+    def save(self, path):
+        """Persist every team's metrics; the sorted arrays are rebuilt on load"""
+        frame = pd.DataFrame.from_dict(self.teams, orient='index', columns=list(PEER_METRICS))
+        frame.rename_axis('Team').to_csv(path)
+
+    def load(self, path):
+        """Load an index written by save(); a missing file leaves the index empty"""
+        if not os.path.exists(path):
+            return self
+        frame = pd.read_csv(path, index_col='Team')
+        self.teams = {str(team): {metric: float(row[metric]) for metric in PEER_METRICS}
+                      for team, row in frame.iterrows()}
+        # One sort per metric instead of an insertion per team
+        self.sorted = {metric: np.sort(frame[metric].dropna().to_numpy(dtype=float)).tolist()
+                       for metric in PEER_METRICS}
+        return self
+
+
+def format_percentiles(percentiles, teams):
+    """One-line portfolio position, e.g. 'productivity 72nd, ... percentile (among 12 teams)'"""
+    parts = [f"{PEER_METRICS[metric][0]} {ordinal(round(value))}"
+             for metric, value in percentiles.items() if not np.isnan(value)]
+    if not parts or teams < 2:
+        return None
+    return f"{', '.join(parts)} percentile (among {teams} teams)"
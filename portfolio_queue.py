@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+"""
+Portfolio Work Queue
+Coordinator/worker mode for analyzing a whole portfolio on several machines:
+the coordinator submits one job per team export, and any number of workers
+(on any host that can reach the queue and the exports) claim jobs, run the
+analysis and write dashboards, reports and statistics back.
+
+- The default queue is a SQLite file on a shared directory; each call is one
+  short transaction, so workers on several hosts take turns on the lock
+- Claims are leases: a worker renews its lease while it runs a job, and a job
+  whose lease expires (crashed or unplugged worker) is claimed again
+- Failed jobs are retried after a growing delay, up to MAX_ATTEMPTS; invalid
+  exports (schema errors) fail at once
+- Jobs are keyed by export path and fingerprinted by content, so re-submitting
+  an unchanged export is a no-op and a changed one is queued again
+- Exports under the queue's directory are keyed relative to it, so hosts that
+  mount the share at different paths agree on job ids and find the files;
+  exports elsewhere are keyed by absolute path and need the same mount everywhere
+- Outputs are idempotent: artifacts are written to a temporary name and
+  renamed into place, so a job that runs twice (lost lease) leaves the same
+  complete files, and only the lease holder records the job's result
+
+Any other queue (a message broker, a cloud queue) plugs in by providing the
+same methods as SQLiteWorkQueue: enqueue, claim, renew, complete, fail,
+counts and results.
+
+Usage:
+    python portfolio_queue.py submit portfolio.db exports/*.csv
+    python portfolio_queue.py work portfolio.db --output-dir reports --processes 4   # on every host
+    python portfolio_queue.py status portfolio.db --export-stats portfolio.ndjson
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import closing, contextmanager
+from dataclasses import dataclass
+from multiprocessing import Process
+
+from anomaly_detection import StreamingAnomalyDetector
+from compressed_inputs import iter_input_sources
+from generate_team_analysis import TeamPerformanceAnalyzer
+from sprint_schema import SprintSchemaError
+from stats_export import TeamStatsSummary, export_summaries
+
+JOB_STATES = ('queued', 'running', 'done', 'failed')
+
+# Seconds a claim stays valid without renewal; workers renew at a third of it
+DEFAULT_LEASE = 300.0
+MAX_ATTEMPTS = 3
+# A failed job waits RETRY_DELAY seconds per attempt so far before it is retried
+RETRY_DELAY = 30.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL,
+    not_before REAL NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    updated REAL NOT NULL
+)
+"""
+
+
+@dataclass
+class Job:
+    """One claimed job: an export to analyze under a lease"""
+    job_id: str
+    source: str
+    fingerprint: str
+    attempts: int
+    worker: str
+
+
+def fingerprint_file(path):
+    """SHA-1 of a file's bytes, read in blocks"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def default_worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+class SQLiteWorkQueue:
+    """Job queue in one SQLite file, safe for concurrent processes and hosts"""
+
+    def __init__(self, path, lease_seconds=DEFAULT_LEASE, max_attempts=MAX_ATTEMPTS, retry_delay=RETRY_DELAY):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        with self._transaction() as db:
+            db.execute(_SCHEMA)
+
+    @contextmanager
+    def _transaction(self):
+        """One short write transaction on a fresh connection (usable from any thread or process)"""
+        with closing(sqlite3.connect(self.path, timeout=60, isolation_level=None)) as db:
+            db.execute('BEGIN IMMEDIATE')
+            try:
+                yield db
+            except BaseException:
+                db.execute('ROLLBACK')
+                raise
+            db.execute('COMMIT')
+
+    @property
+    def root(self):
+        """Directory of the queue file, as seen from this host"""
+        return os.path.dirname(os.path.abspath(self.path))
+
+    def job_id(self, source):
+        """Queue key of an export: its path relative to root, or its absolute path outside root"""
+        path = os.path.abspath(source)
+        try:
+            relative = os.path.relpath(path, self.root)
+        except ValueError:
+            # Another drive (Windows)
+            return path
+        return path if relative.startswith(os.pardir) else relative.replace(os.sep, '/')
+
+    def resolve(self, job_id):
+        """Path of a job's export on this host"""
+        return os.path.join(self.root, job_id.replace('/', os.sep))
+
+    def enqueue(self, sources, retry_failed=False):
+        """Queue one job per export path; returns (added, requeued, unchanged) counts
+
+        A path already queued with the same content is left alone, so submitting
+        the same exports twice does not run them twice.
+        """
+        added = requeued = unchanged = 0
+        for source in sources:
+            job_id = self.job_id(source)
+            fingerprint = fingerprint_file(source)
+            now = time.time()
+            with self._transaction() as db:
+                row = db.execute('SELECT fingerprint, status FROM jobs WHERE job_id = ?', (job_id,)).fetchone()
+                if row is None:
+                    db.execute('INSERT INTO jobs (job_id, source, fingerprint, updated) VALUES (?, ?, ?, ?)',
+                               (job_id, job_id, fingerprint, now))
+                    added += 1
+                elif row[0] != fingerprint or (retry_failed and row[1] == 'failed'):
+                    db.execute("UPDATE jobs SET fingerprint = ?, status = 'queued', attempts = 0, lease_owner = NULL, "
+                               "lease_expires = NULL, not_before = 0, error = NULL, updated = ? WHERE job_id = ?",
+                               (fingerprint, now, job_id))
+                    requeued += 1
+                else:
+                    unchanged += 1
+        return added, requeued, unchanged
+
+    def claim(self, worker):
+        """Lease the next runnable job (queued, or running with an expired lease); None when there is none"""
+        now = time.time()
+        with self._transaction() as db:
+            # Expired leases that used their last attempt will not be retried
+            db.execute("UPDATE jobs SET status = 'failed', lease_owner = NULL, updated = ?, "
+                       "error = COALESCE(error, 'lease expired') "
+                       "WHERE status = 'running' AND lease_expires < ? AND attempts >= ?",
+                       (now, now, self.max_attempts))
+            row = db.execute("SELECT job_id, source, fingerprint, attempts FROM jobs "
+                             "WHERE (status = 'queued' AND not_before <= ?) "
+                             "OR (status = 'running' AND lease_expires < ?) "
+                             "ORDER BY attempts, rowid LIMIT 1", (now, now)).fetchone()
+            if row is None:
+                return None
+            db.execute("UPDATE jobs SET status = 'running', attempts = attempts + 1, lease_owner = ?, "
+                       "lease_expires = ?, updated = ? WHERE job_id = ?",
+                       (worker, now + self.lease_seconds, now, row[0]))
+        return Job(row[0], self.resolve(row[1]), row[2], row[3] + 1, worker)
+
+    def _update_leased(self, job, assignments, values):
+        """Apply an update only while `job.worker` still holds the lease; True if it did"""
+        with self._transaction() as db:
+            cursor = db.execute(f"UPDATE jobs SET {assignments}, updated = ? "
+                                "WHERE job_id = ? AND status = 'running' AND lease_owner = ? AND fingerprint = ?",
+                                (*values, time.time(), job.job_id, job.worker, job.fingerprint))
+            return cursor.rowcount == 1
+
+    def renew(self, job):
+        """Extend the lease; False if it was lost to another worker"""
+        return self._update_leased(job, 'lease_expires = ?', (time.time() + self.lease_seconds,))
+
+    def complete(self, job, result):
+        """Record a finished job's result (JSON-serialisable); False if the lease was lost"""
+        return self._update_leased(job, "status = 'done', lease_owner = NULL, result = ?, error = NULL",
+                                   (json.dumps(result),))
+
+    def fail(self, job, error, retry=True):
+        """Requeue a failed job after a delay, or mark it failed after its last attempt (or when not `retry`)"""
+        if not retry or job.attempts >= self.max_attempts:
+            return self._update_leased(job, "status = 'failed', lease_owner = NULL, error = ?", (error,))
+        return self._update_leased(job, "status = 'queued', lease_owner = NULL, error = ?, not_before = ?",
+                                   (error, time.time() + self.retry_delay * job.attempts))
+
+    def counts(self):
+        """Number of jobs in each state"""
+        with self._transaction() as db:
+            counts = dict(db.execute('SELECT status, COUNT(*) FROM jobs GROUP BY status').fetchall())
+        return {state: counts.get(state, 0) for state in JOB_STATES}
+
+    def results(self):
+        """(source, result) for every finished job, plus (source, error) for failed ones"""
+        with self._transaction() as db:
+            rows = db.execute("SELECT source, status, result, error FROM jobs "
+                              "WHERE status IN ('done', 'failed') ORDER BY rowid").fetchall()
+        done = [(source, json.loads(result)) for source, status, result, _ in rows if status == 'done']
+        failed = [(source, error) for source, status, _, error in rows if status == 'failed']
+        return done, failed
+
+
+def _publish(path, content):
+    """Write an artifact under a temporary name and rename it into place
+
+    The temporary name carries the host and process, so workers on different
+    hosts sharing an output directory never write to the same temp file.
+    """
+    tmp_path = f"{path}.{default_worker_id().replace(':', '-')}.tmp"
+    try:
+        with open(tmp_path, 'wb' if isinstance(content, bytes) else 'w',
+                  **({} if isinstance(content, bytes) else {'encoding': 'utf-8'})) as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return path
+
+
+def run_job(job, output_dir, formats=('png',), dpi=300):
+    """Analyze every team in a job's export and publish its artifacts; returns the job result"""
+    os.makedirs(output_dir, exist_ok=True)
+    teams = []
+    for label, source in iter_input_sources([job.source]):
+        analyzer = TeamPerformanceAnalyzer(source)
+        analyzer.read_and_clean_data()
+        analyzer.detect_anomalies(StreamingAnomalyDetector())
+        analyzer.calculate_statistics()
+
+        base = os.path.join(output_dir, analyzer.team_name_clean)
+        files = []
+        if 'png' in formats:
+            files.append(_publish(f'{base}_Performance_Dashboard.png', analyzer.render_dashboard(dpi=dpi).getvalue()))
+        if 'html' in formats:
+            files.append(_publish(f'{base}_Performance_Dashboard.html', analyzer.render_html_dashboard()))
+        report = analyzer.render_markdown_report(os.path.basename(files[0]) if files else None)
+        files.append(_publish(f'{base}_Performance_Analysis.md', report))
+        teams.append({'source': label, 'files': files, 'summary': analyzer.summary.to_record()})
+    return {'worker': job.worker, 'attempt': job.attempts, 'teams': teams}
+
+
+def _renew_until(queue, job, stop):
+    """Heartbeat: renew the lease every third of its length until `stop` is set or the lease is lost"""
+    while not stop.wait(queue.lease_seconds / 3):
+        if not queue.renew(job):
+            print(f"Lease lost: {job.source}")
+            return
+
+
+def run_worker(queue, output_dir, worker=None, formats=('png',), dpi=300, wait=False, poll=5.0):
+    """Claim and run jobs until the queue is drained (or forever with `wait`); returns (done, failed)"""
+    worker = worker or default_worker_id()
+    done = failed = 0
+    while True:
+        job = queue.claim(worker)
+        if job is None:
+            if not wait:
+                break
+            time.sleep(poll)
+            continue
+
+        print(f"[{worker}] claimed {job.source} (attempt {job.attempts})")
+        stop = threading.Event()
+        heartbeat = threading.Thread(target=_renew_until, args=(queue, job, stop), daemon=True)
+        heartbeat.start()
+        try:
+            result = run_job(job, output_dir, formats, dpi)
+        except Exception as e:
+            failed += 1
+            # Invalid exports fail the same way every time; anything else may be transient
+            queue.fail(job, f'{type(e).__name__}: {str(e)}', retry=not isinstance(e, SprintSchemaError))
+            print(f"[{worker}] failed {job.source}: {str(e)}")
+            continue
+        finally:
+            stop.set()
+            heartbeat.join()
+
+        if queue.complete(job, result):
+            done += 1
+            print(f"[{worker}] done {job.source}: {len(result['teams'])} team(s)")
+        else:
+            # Another worker re-claimed the job; its identical outputs stand
+            print(f"[{worker}] lease lost before completion: {job.source}")
+    return done, failed
+
+
+def _worker_process(queue_path, lease_seconds, output_dir, worker, formats, dpi, wait):
+    queue = SQLiteWorkQueue(queue_path, lease_seconds=lease_seconds)
+    run_worker(queue, output_dir, worker, formats, dpi, wait)
+
+
+def main():
+    """Command-line entry point: submit jobs, run a worker, or report progress"""
+    parser = argparse.ArgumentParser(description="Distribute portfolio analysis over workers sharing a job queue")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    submit = commands.add_parser('submit', help="Queue one job per export")
+    submit.add_argument('queue', help="Queue database (SQLite file on a directory every host can reach)")
+    submit.add_argument('csv_files', nargs='+', metavar='csv_file',
+                        help="Team exports (.csv, .csv.gz, .csv.zst, .zip or .xlsx); keep them under the queue's "
+                             "directory so hosts mounting the share at different paths can find them, "
+                             "other paths must be the same on every host")
+    submit.add_argument('--retry-failed', action='store_true', help="Also requeue jobs that used all attempts")
+
+    work = commands.add_parser('work', help="Claim and run jobs")
+    work.add_argument('queue')
+    work.add_argument('--output-dir', default='.', help="Shared directory for dashboards and reports (default: .)")
+    work.add_argument('--format', choices=['png', 'html', 'both'], default='png', help="Dashboard output")
+    work.add_argument('--dpi', type=int, default=300)
+    work.add_argument('--processes', type=int, default=1, help="Worker processes on this host (default: 1)")
+    work.add_argument('--worker-id', help="Worker name in the queue (default: host:pid)")
+    work.add_argument('--lease', type=float, default=DEFAULT_LEASE,
+                      help=f"Lease length in seconds (default: {DEFAULT_LEASE:.0f})")
+    work.add_argument('--wait', action='store_true', help="Keep polling for new jobs instead of exiting when idle")
+
+    status = commands.add_parser('status', help="Show job counts and failures")
+    status.add_argument('queue')
+    status.add_argument('--export-stats', metavar='PATH',
+                        help="Write every finished team's statistics to PATH (.json, .ndjson/.jsonl or .csv)")
+    args = parser.parse_args()
+
+    if args.command != 'submit' and not os.path.exists(args.queue):
+        print(f"Error: Queue '{args.queue}' not found")
+        sys.exit(1)
+    try:
+        queue = SQLiteWorkQueue(args.queue, **({'lease_seconds': args.lease} if args.command == 'work' else {}))
+    except sqlite3.Error as e:
+        print(f"Error: {str(e)}")
+        sys.exit(1)
+
+    if args.command == 'submit':
+        missing = [path for path in args.csv_files if not os.path.exists(path)]
+        if missing:
+            print(f"Error: File '{missing[0]}' not found")
+            sys.exit(1)
+        added, requeued, unchanged = queue.enqueue(args.csv_files, args.retry_failed)
+        print(f"Jobs: {added} added, {requeued} requeued, {unchanged} unchanged")
+
+    elif args.command == 'work':
+        formats = ('png', 'html') if args.format == 'both' else (args.format,)
+        if args.processes <= 1:
+            done, failed = run_worker(queue, args.output_dir, args.worker_id, formats, args.dpi, args.wait)
+            print(f"Worker finished: {done} done, {failed} failed")
+        else:
+            base = args.worker_id or socket.gethostname()
+            processes = [Process(target=_worker_process,
+                                 args=(args.queue, args.lease, args.output_dir, f'{base}:{index}',
+                                       formats, args.dpi, args.wait))
+                         for index in range(args.processes)]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+        print(', '.join(f'{count} {state}' for state, count in queue.counts().items()))
+
+    else:
+        counts = queue.counts()
+        print(', '.join(f'{count} {state}' for state, count in counts.items()))
+        done, failed = queue.results()
+        for source, error in failed:
+            print(f"  failed: {source}: {error}")
+        if args.export_stats:
+            summaries = (TeamStatsSummary(**team['summary']) for _, result in done for team in result['teams'])
+            try:
+                count = export_summaries(summaries, args.export_stats)
+            except ValueError as e:
+                print(f"Error: {str(e)}")
+                sys.exit(1)
+            print(f"Statistics for {count} team(s) exported: {args.export_stats}")
+
+
+if __name__ == "__main__":
+    main()
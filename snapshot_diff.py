@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Snapshot Diff
+Compares two dated exports (or bundles of exports) and reports which sprints
+were added, removed or silently edited, field by field, and how the edits move
+each team's headline statistics.
+
+- Exports are scanned as raw cell text, without type parsing, and every
+  (team, sprint) row is reduced to one 64-bit hash of its cells, so the
+  comparison is a single keyed merge of two hash columns: linear in the number
+  of rows, however many teams the snapshots hold
+- Numeric cells are hashed and compared in one canonical form, so a workbook's
+  "20.0" or 0.65 matches a CSV's "20" or "65%"
+- Only rows whose hashes differ are compared cell by cell
+- Only teams with changes are parsed with the sprint schema, for headline
+  statistics before and after (from sprint_windows cumulative sums)
+
+A snapshot is a CSV (plain, .gz, .zst), a zip bundle, an .xlsx workbook or a
+directory of those.
+
+Usage:
+    python snapshot_diff.py exports_20251101/ exports_20251108/
+    python snapshot_diff.py DNETeam20251101.csv DNETeam20251108.csv --output DNE_changes.md
+"""
+
+import argparse
+import csv
+import io
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from compressed_inputs import iter_input_sources
+from sprint_derivation import apply_derivation
+from sprint_schema import SprintSchemaError, coerce_sprint_frame
+from sprint_windows import WindowSums
+
+# Export columns compared between snapshots, as raw cell text
+DIFF_FIELDS = ['Target Velocity', 'Committed SP', 'Delivered SP', 'Inflation correction',
+               'Productivity', 'Predictability', 'Notes']
+KEY = ['Team', 'Sprint']
+
+# Fields compared by value rather than text ("20" == "20.0", "65%" == "0.65")
+NUMBER_FIELDS = ['Target Velocity', 'Committed SP', 'Delivered SP', 'Inflation correction']
+PERCENT_FIELDS = ['Productivity', 'Predictability']
+
+SNAPSHOT_EXTENSIONS = ('.csv', '.gz', '.gzip', '.zst', '.zstd', '.zip', '.xlsx', '.xlsm')
+
+# Headline statistics shown before -> after for teams with changes
+HEADLINE = {
+    'avg_productivity': ('Productivity', '{:.1%}'),
+    'avg_predictability': ('Predictability', '{:.1%}'),
+    'cv_productivity': ('CV', '{:.1f}%'),
+    'total_inflation': ('Inflation', '{:.0f} SP'),
+}
+
+
+def _snapshot_paths(path):
+    """A snapshot path, or the export files of a snapshot directory in name order"""
+    if not os.path.isdir(path):
+        return [path]
+    return sorted(os.path.join(path, name) for name in os.listdir(path)
+                  if name.lower().endswith(SNAPSHOT_EXTENSIONS))
+
+
+def _source_rows(source):
+    """Header and rows of one export as lists of cell text"""
+    if isinstance(source, pd.DataFrame):
+        # Workbook sheet: typed cells back to text
+        cells = source.astype(object).where(source.notna(), '')
+        return [str(column) for column in source.columns], cells.astype(str).values.tolist()
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, newline='', encoding='utf-8-sig') as f:
+            rows = list(csv.reader(f))
+    else:
+        rows = list(csv.reader(io.TextIOWrapper(source, encoding='utf-8-sig', newline='')))
+    return (rows[0] if rows else []), rows[1:]
+
+
+def load_snapshot(path):
+    """Raw cell text of every sprint row in a snapshot: Team, Sprint and DIFF_FIELDS
+
+    Nothing is type-parsed here; cells are only stripped, so loading is one CSV
+    scan per export.
+    """
+    records = []
+    for label, source in iter_input_sources(_snapshot_paths(path)):
+        header, rows = _source_rows(source)
+        header = [name.strip() for name in header]
+        missing = [name for name in KEY if name not in header]
+        if missing:
+            raise SprintSchemaError(f"{label}: missing required column(s) {', '.join(repr(m) for m in missing)}")
+        positions = [header.index(name) if name in header else None for name in KEY + DIFF_FIELDS]
+        team = None
+        for row in rows:
+            cells = [row[i].strip() if i is not None and i < len(row) else '' for i in positions]
+            if not cells[1]:
+                continue
+            # As in the analyzer, the first row names the team for the whole export
+            team = team or cells[0]
+            cells[0] = team
+            records.append(cells)
+    if not records:
+        raise SprintSchemaError(f"{path}: no sprint exports found")
+    snapshot = pd.DataFrame(records, columns=KEY + DIFF_FIELDS)
+    duplicated = snapshot.duplicated(KEY, keep='last')
+    if duplicated.any():
+        print(f"Warning: {path}: {int(duplicated.sum())} repeated team/sprint row(s); keeping the last")
+        snapshot = snapshot[~duplicated].reset_index(drop=True)
+    return snapshot
+
+
+def comparable_cells(snapshot):
+    """DIFF_FIELDS with numeric cells in one canonical text form; other cells are left as they are"""
+    cells = snapshot[DIFF_FIELDS].copy()
+    for field in NUMBER_FIELDS + PERCENT_FIELDS:
+        text = cells[field]
+        values = pd.to_numeric(text.str.rstrip('%'), errors='coerce').astype(float)
+        if field in PERCENT_FIELDS:
+            values = values.where(~text.str.endswith('%'), values / 100)
+        # Rounding absorbs the float noise of "65%" / 100 against a stored 0.65
+        cells[field] = text.where(values.isna(), values.round(12).astype(str))
+    return cells
+
+
+def row_hashes(cells):
+    """One uint64 per row of comparable_cells, in one vectorized pass"""
+    return pd.util.hash_pandas_object(cells, index=False).to_numpy()
+
+
+def diff_snapshots(old, new):
+    """Keyed comparison of two snapshots
+
+    Returns (rows, changes): rows has Team, Sprint and status ('added', 'removed'
+    or 'changed'); changes has Team, Sprint, field, old and new for every edited cell.
+    """
+    old_cells, new_cells = comparable_cells(old), comparable_cells(new)
+    merged = pd.merge(old[KEY].assign(old_hash=row_hashes(old_cells), old_row=np.arange(len(old))),
+                      new[KEY].assign(new_hash=row_hashes(new_cells), new_row=np.arange(len(new))),
+                      on=KEY, how='outer', indicator=True, sort=False)
+    status = np.select([merged['_merge'] == 'right_only', merged['_merge'] == 'left_only',
+                        merged['old_hash'] != merged['new_hash']],
+                       ['added', 'removed', 'changed'], default='')
+    rows = merged.assign(status=status)
+    rows = rows[rows['status'] != '']
+
+    # Only rows whose hashes differ are compared cell by cell; edits show the raw cell text
+    changed = rows[rows['status'] == 'changed']
+    old_rows, new_rows = changed['old_row'].astype(int), changed['new_row'].astype(int)
+    before = old.iloc[old_rows].reset_index(drop=True)
+    after = new.iloc[new_rows].reset_index(drop=True)
+    before_cells = old_cells.iloc[old_rows].reset_index(drop=True)
+    after_cells = new_cells.iloc[new_rows].reset_index(drop=True)
+    changes = []
+    for field in DIFF_FIELDS:
+        edited = before_cells[field] != after_cells[field]
+        if edited.any():
+            changes.append(pd.DataFrame({'Team': before['Team'][edited], 'Sprint': before['Sprint'][edited],
+                                         'field': field, 'old': before[field][edited],
+                                         'new': after[field][edited]}))
+    changes = (pd.concat(changes, ignore_index=True) if changes
+               else pd.DataFrame(columns=['Team', 'Sprint', 'field', 'old', 'new']))
+    return rows[KEY + ['status']].reset_index(drop=True), changes
+
+
+def headline_stats(snapshot, teams, label='snapshot'):
+    """Headline statistics of the given teams, parsed and computed as the analyzer would
+
+    Parse errors name the snapshot `label` and the team.
+    """
+    stats = {}
+    for team, rows in snapshot[snapshot['Team'].isin(teams)].groupby('Team', sort=False):
+        frame = coerce_sprint_frame(rows.replace('', np.nan), ('stats',), f"{label}: team '{team}'")
+        apply_derivation(frame)
+        frame['Inflation correction'] = frame['Inflation correction'].fillna(0)
+        frame = frame[frame['Productivity_num'].notna()]
+        if len(frame):
+            window = WindowSums(frame).window()
+            stats[team] = {key: window[key] for key in HEADLINE}
+    return pd.DataFrame.from_dict(stats, orient='index', columns=list(HEADLINE))
+
+
+def _format_value(field, value):
+    if not value:
+        return 'blank'
+    return f'"{value}"' if field == 'Notes' else value
+
+
+def render_diff_report(old_label, new_label, rows, changes, before, after):
+    """Markdown change report"""
+    counts = rows['status'].value_counts()
+    lines = [
+        "# Sprint Snapshot Changes",
+        "",
+        f"**Old snapshot:** {old_label}  ",
+        f"**New snapshot:** {new_label}  ",
+        f"**Sprints:** {counts.get('added', 0)} added, {counts.get('removed', 0)} removed, "
+        f"{counts.get('changed', 0)} changed across {rows['Team'].nunique()} team(s)",
+        "",
+    ]
+    if rows.empty:
+        lines += ["No differences.", ""]
+    for team, team_rows in rows.groupby('Team', sort=True):
+        lines += [f"## {team}", ""]
+        for status in ('added', 'removed'):
+            sprints = team_rows.loc[team_rows['status'] == status, 'Sprint']
+            if len(sprints):
+                lines.append(f"- **{status.title()}:** {', '.join(sprints)}")
+        for sprint, edits in changes[changes['Team'] == team].groupby('Sprint', sort=False):
+            fields = '; '.join(f"{edit['field']} {_format_value(edit['field'], edit['old'])} "
+                               f"→ {_format_value(edit['field'], edit['new'])}" for _, edit in edits.iterrows())
+            lines.append(f"- **{sprint}:** {fields}")
+        if team in before.index or team in after.index:
+            effects = []
+            for key, (label, fmt) in HEADLINE.items():
+                old_value = before[key].get(team, np.nan)
+                new_value = after[key].get(team, np.nan)
+                if not np.isclose(old_value, new_value, equal_nan=True):
+                    effects.append(f"{label} {_format_stat(fmt, old_value)} → {_format_stat(fmt, new_value)}")
+            if effects:
+                lines.append(f"- **Effect:** {', '.join(effects)}")
+        lines.append("")
+    lines += ["---", "", f"**Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", ""]
+    return "\n".join(lines)
+
+
+def _format_stat(fmt, value):
+    return 'n/a' if np.isnan(value) else fmt.format(value)
+
+
+def main():
+    """Command-line entry point: compare two snapshots"""
+    parser = argparse.ArgumentParser(description="Report sprints added, removed or edited between two exports")
+    parser.add_argument('old', help="Earlier snapshot (CSV, .gz/.zst, .zip, .xlsx or a directory of them)")
+    parser.add_argument('new', help="Later snapshot")
+    parser.add_argument('--output', metavar='PATH', help="Also write the markdown change report to PATH")
+    args = parser.parse_args()
+
+    try:
+        old = load_snapshot(args.old)
+        new = load_snapshot(args.new)
+        rows, changes = diff_snapshots(old, new)
+        # Changed teams are parsed with the sprint schema, so bad cells surface here
+        teams = rows['Team'].unique()
+        before = headline_stats(old, teams, args.old)
+        after = headline_stats(new, teams, args.new)
+    except (OSError, ValueError, ImportError) as e:
+        print(f"Error: {str(e)}")
+        sys.exit(1)
+
+    report = render_diff_report(args.old, args.new, rows, changes, before, after)
+    print(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(report)
+        print(f"Change report saved: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
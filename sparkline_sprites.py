@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Sparkline Sprite Sheet
+Tiny productivity and predictability sparklines for every team of a portfolio,
+drawn straight into one NumPy image buffer and saved as a PNG sprite sheet
+with a JSON coordinate index for the overview page.
+
+- No figures: all teams' series are padded into one teams x sprints matrix,
+  resampled to the sparkline width, and rasterized as one boolean
+  teams x height x width mask per metric
+- Each pixel column spans the line from its neighbours' midpoints, so steep
+  moves stay connected at 1 px line width
+- Cells are laid out in a grid by a single reshape/transpose of the cell stack
+- All teams share one vertical scale (SCALE), with a faint 100% reference line,
+  so sparklines can be compared at a glance
+
+A thousand teams render in well under a second.
+
+Usage:
+    python sparkline_sprites.py <store_dir> portfolio_sparklines.png
+or --sparklines PATH in generate_team_analysis.py.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+from PIL import Image
+
+SERIES = ('productivity', 'predictability')
+
+# Sparkline size in pixels, margin around each one, and the shared value range
+SPARK_WIDTH = 100
+SPARK_HEIGHT = 20
+MARGIN = 2
+SCALE = (0.0, 1.5)
+COLUMNS = 16
+
+COLORS = {
+    'productivity': (0x1f, 0x77, 0xb4),
+    'predictability': (0xff, 0x7f, 0x0e),
+    'reference': (0xdd, 0xdd, 0xdd),
+    'background': (0xff, 0xff, 0xff),
+}
+
+
+def pad_series(series_list):
+    """NaN-padded teams x max_length matrix and the length of each series"""
+    lengths = np.array([len(values) for values in series_list], dtype=np.int64)
+    matrix = np.full((len(series_list), max(lengths.max(initial=0), 1)), np.nan)
+    for row, values in enumerate(series_list):
+        matrix[row, :len(values)] = values
+    return matrix, lengths
+
+
+def pad_flat(values, offsets, counts):
+    """Same matrix from team-contiguous flat arrays (a sprint store), in one scatter"""
+    counts = np.asarray(counts, dtype=np.int64)
+    matrix = np.full((len(counts), max(counts.max(initial=0), 1)), np.nan)
+    team = np.repeat(np.arange(len(counts)), counts)
+    position = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    matrix[team, position] = values[np.repeat(offsets, counts) + position]
+    return matrix, counts
+
+
+def rasterize(matrix, lengths, width=SPARK_WIDTH, height=SPARK_HEIGHT, scale=SCALE):
+    """Boolean teams x height x width line masks for every row of `matrix`"""
+    # Gaps inside a series are bridged with the previous (or next) value
+    matrix = pd.DataFrame(matrix).ffill(axis=1).bfill(axis=1).to_numpy()
+    last = np.maximum(lengths - 1, 0)
+
+    # Resample every series to `width` columns by linear interpolation
+    t = np.linspace(0.0, 1.0, width)[None, :] * last[:, None]
+    i0 = np.minimum(np.floor(t).astype(np.int64), last[:, None])
+    i1 = np.minimum(i0 + 1, last[:, None])
+    fraction = t - i0
+    values = (np.take_along_axis(matrix, i0, axis=1) * (1 - fraction)
+              + np.take_along_axis(matrix, i1, axis=1) * fraction)
+
+    low, high = scale
+    y = (height - 1) * (1 - (np.clip(values, low, high) - low) / (high - low))
+    y = np.where(np.isnan(y), height - 1, y)
+
+    # Each column covers the line between the midpoints to its neighbours
+    previous = np.concatenate([y[:, :1], y[:, :-1]], axis=1)
+    following = np.concatenate([y[:, 1:], y[:, -1:]], axis=1)
+    top = np.rint(np.minimum(y, np.minimum((y + previous) / 2, (y + following) / 2)))
+    bottom = np.rint(np.maximum(y, np.maximum((y + previous) / 2, (y + following) / 2)))
+
+    rows = np.arange(height)[None, :, None]
+    mask = (rows >= top[:, None, :]) & (rows <= bottom[:, None, :])
+    mask &= (lengths > 0)[:, None, None]
+    return mask
+
+
+def _reference_row(height=SPARK_HEIGHT, scale=SCALE):
+    low, high = scale
+    return int(round((height - 1) * (1 - (1.0 - low) / (high - low))))
+
+
+def render_sprite_sheet(teams, series, lengths, columns=COLUMNS):
+    """Sprite sheet (H x W x 3 uint8) and its coordinate index
+
+    `series` maps each SERIES name to a teams x sprints matrix (see pad_series);
+    every team's cell stacks its sparklines top to bottom in SERIES order.
+    """
+    count = len(teams)
+    cell_w = SPARK_WIDTH + 2 * MARGIN
+    cell_h = len(SERIES) * (SPARK_HEIGHT + MARGIN) + MARGIN
+    columns = max(1, min(columns, count))
+    grid_rows = -(-count // columns)
+
+    cells = np.empty((grid_rows * columns, cell_h, cell_w, 3), dtype=np.uint8)
+    cells[:] = COLORS['background']
+    offsets = {}
+    for position, name in enumerate(SERIES):
+        top = MARGIN + position * (SPARK_HEIGHT + MARGIN)
+        offsets[name] = [MARGIN, top]
+        strip = cells[:count, top:top + SPARK_HEIGHT, MARGIN:MARGIN + SPARK_WIDTH]
+        strip[:, _reference_row()] = COLORS['reference']
+        strip[rasterize(series[name], lengths)] = COLORS[name]
+
+    sheet = (cells.reshape(grid_rows, columns, cell_h, cell_w, 3)
+             .transpose(0, 2, 1, 3, 4)
+             .reshape(grid_rows * cell_h, columns * cell_w, 3))
+    index = {
+        'cell': [cell_w, cell_h],
+        'sparkline': [SPARK_WIDTH, SPARK_HEIGHT],
+        'series': offsets,
+        'scale': list(SCALE),
+        'teams': [{'team': str(team), 'x': (i % columns) * cell_w, 'y': (i // columns) * cell_h,
+                   'sprints': int(lengths[i])} for i, team in enumerate(teams)],
+    }
+    return sheet, index
+
+
+def index_path(path):
+    """Coordinate index written next to the sprite sheet"""
+    return f'{os.path.splitext(path)[0]}.json'
+
+
+def save_sprite_sheet(sheet, index, path):
+    """Write the PNG sprite sheet and its JSON index; returns the index path"""
+    Image.fromarray(sheet).save(path, format='PNG')
+    with open(index_path(path), 'w', encoding='utf-8') as f:
+        json.dump(index, f)
+    return index_path(path)
+
+
+def generate_sparklines(rows, path, columns=COLUMNS):
+    """Sprite sheet from (team, productivity, predictability) rows, e.g. collected during a batch run"""
+    teams = [team for team, _, _ in rows]
+    productivity, lengths = pad_series([values for _, values, _ in rows])
+    predictability, _ = pad_series([values for _, _, values in rows])
+    sheet, index = render_sprite_sheet(teams, {'productivity': productivity, 'predictability': predictability},
+                                       lengths, columns)
+    save_sprite_sheet(sheet, index, path)
+    return index
+
+
+def main():
+    """Command-line entry point: sprite sheet for every team in a sprint store"""
+    parser = argparse.ArgumentParser(description="Render portfolio sparklines from a sprint store into one sprite sheet")
+    parser.add_argument('store', help="Store directory written with --sprint-store")
+    parser.add_argument('output', help="Sprite sheet PNG (the coordinate index is written next to it as .json)")
+    parser.add_argument('--columns', type=int, default=COLUMNS, help=f"Teams per sheet row (default: {COLUMNS})")
+    args = parser.parse_args()
+
+    from sprint_store import SprintStore
+    try:
+        store = SprintStore(args.store)
+    except (OSError, ValueError) as e:
+        print(f"Error: {str(e)}")
+        sys.exit(1)
+    if not len(store):
+        print(f"Error: {args.store}: the sprint store holds no teams")
+        sys.exit(1)
+
+    records = store.records
+    lengths = store.counts
+    series = {name: pad_flat(np.asarray(records[name], dtype=np.float64), store.offsets, store.counts)[0]
+              for name in SERIES}
+    sheet, index = render_sprite_sheet(store.team_names, series, lengths, args.columns)
+    save_sprite_sheet(sheet, index, args.output)
+    print(f"Sparklines for {len(store)} teams saved: {args.output} ({sheet.shape[1]}x{sheet.shape[0]} px), "
+          f"index: {index_path(args.output)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Sprint Column Derivation
+Recomputes the spreadsheet's formula columns from the raw sprint inputs
+(Target Velocity, Committed SP, Delivered SP, Inflation correction) in one
+vectorized pass, and reports where supplied values disagree.
+
+    Productivity             = (Delivered + Inflation) / Target Velocity
+    Predictability           = Delivered / Committed
+    Normalized Target Vel.   = the team's current (last) Target Velocity
+    Normalized X             = X * Normalized Target Velocity / Target Velocity
+    Moving Average (n)       = mean of the last n (Normalized Delivered + Normalized Inflation)
+
+Missing inflation counts as 0, as in the spreadsheet. Any other missing input
+makes the derived value NaN, and moving averages are NaN until n sprints with
+data exist, matching the spreadsheet's #VALUE! cells.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Columns the kernel needs
+RAW_COLUMNS = ['Team', 'Sprint', 'Target Velocity', 'Committed SP', 'Delivered SP', 'Inflation correction']
+
+# Derived column -> largest difference explained by rounding of the supplied
+# value (whole percent for ratios, one decimal for story points)
+DERIVED_TOLERANCES = {
+    'Productivity_num': 0.0051,
+    'Predictability_num': 0.0051,
+    'Normalized Target Velocity': 0.051,
+    'Normalized Planned SP': 0.051,
+    'Normalized Delivered SP': 0.051,
+    'Normalized Inflation SP': 0.051,
+    'Moving Average (2)': 0.051,
+    'Moving Average (3)': 0.051,
+}
+DERIVED_COLUMNS = list(DERIVED_TOLERANCES)
+
+
+def derive_sprint_columns(df):
+    """Derived columns for every row of df (one or many teams, sprints in order)"""
+    target = df['Target Velocity'].to_numpy(dtype=float)
+    committed = df['Committed SP'].to_numpy(dtype=float)
+    delivered = df['Delivered SP'].to_numpy(dtype=float)
+    inflation = np.nan_to_num(df['Inflation correction'].to_numpy(dtype=float))
+    teams = df['Team'].astype(str).str.strip().to_numpy()
+
+    # The current model's velocity is each team's last known Target Velocity
+    normalized_target = pd.Series(target, index=df.index).groupby(teams).transform('last').to_numpy()
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        scale = np.where(target > 0, normalized_target / target, np.nan)
+        productivity = np.where(target > 0, (delivered + inflation) / target, np.nan)
+        predictability = np.where(committed > 0, delivered / committed, np.nan)
+
+    normalized_delivered = delivered * scale
+    normalized_inflation = np.where(np.isnan(delivered), np.nan, inflation * scale)
+    throughput = pd.Series(normalized_delivered + normalized_inflation, index=df.index)
+
+    # Moving averages without a per-team loop: shift within each team
+    previous = throughput.groupby(teams).shift(1)
+    before_previous = throughput.groupby(teams).shift(2)
+
+    return pd.DataFrame({
+        'Productivity_num': productivity,
+        'Predictability_num': predictability,
+        'Normalized Target Velocity': normalized_target,
+        'Normalized Planned SP': committed * scale,
+        'Normalized Delivered SP': normalized_delivered,
+        'Normalized Inflation SP': normalized_inflation,
+        'Moving Average (2)': ((throughput + previous) / 2).to_numpy(),
+        'Moving Average (3)': ((throughput + previous + before_previous) / 3).to_numpy(),
+    }, index=df.index)
+
+
+def _input_rounding_slack(df, derived):
+    """Extra tolerance per cell because exports round raw SP inputs to whole points (+-0.5 each)"""
+    target = df['Target Velocity'].to_numpy(dtype=float)
+    committed = df['Committed SP'].to_numpy(dtype=float)
+    delivered = df['Delivered SP'].to_numpy(dtype=float)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        scale = derived['Normalized Target Velocity'].to_numpy() / target
+        half_scale = 0.5 * scale
+        return {
+            'Productivity_num': 1.0 / target,
+            'Predictability_num': 0.5 / committed + 0.5 * delivered / committed ** 2,
+            'Normalized Target Velocity': 0.0,
+            'Normalized Planned SP': half_scale,
+            'Normalized Delivered SP': half_scale,
+            'Normalized Inflation SP': half_scale,
+            'Moving Average (2)': 2 * half_scale,
+            'Moving Average (3)': 2 * half_scale,
+        }
+
+
+def find_disagreements(df, derived):
+    """Rows where a supplied value differs from the derived one beyond rounding
+
+    Returns a DataFrame with Sprint, column, supplied, derived and difference.
+    Cells missing on either side are not disagreements.
+    """
+    issues = []
+    slack = _input_rounding_slack(df, derived)
+    for column, tolerance in DERIVED_TOLERANCES.items():
+        if column not in df.columns:
+            continue
+        supplied = df[column].to_numpy(dtype=float)
+        expected = derived[column].to_numpy(dtype=float)
+        with np.errstate(invalid='ignore'):
+            bad = np.abs(supplied - expected) > tolerance + np.nan_to_num(slack[column])
+        if bad.any():
+            issues.append(pd.DataFrame({
+                'Sprint': df['Sprint'].to_numpy()[bad],
+                'column': column,
+                'supplied': supplied[bad],
+                'derived': expected[bad],
+                'difference': supplied[bad] - expected[bad],
+            }))
+    if not issues:
+        return pd.DataFrame(columns=['Sprint', 'column', 'supplied', 'derived', 'difference'])
+    return pd.concat(issues, ignore_index=True)
+
+
+def apply_derivation(df):
+    """Fill derived columns into df in place; returns (disagreements, filled cell count)
+
+    Supplied values are kept where present, so existing reports do not shift;
+    blanks and spreadsheet errors are filled from the raw inputs, and columns
+    missing from raw-only exports are added.
+    """
+    derived = derive_sprint_columns(df)
+    disagreements = find_disagreements(df, derived)
+    filled = 0
+    for column in DERIVED_COLUMNS:
+        if column in df.columns:
+            gaps = df[column].isna() & derived[column].notna()
+            filled += int(gaps.sum())
+            df[column] = df[column].where(~gaps, derived[column])
+        else:
+            df[column] = derived[column]
+    return disagreements, filled
+
+
+def format_disagreement(row):
+    """One-line description of a disagreement"""
+    if row['column'] in ('Productivity_num', 'Predictability_num'):
+        label = row['column'].replace('_num', '')
+        return (f"{row['Sprint']}: {label} supplied {row['supplied']:.0%}, "
+                f"derived {row['derived']:.0%}")
+    return (f"{row['Sprint']}: {row['column']} supplied {row['supplied']:.1f}, "
+            f"derived {row['derived']:.1f}")
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Sprint Export Schema
+Declared column types for the team sprint CSV export, applied at parse time.
+
+- Each column maps to a kind (text, number, percent) and the outputs that need it
+- Spreadsheet sentinels ("/", "#VALUE!", ...) become NaN while parsing
+- Percent columns are parsed straight into fractions ("65%" -> 0.65)
+- Only the columns the requested outputs need are read; trailing empty
+  columns, Notes and the Normalized* columns are skipped when unused
+- The header is validated before the body is parsed, so malformed files fail
+  fast with a clear SprintSchemaError
+"""
+
+import csv
+import io
+import os
+import zipfile
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from compressed_inputs import is_compressed, open_input_stream
+
+# Values the tracking spreadsheet writes for "no data" or formula errors
+NA_SENTINELS = ['/', '#VALUE!', '#DIV/0!', '#N/A', '#REF!', '#NUM!', '']
+
+# Output stages a run may request
+OUTPUTS = ('stats', 'dashboard', 'report', 'export')
+DEFAULT_OUTPUTS = ('stats', 'dashboard', 'report')
+
+_CORE = frozenset(OUTPUTS)
+
+# How much of a non-seekable stream may be inspected for the header row
+HEADER_PEEK_BYTES = 1 << 16
+
+
+class SprintSchemaError(ValueError):
+    """Raised when an input does not match the sprint export schema"""
+
+
+@dataclass(frozen=True)
+class ColumnSpec:
+    """How one export column is parsed and which outputs need it"""
+    name: str
+    kind: str
+    outputs: frozenset
+    required: bool = True
+    target: Optional[str] = None
+
+    @property
+    def column(self):
+        """Column name after parsing"""
+        return self.target or self.name
+
+
+SPRINT_SCHEMA = (
+    ColumnSpec('Team', 'text', _CORE),
+    ColumnSpec('Sprint', 'text', _CORE),
+    ColumnSpec('Target Velocity', 'number', _CORE),
+    ColumnSpec('Committed SP', 'number', _CORE),
+    ColumnSpec('Delivered SP', 'number', _CORE),
+    ColumnSpec('Inflation correction', 'number', _CORE),
+    ColumnSpec('Normalized Target Velocity', 'number', frozenset({'export'}), required=False),
+    ColumnSpec('Normalized Planned SP', 'number', frozenset({'export'}), required=False),
+    ColumnSpec('Normalized Delivered SP', 'number', frozenset({'export'}), required=False),
+    ColumnSpec('Normalized Inflation SP', 'number', frozenset({'export'}), required=False),
+    # Formula columns: optional, derived from the raw inputs when absent (see sprint_derivation)
+    ColumnSpec('Productivity', 'percent', _CORE, required=False, target='Productivity_num'),
+    ColumnSpec('Predictability', 'percent', _CORE, required=False, target='Predictability_num'),
+    ColumnSpec('Moving Average (2)', 'number', frozenset({'export'}), required=False),
+    ColumnSpec('Moving Average (3)', 'number', frozenset({'export'}), required=False),
+    # Notes feed the capacity-adjusted statistics, so even --stats-only runs read them
+    ColumnSpec('Notes', 'text', frozenset({'stats', 'report', 'export'}), required=False),
+)
+
+
+def parse_percent(value):
+    """Parse "65%", "0.65" or 0.65 into a fraction; sentinels and blanks become NaN"""
+    if value is None:
+        return np.nan
+    if isinstance(value, (int, float, np.number)):
+        return float(value)
+    text = str(value).strip()
+    if text in NA_SENTINELS:
+        return np.nan
+    try:
+        if text.endswith('%'):
+            return float(text[:-1]) / 100
+        return float(text)
+    except ValueError:
+        raise SprintSchemaError(f"Cannot parse percentage value '{text}'") from None
+
+
+def columns_for(outputs):
+    """Schema columns needed by the requested outputs"""
+    outputs = set(outputs)
+    unknown = outputs - set(OUTPUTS)
+    if unknown:
+        raise ValueError(f"Unknown output(s): {', '.join(sorted(unknown))}")
+    return [spec for spec in SPRINT_SCHEMA if spec.outputs & outputs]
+
+
+def validate_header(header, outputs, source_label='input'):
+    """Check a header row against the schema; returns the specs present in the file"""
+    header = [name.lstrip('\ufeff') for name in header]
+    specs = columns_for(outputs)
+    missing = [spec.name for spec in specs if spec.required and spec.name not in header]
+    if missing:
+        found = ', '.join(name for name in header if name) or 'no columns'
+        raise SprintSchemaError(
+            f"{source_label}: missing required column(s) {', '.join(repr(m) for m in missing)} "
+            f"(found: {found})")
+    return [spec for spec in specs if spec.name in header]
+
+
+def _read_header(source):
+    """Read just the header row of a path, bytes or stream without consuming the stream"""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, newline='', encoding='utf-8-sig') as f:
+            return next(csv.reader(f), [])
+
+    if not source.seekable():
+        # Buffered non-seekable stream (e.g. zstd): look at the buffer without consuming it
+        first_line = source.peek(HEADER_PEEK_BYTES).split(b'\n', 1)[0]
+        return next(csv.reader([first_line.decode('utf-8-sig')]), [])
+
+    position = source.tell()
+    first_line = source.readline()
+    source.seek(position)
+    if isinstance(first_line, bytes):
+        first_line = first_line.decode('utf-8-sig')
+    return next(csv.reader([first_line]), [])
+
+
+def _source_label(source):
+    return str(getattr(source, 'name', source)) if not isinstance(source, bytes) else 'in-memory bytes'
+
+
+def read_sprint_csv(source, outputs=DEFAULT_OUTPUTS):
+    """Parse a sprint CSV with typed columns, reading only what `outputs` need
+
+    Paths ending in .gz, .zst or .zip (with a single CSV) are decompressed while parsing.
+    """
+    if isinstance(source, (str, os.PathLike)) and is_compressed(source):
+        try:
+            with open_input_stream(source) as stream:
+                return read_sprint_csv(stream, outputs)
+        except SprintSchemaError:
+            raise
+        except ValueError as e:
+            raise SprintSchemaError(str(e)) from None
+        except (OSError, zipfile.BadZipFile) as e:
+            raise SprintSchemaError(f"{source}: cannot decompress ({e})") from e
+
+    label = _source_label(source)
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    elif not isinstance(source, (str, os.PathLike)) and not (hasattr(source, 'seekable') and source.seekable()):
+        if not hasattr(source, 'peek'):
+            # Other non-seekable streams: buffer them so the header can be checked before parsing
+            source = io.BytesIO(source.read())
+
+    try:
+        header = _read_header(source)
+    except (OSError, UnicodeDecodeError, csv.Error) as e:
+        raise SprintSchemaError(f"{label}: cannot read header ({e})") from e
+    specs = validate_header(header, outputs, label)
+
+    usecols = [spec.name for spec in specs]
+    dtype = {spec.name: 'float64' for spec in specs if spec.kind == 'number'}
+    dtype.update({spec.name: str for spec in specs if spec.kind == 'text'})
+    converters = {spec.name: parse_percent for spec in specs if spec.kind == 'percent'}
+    try:
+        df = pd.read_csv(source, encoding='utf-8-sig', usecols=usecols, dtype=dtype,
+                         converters=converters, na_values=NA_SENTINELS, keep_default_na=True)
+    except SprintSchemaError as e:
+        raise SprintSchemaError(f"{label}: {e}") from None
+    except ValueError as e:
+        raise SprintSchemaError(f"{label}: column type mismatch ({e})") from None
+
+    return _finish_frame(df, specs)
+
+
+def coerce_sprint_frame(df, outputs=DEFAULT_OUTPUTS, source_label='DataFrame'):
+    """Apply the schema to an already-loaded frame (DataFrame sources, workbook sheets)"""
+    specs = validate_header([str(column) for column in df.columns], outputs, source_label)
+    df = df[[spec.name for spec in specs]].copy()
+    for spec in specs:
+        column = df[spec.name]
+        if spec.kind == 'number':
+            column = column.replace(NA_SENTINELS, np.nan)
+            converted = pd.to_numeric(column, errors='coerce')
+            bad = converted.isna() & column.notna()
+            if bad.any():
+                raise SprintSchemaError(
+                    f"{source_label}: non-numeric value '{column[bad].iloc[0]}' in column '{spec.name}'")
+            df[spec.name] = converted.astype('float64')
+        elif spec.kind == 'percent':
+            try:
+                df[spec.name] = column.map(parse_percent).astype('float64')
+            except SprintSchemaError as e:
+                raise SprintSchemaError(f"{source_label}: {e} in column '{spec.name}'") from None
+        else:
+            df[spec.name] = column.where(column.isna(), column.astype(str))
+    return _finish_frame(df, specs)
+
+
+def _finish_frame(df, specs):
+    renames = {spec.name: spec.target for spec in specs if spec.target}
+    df = df.rename(columns=renames)
+    for spec in specs:
+        if spec.kind == 'percent':
+            df[spec.column] = df[spec.column].astype('float64')
+    return df
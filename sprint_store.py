@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Memory-Mapped Sprint Store
+Compact binary store of cleaned sprint rows for portfolio-scale queries across
+many teams and years, without re-reading CSVs or building DataFrames.
+
+- sprints.bin: fixed-width NumPy structured records (team id, sprint key and
+  float32 metrics), stored team by team and opened with np.memmap
+- index.json: team offset index (name, first row, row count, sprint range)
+- Per-team means, model phase splits and org rollup partials are computed with
+  np.add.reduceat over the team offsets, in bounded chunks of rows, so only the
+  pages being reduced are read and nothing is copied wholesale into memory
+
+Build it from read_and_clean_data output (see --sprint-store), then query:
+    python sprint_store.py <store_dir> [--org-map org_hierarchy.csv]
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+
+import numpy as np
+import pandas as pd
+
+STORE_VERSION = 1
+RECORDS_FILE = 'sprints.bin'
+INDEX_FILE = 'index.json'
+
+SPRINT_DTYPE = np.dtype([
+    ('team_id', '<i4'),
+    ('sprint_key', '<i4'),
+    ('target_velocity', '<f4'),
+    ('committed', '<f4'),
+    ('delivered', '<f4'),
+    ('inflation', '<f4'),
+    ('productivity', '<f4'),
+    ('predictability', '<f4'),
+])
+
+# Cleaned DataFrame column -> record field
+FIELD_COLUMNS = {
+    'target_velocity': 'Target Velocity',
+    'committed': 'Committed SP',
+    'delivered': 'Delivered SP',
+    'inflation': 'Inflation correction',
+    'productivity': 'Productivity_num',
+    'predictability': 'Predictability_num',
+}
+
+# Rows reduced per step; bounds the temporaries of every query
+CHUNK_ROWS = 1 << 18
+
+_SPRINT_PATTERN = re.compile(r'(\d{2,4})\.(\d{1,2})\s*$')
+
+
+def sprint_key(label, ordinal):
+    """Sortable integer for a sprint label ("DNE S25.08" -> 2508); falls back to the row ordinal"""
+    match = _SPRINT_PATTERN.search(str(label))
+    if match:
+        return int(match.group(1)) * 100 + int(match.group(2))
+    return ordinal
+
+
+class SprintStoreWriter:
+    """Appends cleaned team frames to a new store, one team at a time"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.teams = []
+        self._names = set()
+        self._rows = 0
+        self._file = open(os.path.join(directory, RECORDS_FILE + '.tmp'), 'wb')
+
+    def __contains__(self, team_name):
+        return team_name in self._names
+
+    def add_team(self, team_name, df):
+        """Append one team's cleaned sprint rows (df_clean from read_and_clean_data)"""
+        if team_name in self._names:
+            raise ValueError(f"Team '{team_name}' is already in the sprint store")
+        records = np.zeros(len(df), dtype=SPRINT_DTYPE)
+        records['team_id'] = len(self.teams)
+        records['sprint_key'] = [sprint_key(label, i) for i, label in enumerate(df['Sprint'])]
+        for field, column in FIELD_COLUMNS.items():
+            records[field] = df[column].to_numpy(dtype=float)
+        self._file.write(records.tobytes())
+
+        self.teams.append({
+            'name': team_name,
+            'offset': self._rows,
+            'count': len(records),
+            'first_sprint': str(df['Sprint'].iloc[0]) if len(df) else None,
+            'last_sprint': str(df['Sprint'].iloc[-1]) if len(df) else None,
+        })
+        self._names.add(team_name)
+        self._rows += len(records)
+
+    def close(self):
+        """Publish the records and index (atomically replacing an older store)"""
+        self._file.close()
+        os.replace(self._file.name, os.path.join(self.directory, RECORDS_FILE))
+        index = {'version': STORE_VERSION, 'dtype': SPRINT_DTYPE.descr, 'rows': self._rows, 'teams': self.teams}
+        temp_path = os.path.join(self.directory, INDEX_FILE + '.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, indent=1)
+        os.replace(temp_path, os.path.join(self.directory, INDEX_FILE))
+
+    def abort(self):
+        """Discard the partial records; an older store in the directory is left untouched"""
+        self._file.close()
+        if os.path.exists(self._file.name):
+            os.remove(self._file.name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class SprintStore:
+    """Read-only, memory-mapped view of a sprint store"""
+
+    def __init__(self, directory):
+        with open(os.path.join(directory, INDEX_FILE), encoding='utf-8') as f:
+            index = json.load(f)
+        if index.get('version') != STORE_VERSION:
+            raise ValueError(f"{directory}: unsupported sprint store version {index.get('version')}")
+        self.directory = directory
+        self.team_names = [team['name'] for team in index['teams']]
+        self.offsets = np.array([team['offset'] for team in index['teams']], dtype=np.int64)
+        self.counts = np.array([team['count'] for team in index['teams']], dtype=np.int64)
+        self.sprint_ranges = [(team['first_sprint'], team['last_sprint']) for team in index['teams']]
+        self._team_ids = {name: i for i, name in enumerate(self.team_names)}
+        if index['rows']:
+            self.records = np.memmap(os.path.join(directory, RECORDS_FILE), dtype=SPRINT_DTYPE,
+                                     mode='r', shape=(index['rows'],))
+        else:
+            self.records = np.zeros(0, dtype=SPRINT_DTYPE)
+
+    def __len__(self):
+        return len(self.team_names)
+
+    def team(self, name):
+        """Records of one team: a view into the memory map, not a copy"""
+        i = self._team_ids[name]
+        return self.records[self.offsets[i]:self.offsets[i] + self.counts[i]]
+
+    def _chunks(self):
+        """(first team, last team + 1, row slice) blocks of whole teams, about CHUNK_ROWS rows each"""
+        first = 0
+        while first < len(self.team_names):
+            last = first + 1
+            start = self.offsets[first]
+            while last < len(self.team_names) and self.offsets[last] + self.counts[last] - start <= CHUNK_ROWS:
+                last += 1
+            yield first, last, slice(start, self.offsets[last - 1] + self.counts[last - 1])
+            first = last
+
+    def _team_sums(self, values_for):
+        """Per-team sums of the arrays returned by values_for(block, local_team, teams) for each chunk
+
+        `local_team` gives each row's team position within the chunk and `teams`
+        the chunk's slice of the team index.
+        """
+        results = None
+        for first, last, rows in self._chunks():
+            block = self.records[rows]
+            starts = self.offsets[first:last] - rows.start
+            counts = self.counts[first:last]
+            arrays = values_for(block, np.repeat(np.arange(last - first), counts), slice(first, last))
+            if results is None:
+                results = {key: np.zeros(len(self.team_names)) for key in arrays}
+            for key, values in arrays.items():
+                # reduceat needs a non-empty segment per start; empty teams are zeroed below
+                sums = np.add.reduceat(values, np.minimum(starts, max(len(values) - 1, 0))) if len(values) else 0
+                results[key][first:last] = np.where(counts > 0, sums, 0)
+        if results is None:
+            # Empty store: still return every key
+            arrays = values_for(self.records[0:0], np.zeros(0, dtype=np.int64), slice(0, 0))
+            results = {key: np.zeros(0) for key in arrays}
+        return results
+
+    @staticmethod
+    def _present(values):
+        present = ~np.isnan(values)
+        return present.astype(np.float64), np.where(present, values, 0).astype(np.float64)
+
+    def team_means(self):
+        """Sprint count and mean productivity / predictability per team"""
+        def values_for(block, local_team, teams):
+            prod_n, prod = self._present(block['productivity'])
+            pred_n, pred = self._present(block['predictability'])
+            return {'prod_n': prod_n, 'prod': prod, 'pred_n': pred_n, 'pred': pred}
+
+        sums = self._team_sums(values_for)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return pd.DataFrame({
+                'sprints': self.counts,
+                'avg_productivity': sums['prod'] / sums['prod_n'],
+                'avg_predictability': sums['pred'] / sums['pred_n'],
+            }, index=pd.Index(self.team_names, name='team'))
+
+    def phase_split(self):
+        """Old/new model velocity and mean productivity per team, as in calculate_statistics
+
+        The transition is the first sprint whose Target Velocity differs from the
+        previous one; teams without a change have every sprint in the old model.
+        """
+        old_velocity = np.full(len(self.team_names), np.nan)
+        new_velocity = np.full(len(self.team_names), np.nan)
+
+        def values_for(block, local_team, teams):
+            velocity = block['target_velocity'].astype(np.float64)
+            team_count = teams.stop - teams.start
+            change = np.flatnonzero((velocity[1:] != velocity[:-1]) & (local_team[1:] == local_team[:-1])) + 1
+            # First change per team
+            changed, first = np.unique(local_team[change], return_index=True)
+            old = np.full(team_count, np.nan)
+            new = np.full(team_count, np.nan)
+            old[changed] = velocity[change[first] - 1]
+            new[changed] = velocity[change[first]]
+            # Teams without a change: the first velocity is the (only) old model
+            unchanged = np.flatnonzero(np.isnan(old) & (self.counts[teams] > 0))
+            old[unchanged] = velocity[self.offsets[teams][unchanged] - self.offsets[teams.start]]
+            old_velocity[teams] = old
+            new_velocity[teams] = new
+
+            prod_n, prod = self._present(block['productivity'])
+            in_old = velocity == old[local_team]
+            in_new = velocity == new[local_team]
+            return {'old_n': in_old * prod_n, 'old': in_old * prod,
+                    'new_n': in_new * prod_n, 'new': in_new * prod}
+
+        sums = self._team_sums(values_for)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return pd.DataFrame({
+                'old_velocity': old_velocity,
+                'new_velocity': new_velocity,
+                'old_model_count': sums['old_n'].astype(int),
+                'new_model_count': sums['new_n'].astype(int),
+                'old_model_productivity': sums['old'] / sums['old_n'],
+                'new_model_productivity': np.where(sums['new_n'] > 0, sums['new'] / sums['new_n'], np.nan),
+            }, index=pd.Index(self.team_names, name='team'))
+
+    def rollup_partials(self, weight='target'):
+        """Per-team partial sums in the layout org_rollups.OrgRollup works from"""
+        from org_rollups import PARTIAL_COLUMNS, WEIGHTS
+
+        if weight not in WEIGHTS:
+            raise ValueError(f"Unknown rollup weight '{weight}' (use {', '.join(WEIGHTS)})")
+        weight_field = 'target_velocity' if weight == 'target' else 'delivered'
+
+        def values_for(block, local_team, teams):
+            w = np.nan_to_num(block[weight_field].astype(np.float64))
+            productivity = block['productivity'].astype(np.float64)
+            predictability = block['predictability'].astype(np.float64)
+            prod_weight = np.where(np.isnan(productivity), 0.0, w)
+            pred_weight = np.where(np.isnan(predictability), 0.0, w)
+            return {
+                'prod_weight': prod_weight,
+                'prod_weighted': prod_weight * np.nan_to_num(productivity),
+                'pred_weight': pred_weight,
+                'pred_weighted': pred_weight * np.nan_to_num(predictability),
+                'target': np.nan_to_num(block['target_velocity'].astype(np.float64)),
+                'committed': np.nan_to_num(block['committed'].astype(np.float64)),
+                'delivered': np.nan_to_num(block['delivered'].astype(np.float64)),
+                'inflation': np.nan_to_num(block['inflation'].astype(np.float64)),
+            }
+
+        sums = self._team_sums(values_for)
+        sums['sprints'] = self.counts.astype(float)
+        return pd.DataFrame(sums, index=pd.Index(self.team_names, name='Team'))[PARTIAL_COLUMNS]
+
+
+def main():
+    """Command-line entry point: summarize a sprint store"""
+    parser = argparse.ArgumentParser(description="Query a memory-mapped sprint store")
+    parser.add_argument('store', help="Store directory written with --sprint-store")
+    parser.add_argument('--org-map', metavar='CSV', help="Also print tribe/department rollups")
+    parser.add_argument('--rollup-weight', choices=['target', 'delivered'], default='target')
+    args = parser.parse_args()
+
+    try:
+        store = SprintStore(args.store)
+    except (OSError, ValueError) as e:
+        print(f"Error: {str(e)}")
+        sys.exit(1)
+
+    print(f"Sprint store: {len(store)} teams, {len(store.records)} sprints "
+          f"({store.records.nbytes / 1024:.0f} KB)\n")
+    summary = store.team_means().join(store.phase_split())
+    print(summary.to_string(float_format=lambda value: f'{value:.2f}'))
+
+    if args.org_map:
+        from org_rollups import OrgRollup, load_org_hierarchy
+        rollup = OrgRollup(load_org_hierarchy(args.org_map), weight=args.rollup_weight)
+        rollup.set_partials(store.rollup_partials(args.rollup_weight))
+        table = rollup.table()
+        print()
+        print(table[table['level'] != 'team'][['level', 'name', 'teams', 'sprints', 'productivity',
+                                                 'predictability']].to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
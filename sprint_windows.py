@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Sprint Windows
+Statistics for any contiguous run of a team's sprints ("last 6 sprints",
+"since S25.14") in O(1), from cumulative sums built once per team.
+
+- Prefix arrays hold running counts and sums of productivity, predictability,
+  committed, delivered and inflation, plus sums of squares for the CV
+- Squares are taken around the team's mean productivity (shifted data), so the
+  variance of a short window does not suffer from cancellation
+- Every query accepts arrays of window bounds, so a rolling statistic over the
+  whole history (e.g. MA(3) for each sprint) is one vectorized expression
+- NaN cells are skipped, as in pandas' mean and std
+"""
+
+import numpy as np
+
+from sprint_store import sprint_key
+
+# Series name -> cleaned sprint column
+SERIES = {
+    'productivity': 'Productivity_num',
+    'predictability': 'Predictability_num',
+    'committed': 'Committed SP',
+    'delivered': 'Delivered SP',
+    'inflation': 'Inflation correction',
+}
+
+
+def _prefix(values):
+    """Cumulative sums with a leading 0, so sum(values[a:b]) == prefix[b] - prefix[a]"""
+    return np.concatenate(([0.0], np.cumsum(values, dtype=float)))
+
+
+def resolve_window(sprints, window=None, since=None):
+    """(start, stop) row positions for --since and/or --window over a team's sprints
+
+    `since` names the first sprint to include, either as a full label or by its
+    sprint key ("S25.8" and "DNE S25.08" both start at the first sprint from
+    25.08 on); `window` keeps at most the last N sprints (of those since
+    `since`, when both are given).
+    """
+    labels = [str(sprint).strip() for sprint in sprints]
+    start, stop = 0, len(labels)
+    if since is not None:
+        since = str(since).strip()
+        if since in labels:
+            start = labels.index(since)
+        else:
+            key = sprint_key(since, None)
+            if key is None:
+                raise ValueError(f"Sprint '{since}' not found (sprints run from {labels[0]} to {labels[-1]})")
+            # Labels without a sprint number never match
+            later = [position for position, label in enumerate(labels) if sprint_key(label, -1) >= key]
+            if not later:
+                raise ValueError(f"No sprint from '{since}' on (sprints run from {labels[0]} to {labels[-1]})")
+            start = later[0]
+    if window is not None:
+        if window < 1:
+            raise ValueError(f"Window must cover at least one sprint (got {window})")
+        start = max(start, stop - window)
+    return start, stop
+
+
+class WindowSums:
+    """Cumulative sums over one team's cleaned sprints, queried by row position"""
+
+    def __init__(self, df):
+        self.length = len(df)
+        self.counts = {}
+        self.sums = {}
+        for name, column in SERIES.items():
+            values = df[column].to_numpy(dtype=float)
+            valid = ~np.isnan(values)
+            self.counts[name] = _prefix(valid)
+            self.sums[name] = _prefix(np.where(valid, values, 0.0))
+
+        productivity = df[SERIES['productivity']].to_numpy(dtype=float)
+        valid = ~np.isnan(productivity)
+        self.shift = float(productivity[valid].mean()) if valid.any() else 0.0
+        deviations = np.where(valid, productivity - self.shift, 0.0)
+        self.deviation_sums = _prefix(deviations)
+        self.square_sums = _prefix(deviations ** 2)
+
+        inflation = df[SERIES['inflation']].to_numpy(dtype=float)
+        self.inflated = _prefix(~np.isnan(inflation) & (inflation != 0))
+
+    def count(self, name, start, stop):
+        return self.counts[name][stop] - self.counts[name][start]
+
+    def total(self, name, start, stop):
+        return self.sums[name][stop] - self.sums[name][start]
+
+    def mean(self, name, start, stop):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self.total(name, start, stop) / self.count(name, start, stop)
+
+    def inflation_count(self, start, stop):
+        """Sprints with a non-zero inflation correction"""
+        return int(self.inflated[stop] - self.inflated[start])
+
+    def std_productivity(self, start, stop):
+        """Sample standard deviation (ddof=1) of productivity; NaN below two sprints"""
+        n = self.count('productivity', start, stop)
+        deviations = self.deviation_sums[stop] - self.deviation_sums[start]
+        squares = self.square_sums[stop] - self.square_sums[start]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            variance = (squares - deviations ** 2 / n) / (n - 1)
+        return np.where(n > 1, np.sqrt(np.maximum(variance, 0.0)), np.nan)[()]
+
+    def window(self, start=0, stop=None):
+        """Headline statistics for sprints [start, stop) in constant time"""
+        stop = self.length if stop is None else stop
+        sprints = stop - start
+        avg_productivity = self.mean('productivity', start, stop)
+        std_productivity = self.std_productivity(start, stop)
+        inflation_count = self.inflation_count(start, stop)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cv_productivity = std_productivity / avg_productivity * 100
+        return {
+            'sprints': sprints,
+            'avg_productivity': avg_productivity,
+            'std_productivity': std_productivity,
+            'cv_productivity': cv_productivity,
+            'avg_predictability': self.mean('predictability', start, stop),
+            'avg_committed': self.mean('committed', start, stop),
+            'avg_delivered': self.mean('delivered', start, stop),
+            'total_inflation': self.total('inflation', start, stop),
+            'inflation_count': inflation_count,
+            'inflation_frequency': inflation_count / sprints if sprints else np.nan,
+        }
+
+    def rolling_mean(self, name, n):
+        """Mean of the last n sprints ending at every sprint (NaN until n values exist)"""
+        stops = np.arange(1, self.length + 1)
+        starts = np.maximum(stops - n, 0)
+        full = (stops >= n) & (self.count(name, starts, stops) == n)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(full, self.total(name, starts, stops) / n, np.nan)
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Team Statistics Export
+Compact, typed per-team summary produced by calculate_statistics, plus streaming
+JSON / NDJSON / CSV exporters for handing results to downstream systems in bulk.
+
+The exporters consume any iterable of summaries and write each one as it arrives,
+so exporting a whole portfolio never holds more than one team's data at a time.
+"""
+
+import csv
+import json
+import math
+import os
+from dataclasses import asdict, dataclass, fields
+from typing import Optional
+
+EXPORT_FORMATS = ('json', 'ndjson', 'csv')
+
+
+@dataclass
+class TeamStatsSummary:
+    """Scalar statistics for one team (no DataFrame payloads)"""
+    team: str
+    first_sprint: str
+    last_sprint: str
+    total_sprints: int
+    avg_productivity: float
+    avg_predictability: float
+    std_productivity: float
+    cv_productivity: float
+    min_productivity: float
+    max_productivity: float
+    min_predictability: float
+    max_predictability: float
+    avg_committed: float
+    avg_delivered: float
+    total_inflation: float
+    inflation_count: int
+    inflation_frequency: float
+    transition_sprint: Optional[str]
+    old_velocity: Optional[float]
+    new_velocity: Optional[float]
+    old_model_count: int
+    new_model_count: int
+    old_model_productivity: Optional[float]
+    old_model_predictability: Optional[float]
+    new_model_productivity: Optional[float]
+    new_model_predictability: Optional[float]
+    # Capacity-adjusted productivity (notes_classifier); equal to the raw figures without Notes
+    capacity_affected_sprints: int = 0
+    adjusted_productivity: Optional[float] = None
+    adjusted_cv_productivity: Optional[float] = None
+    reweighted_productivity: Optional[float] = None
+
+    def __post_init__(self):
+        # Normalise numpy scalars to plain Python types so every exporter can serialise them
+        for field in fields(self):
+            value = getattr(self, field.name)
+            if value is None or isinstance(value, str):
+                continue
+            if field.type is int:
+                setattr(self, field.name, int(value))
+            elif field.type is float:
+                setattr(self, field.name, float(value))
+            elif hasattr(value, 'item'):
+                setattr(self, field.name, value.item())
+
+    @classmethod
+    def field_names(cls):
+        return [field.name for field in fields(cls)]
+
+    def to_dict(self):
+        return asdict(self)
+
+    def to_record(self):
+        """Dict with NaN mapped to None, safe for strict JSON"""
+        return {key: (None if isinstance(value, float) and math.isnan(value) else value)
+                for key, value in asdict(self).items()}
+
+
+def write_ndjson(summaries, fp):
+    """Write one JSON object per line; returns the number of teams written"""
+    count = 0
+    for summary in summaries:
+        fp.write(json.dumps(summary.to_record(), ensure_ascii=False))
+        fp.write('\n')
+        count += 1
+    return count
+
+
+def write_json(summaries, fp):
+    """Write a JSON array, streaming one team at a time"""
+    count = 0
+    fp.write('[')
+    for summary in summaries:
+        fp.write(',\n' if count else '\n')
+        fp.write(json.dumps(summary.to_record(), ensure_ascii=False))
+        count += 1
+    fp.write('\n]\n' if count else ']\n')
+    return count
+
+
+def write_csv(summaries, fp):
+    """Write a CSV table with one row per team"""
+    writer = csv.DictWriter(fp, fieldnames=TeamStatsSummary.field_names())
+    writer.writeheader()
+    count = 0
+    for summary in summaries:
+        writer.writerow(summary.to_record())
+        count += 1
+    return count
+
+
+WRITERS = {'json': write_json, 'ndjson': write_ndjson, 'csv': write_csv}
+
+
+def export_format_for(path):
+    """Infer the export format from a file extension"""
+    extension = os.path.splitext(path)[1].lower().lstrip('.')
+    if extension == 'jsonl':
+        extension = 'ndjson'
+    if extension not in WRITERS:
+        raise ValueError(f"Cannot infer stats export format from '{path}' (use .json, .ndjson/.jsonl or .csv)")
+    return extension
+
+
+def export_summaries(summaries, path, fmt=None):
+    """Stream summaries into a single export file; returns the number of teams written"""
+    fmt = fmt or export_format_for(path)
+    newline = '' if fmt == 'csv' else None
+    with open(path, 'w', encoding='utf-8', newline=newline) as fp:
+        return WRITERS[fmt](summaries, fp)
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+Statistics Graph
+Team statistics as a dependency graph of lazily evaluated, memoized metrics.
+
+- Every metric is a small function of its named dependencies (other metrics or
+  the inputs: the analyzed sprints, the window sums and bounds, the notes
+  classifier)
+- A metric is computed only when requested, at most once per data version;
+  requesting one number evaluates just the metrics it depends on
+- Setting an input bumps the data version and drops memoized values, so a new
+  window or another classifier can never serve stale statistics
+- Evaluation holds a re-entrant lock, so report and render threads sharing an
+  analyzer compute each metric once and never see each other's evaluations
+- TeamStatsSummary fields are all metrics, so the summary is one pass over the
+  graph and the report reads derived values (gaps, phase changes) from it too
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+from estimation_bias import fit_estimation_bias
+from notes_classifier import TAGS, NotesClassifier, capacity_adjusted_stats, capacity_affected
+
+# Values supplied by the analyzer rather than computed
+INPUTS = ('df', 'window_sums', 'window', 'notes_classifier')
+
+# Metric name -> (function, dependency names)
+METRICS = {}
+
+
+def metric(*dependencies):
+    """Register the decorated function as the metric of the same name"""
+    def register(function):
+        METRICS[function.__name__] = (function, dependencies)
+        return function
+    return register
+
+
+class StatsGraph:
+    """Memoized evaluation of METRICS over one team's inputs"""
+
+    def __init__(self, metrics=None):
+        self.metrics = METRICS if metrics is None else metrics
+        self.version = 0
+        self.inputs = {}
+        self.values = {}
+        self.evaluations = 0
+        self._active = set()
+        self._lock = threading.RLock()
+
+    def set_inputs(self, **inputs):
+        """Replace inputs; every memoized metric belongs to the old data version and is dropped"""
+        unknown = sorted(set(inputs) - set(INPUTS))
+        if unknown:
+            raise ValueError(f"Unknown statistics input(s): {', '.join(unknown)}")
+        with self._lock:
+            self.inputs.update(inputs)
+            self.values.clear()
+            self.version += 1
+
+    def get(self, name):
+        """Value of one metric (or input), evaluating its dependencies first if needed"""
+        with self._lock:
+            if name in self.values:
+                return self.values[name]
+            if name in INPUTS:
+                if name not in self.inputs and name != 'notes_classifier':
+                    raise KeyError(f"Statistics input '{name}' has not been set")
+                return self.inputs.get(name)
+            if name not in self.metrics:
+                raise KeyError(f"Unknown metric '{name}'")
+            # Only this thread can be evaluating while it holds the lock
+            if name in self._active:
+                raise ValueError(f"Metric '{name}' depends on itself")
+            function, dependencies = self.metrics[name]
+            self._active.add(name)
+            try:
+                value = function(*[self.get(dependency) for dependency in dependencies])
+            finally:
+                self._active.discard(name)
+            self.values[name] = value
+            self.evaluations += 1
+            return value
+
+    __getitem__ = get
+
+    def collect(self, names):
+        """Dict of several metrics, sharing every intermediate value"""
+        return {name: self.get(name) for name in names}
+
+
+# Window statistics (constant time from the cumulative sums)
+
+@metric('window_sums', 'window')
+def avg_productivity(sums, window):
+    return sums.mean('productivity', *window)
+
+
+@metric('window_sums', 'window')
+def avg_predictability(sums, window):
+    return sums.mean('predictability', *window)
+
+
+@metric('window_sums', 'window')
+def avg_committed(sums, window):
+    return sums.mean('committed', *window)
+
+
+@metric('window_sums', 'window')
+def avg_delivered(sums, window):
+    return sums.mean('delivered', *window)
+
+
+@metric('window_sums', 'window')
+def std_productivity(sums, window):
+    return sums.std_productivity(*window)
+
+
+@metric('std_productivity', 'avg_productivity')
+def cv_productivity(std, avg):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return std / avg * 100
+
+
+@metric('window_sums', 'window')
+def total_inflation(sums, window):
+    return sums.total('inflation', *window)
+
+
+@metric('window_sums', 'window')
+def inflation_count(sums, window):
+    return sums.inflation_count(*window)
+
+
+@metric('inflation_count', 'total_sprints')
+def inflation_frequency(count, sprints):
+    return count / sprints if sprints else np.nan
+
+
+@metric('avg_committed', 'avg_delivered')
+def avg_gap(committed, delivered):
+    return committed - delivered
+
+
+# Sprint range and extremes
+
+@metric('df')
+def total_sprints(df):
+    return len(df)
+
+
+@metric('df')
+def first_sprint(df):
+    return str(df.iloc[0]['Sprint'])
+
+
+@metric('df')
+def last_sprint(df):
+    return str(df.iloc[-1]['Sprint'])
+
+
+@metric('df')
+def min_productivity(df):
+    return df['Productivity_num'].min()
+
+
+@metric('df')
+def max_productivity(df):
+    return df['Productivity_num'].max()
+
+
+@metric('df')
+def min_predictability(df):
+    return df['Predictability_num'].min()
+
+
+@metric('df')
+def max_predictability(df):
+    return df['Predictability_num'].max()
+
+
+# Velocity model transition and phases
+
+@metric('df')
+def transition(df):
+    """(transition sprint, old velocity, new velocity) at the first Target Velocity change"""
+    velocities = df['Target Velocity'].to_numpy()
+    changes = np.flatnonzero(velocities[1:] != velocities[:-1])
+    if len(changes) == 0:
+        return None, df['Target Velocity'].iloc[0], None
+    i = changes[0] + 1
+    return df.iloc[i]['Sprint'], velocities[i - 1], velocities[i]
+
+
+@metric('transition')
+def transition_sprint(transition):
+    return transition[0]
+
+
+@metric('transition')
+def old_velocity(transition):
+    return transition[1]
+
+
+@metric('transition')
+def new_velocity(transition):
+    return transition[2]
+
+
+@metric('df', 'transition')
+def model_phases(df, transition):
+    """(old_model, new_model) sprint slices for the detected velocity models"""
+    sprint, old, new = transition
+    if sprint is None:
+        return df, df.iloc[0:0]
+    return df[df['Target Velocity'] == old], df[df['Target Velocity'] == new]
+
+
+def _phase_mean(phases, position, column):
+    phase = phases[position]
+    return phase[column].mean() if len(phase) > 0 else None
+
+
+@metric('model_phases')
+def old_model_count(phases):
+    return len(phases[0])
+
+
+@metric('model_phases')
+def new_model_count(phases):
+    return len(phases[1])
+
+
+@metric('model_phases')
+def old_model_productivity(phases):
+    return _phase_mean(phases, 0, 'Productivity_num')
+
+
+@metric('model_phases')
+def old_model_predictability(phases):
+    return _phase_mean(phases, 0, 'Predictability_num')
+
+
+@metric('model_phases')
+def new_model_productivity(phases):
+    return _phase_mean(phases, 1, 'Productivity_num')
+
+
+@metric('model_phases')
+def new_model_predictability(phases):
+    return _phase_mean(phases, 1, 'Predictability_num')
+
+
+@metric('old_model_productivity', 'new_model_productivity')
+def productivity_change(old, new):
+    return None if old is None or new is None else new - old
+
+
+@metric('old_model_predictability', 'new_model_predictability')
+def predictability_change(old, new):
+    return None if old is None or new is None else new - old
+
+
+# Estimation bias (one batched fit over the team's phases)
+
+@metric('df', 'transition', 'model_phases')
+def estimation_groups(df, transition, phases):
+    """(phase, sprints) groups: all sprints, plus each model after a transition"""
+    groups = [('All sprints', df)]
+    sprint, old, new = transition
+    if sprint is not None:
+        groups += [(f"Old model ({old:.1f} SP)", phases[0]), (f"New model ({new:.1f} SP)", phases[1])]
+    return groups
+
+
+@metric('estimation_groups')
+def estimation_bias(groups):
+    return fit_estimation_bias(groups)
+
+
+# Capacity-adjusted productivity (from the note tags)
+
+@metric('df', 'notes_classifier')
+def note_tags(df, classifier):
+    """Sprints x TAGS flags; without a Notes column no sprint is tagged"""
+    if 'Notes' not in df.columns:
+        return pd.DataFrame(False, index=df.index, columns=list(TAGS))
+    return (classifier if classifier is not None else NotesClassifier()).classify(df['Notes'])
+
+
+@metric('note_tags')
+def capacity_affected_mask(note_tags):
+    return capacity_affected(note_tags)
+
+
+@metric('df', 'capacity_affected_mask')
+def capacity(df, affected):
+    return capacity_adjusted_stats(df['Productivity_num'], affected)
+
+
+@metric('capacity_affected_mask')
+def capacity_affected_sprints(affected):
+    return int(affected.sum())
+
+
+@metric('capacity')
+def adjusted_productivity(capacity):
+    return capacity['adjusted_productivity']
+
+
+@metric('capacity')
+def adjusted_cv_productivity(capacity):
+    return capacity['adjusted_cv_productivity']
+
+
+@metric('capacity')
+def reweighted_productivity(capacity):
+    return capacity['reweighted_productivity']
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Cross-Team Correlation
+Finds teams whose sprint results move together (shared dependencies, shared
+calendars) by correlating every pair of teams' productivity and delivered-SP
+series, aligned on a common sprint key.
+
+- Sprints are aligned by the number in their label ("DNE S25.19" and
+  "S25.19" are the same sprint, key 2519); sprints missing for a team stay
+  NaN, and each pair is correlated over the sprints both teams have
+  (pairwise-complete Pearson), with at least MIN_OVERLAP shared sprints
+- All pairs come from a handful of matrix products over masked, centred
+  series (sums, sums of squares and cross products); row blocks of
+  BLOCK_TEAMS teams bound the temporaries, so only the teams x teams result
+  grows with the portfolio
+- Co-movement is the mean of the two metrics' correlations; teams linked by
+  co-movement >= CLUSTER_THRESHOLD form clusters (connected components),
+  reported with the sprints in which the whole cluster dipped together
+
+Usage:
+    python team_correlation.py <store_dir> [--output Cross_Team_Correlation.md]
+or --correlations PATH in generate_team_analysis.py.
+"""
+
+import argparse
+import sys
+import warnings
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from sprint_store import sprint_key
+
+SERIES = ('productivity', 'delivered')
+
+MIN_OVERLAP = 6
+BLOCK_TEAMS = 256
+CLUSTER_THRESHOLD = 0.7
+TOP_PAIRS = 10
+TOP_CLUSTERS = 10
+# Members named per cluster in the report
+LISTED_MEMBERS = 12
+# A cluster "dips" in a sprint when its members average this many SDs below their own means
+DIP_Z = -0.75
+
+
+# Keys parsed from 'YY.NN' labels start at 1000; smaller keys are row ordinals (see sprint_key)
+MIN_SPRINT_KEY = 1000
+
+
+def label_keys(labels):
+    """Sprint keys for labels; -1 where a label carries no sprint number and cannot be aligned"""
+    return np.array([sprint_key(label, -1) for label in labels], dtype=np.int64)
+
+
+def align_series(team_index, keys, values, teams):
+    """Teams x sprints matrix of one metric from flat (team index, sprint key, value) arrays
+
+    Returns (matrix, sprint_keys); unaligned keys (row ordinals) are dropped.
+    """
+    team_index = np.asarray(team_index, dtype=np.int64)
+    keys = np.asarray(keys, dtype=np.int64)
+    values = np.asarray(values, dtype=np.float64)
+    aligned = keys >= MIN_SPRINT_KEY
+    sprint_keys = np.unique(keys[aligned])
+    matrix = np.full((teams, len(sprint_keys)), np.nan)
+    matrix[team_index[aligned], np.searchsorted(sprint_keys, keys[aligned])] = values[aligned]
+    return matrix, sprint_keys
+
+
+def correlation_matrix(matrix, min_overlap=MIN_OVERLAP, block=BLOCK_TEAMS):
+    """Pairwise-complete Pearson correlation between the rows of a NaN-padded matrix
+
+    Returns (r, overlap): teams x teams correlations (NaN below min_overlap shared
+    sprints or for flat series) and the number of shared sprints of each pair.
+    """
+    valid = ~np.isnan(matrix)
+    mask = valid.astype(np.float64)
+    # Centre each team on its own mean so the sums below do not cancel
+    filled = np.where(valid, matrix, 0.0)
+    means = filled.sum(axis=1, keepdims=True) / np.maximum(valid.sum(axis=1, keepdims=True), 1)
+    centred = np.where(valid, filled - means, 0.0)
+    squares = centred * centred
+
+    teams = len(matrix)
+    r = np.full((teams, teams), np.nan)
+    overlap = np.zeros((teams, teams), dtype=np.int64)
+    for start in range(0, teams, block):
+        stop = min(start + block, teams)
+        m, x, xx = mask[start:stop], centred[start:stop], squares[start:stop]
+        n = m @ mask.T                  # shared sprints
+        sum_x = x @ mask.T              # block team's values over shared sprints
+        sum_y = m @ centred.T           # other team's values over shared sprints
+        sum_xx = xx @ mask.T
+        sum_yy = m @ squares.T
+        sum_xy = x @ centred.T
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cov = sum_xy - sum_x * sum_y / n
+            var_x = sum_xx - sum_x ** 2 / n
+            var_y = sum_yy - sum_y ** 2 / n
+            block_r = cov / np.sqrt(var_x * var_y)
+        usable = (n >= min_overlap) & (var_x > 1e-12) & (var_y > 1e-12)
+        r[start:stop] = np.where(usable, np.clip(block_r, -1.0, 1.0), np.nan)
+        overlap[start:stop] = n.astype(np.int64)
+    return r, overlap
+
+
+def co_movement(correlations):
+    """Mean of the metrics' correlation matrices (NaN only where every metric is NaN)"""
+    stack = np.stack(list(correlations.values()))
+    present = (~np.isnan(stack)).sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(present > 0, np.nansum(stack, axis=0) / present, np.nan)
+
+
+def top_pairs(score, teams, limit=TOP_PAIRS):
+    """The `limit` most co-moving team pairs as a DataFrame"""
+    upper = np.triu_indices(len(teams), k=1)
+    values = score[upper]
+    order = np.argsort(np.where(np.isnan(values), -np.inf, -values), kind='stable')[:limit]
+    order = order[~np.isnan(values[order])]
+    return pd.DataFrame({'team_a': [teams[i] for i in upper[0][order]],
+                         'team_b': [teams[j] for j in upper[1][order]],
+                         'co_movement': values[order]})
+
+
+def find_clusters(score, threshold=CLUSTER_THRESHOLD):
+    """Connected components of the graph linking pairs with score >= threshold (union-find)"""
+    parent = np.arange(len(score))
+
+    def root(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    with np.errstate(invalid='ignore'):
+        rows, columns = np.nonzero(np.triu(score >= threshold, k=1))
+    for i, j in zip(rows, columns):
+        a, b = root(i), root(j)
+        if a != b:
+            parent[max(a, b)] = min(a, b)
+    roots = np.array([root(i) for i in range(len(score))], dtype=np.int64)
+    return [np.flatnonzero(roots == value) for value in np.unique(roots) if (roots == value).sum() > 1]
+
+
+def common_dips(matrix, members, sprint_keys, z=DIP_Z):
+    """Sprint keys where the members, on average, sit `z` SDs or more below their own means"""
+    rows = matrix[members]
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        scores = (rows - np.nanmean(rows, axis=1, keepdims=True)) / np.nanstd(rows, axis=1, ddof=1, keepdims=True)
+    # Only sprints every member ran, so a dip is shared rather than one team's gap
+    everyone = (~np.isnan(scores)).all(axis=0)
+    return sprint_keys[everyone & (np.where(everyone, scores, 0.0).mean(axis=0) <= z)]
+
+
+def analyze_correlations(teams, series, sprint_keys, threshold=CLUSTER_THRESHOLD):
+    """Correlation matrices, co-movement, top pairs and ranked clusters for aligned series
+
+    `series` maps each SERIES name to a teams x sprints matrix aligned on sprint_keys.
+    """
+    correlations = {}
+    overlaps = {}
+    for name in SERIES:
+        correlations[name], overlaps[name] = correlation_matrix(series[name])
+    overlap = overlaps['productivity']
+    score = co_movement(correlations)
+    clusters = []
+    for members in find_clusters(score, threshold):
+        block = score[np.ix_(members, members)]
+        internal = block[np.triu_indices(len(members), k=1)]
+        clusters.append({
+            'teams': [teams[i] for i in members],
+            'co_movement': float(np.nanmean(internal)),
+            'dips': common_dips(series['productivity'], members, sprint_keys),
+        })
+    clusters.sort(key=lambda cluster: (-len(cluster['teams']), -cluster['co_movement']))
+    return {
+        'teams': list(teams),
+        'correlations': {name: pd.DataFrame(matrix, index=teams, columns=teams)
+                         for name, matrix in correlations.items()},
+        'overlap': pd.DataFrame(overlap, index=teams, columns=teams),
+        'co_movement': pd.DataFrame(score, index=teams, columns=teams),
+        'pairs': top_pairs(score, list(teams)),
+        'clusters': clusters,
+        'threshold': threshold,
+    }
+
+
+def format_sprint_key(key):
+    return f'S{key // 100:02d}.{key % 100:02d}'
+
+
+def render_correlation_report(result):
+    """Markdown report of the top co-moving pairs and clusters"""
+    teams = result['teams']
+    lines = [
+        "# Cross-Team Correlation",
+        "",
+        f"**Teams:** {len(teams)}  ",
+        f"**Co-movement:** mean of productivity and delivered-SP correlations over shared sprints "
+        f"(at least {MIN_OVERLAP})  ",
+        f"**Cluster threshold:** {result['threshold']:.2f}",
+        "",
+        "## Top Co-Moving Pairs",
+        "",
+        "| Team A | Team B | Co-movement | Productivity r | Delivered r | Shared Sprints |",
+        "|--------|--------|-------------|----------------|-------------|----------------|",
+    ]
+    productivity = result['correlations']['productivity']
+    delivered = result['correlations']['delivered']
+    for _, pair in result['pairs'].iterrows():
+        a, b = pair['team_a'], pair['team_b']
+        lines.append(f"| {a} | {b} | {pair['co_movement']:.2f} | {_format_r(productivity.at[a, b])} | "
+                     f"{_format_r(delivered.at[a, b])} | {result['overlap'].at[a, b]} |")
+    if result['pairs'].empty:
+        lines.append(f"| - | - | - | - | - | fewer than {MIN_OVERLAP} shared sprints |")
+
+    lines += ["", "## Co-Moving Clusters", ""]
+    if not result['clusters']:
+        lines.append(f"No teams co-move at {result['threshold']:.2f} or above.")
+    for number, cluster in enumerate(result['clusters'][:TOP_CLUSTERS], 1):
+        dips = ', '.join(format_sprint_key(key) for key in cluster['dips']) or 'none'
+        members = ', '.join(cluster['teams'][:LISTED_MEMBERS])
+        if len(cluster['teams']) > LISTED_MEMBERS:
+            members += f" and {len(cluster['teams']) - LISTED_MEMBERS} more"
+        lines += [f"{number}. **{members}** ({len(cluster['teams'])} teams) — mean co-movement {cluster['co_movement']:.2f}; "
+                  f"common productivity dips: {dips}"]
+    if len(result['clusters']) > TOP_CLUSTERS:
+        lines.append(f"\n*...and {len(result['clusters']) - TOP_CLUSTERS} more clusters*")
+    lines += ["", "---", "", f"**Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", ""]
+    return "\n".join(lines)
+
+
+def _format_r(value):
+    return '-' if np.isnan(value) else f'{value:+.2f}'
+
+
+def generate_correlations(rows, path, threshold=CLUSTER_THRESHOLD):
+    """Correlation report from (team, sprint labels, productivity, delivered) rows of a batch run"""
+    teams = [team for team, _, _, _ in rows]
+    team_index = np.concatenate([np.full(len(labels), i) for i, (_, labels, _, _) in enumerate(rows)])
+    keys = np.concatenate([label_keys(labels) for _, labels, _, _ in rows])
+    series = {}
+    for position, name in enumerate(SERIES, 2):
+        values = np.concatenate([row[position] for row in rows])
+        series[name], sprint_keys = align_series(team_index, keys, values, len(teams))
+    result = analyze_correlations(teams, series, sprint_keys, threshold)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(render_correlation_report(result))
+    return result
+
+
+def main():
+    """Command-line entry point: correlate every team in a sprint store"""
+    parser = argparse.ArgumentParser(description="Find teams whose sprint results move together")
+    parser.add_argument('store', help="Store directory written with --sprint-store")
+    parser.add_argument('--output', metavar='PATH', help="Also write the markdown report to PATH")
+    parser.add_argument('--threshold', type=float, default=CLUSTER_THRESHOLD,
+                        help=f"Co-movement that links two teams into a cluster (default: {CLUSTER_THRESHOLD})")
+    args = parser.parse_args()
+
+    from sprint_store import SprintStore
+    try:
+        store = SprintStore(args.store)
+    except (OSError, ValueError) as e:
+        print(f"Error: {str(e)}")
+        sys.exit(1)
+
+    records = store.records
+    team_index = np.asarray(records['team_id'], dtype=np.int64)
+    keys = np.asarray(records['sprint_key'], dtype=np.int64)
+    series = {}
+    for name in SERIES:
+        series[name], sprint_keys = align_series(team_index, keys, records[name], len(store))
+    report = render_correlation_report(analyze_correlations(store.team_names, series, sprint_keys, args.threshold))
+    print(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(report)
+        print(f"Correlation report saved: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Workbook Input Sources
+Reads team sheets straight from the .xlsx tracking workbook, without the manual
+one-sheet-at-a-time CSV export.
+
+- The workbook is opened in openpyxl's read-only mode, which streams each
+  sheet's rows from the archive instead of loading the whole workbook
+- Every sheet whose header row has Team and Sprint columns is a team sheet;
+  other sheets (summaries, charts, lookups) are skipped
+- Formula cells yield their cached values, so '#VALUE!' and friends arrive as
+  the same sentinels the CSV exports contain and go through the same cleaning
+- Only one sheet's rows are held at a time, trimmed to named columns and
+  non-blank rows
+
+Needs the optional `openpyxl` package (pip install openpyxl).
+"""
+
+import os
+
+import pandas as pd
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+WORKBOOK_EXTENSIONS = ('.xlsx', '.xlsm')
+
+# The header row may sit under a few title rows
+HEADER_SEARCH_ROWS = 10
+HEADER_MARKERS = ('Team', 'Sprint')
+
+
+def is_workbook(path):
+    return os.path.splitext(str(path))[1].lower() in WORKBOOK_EXTENSIONS
+
+
+def _open_workbook(path):
+    if openpyxl is None:
+        raise ImportError(f"Reading '{path}' requires the optional 'openpyxl' package "
+                          "(pip install openpyxl)")
+    return openpyxl.load_workbook(path, read_only=True, data_only=True)
+
+
+def _cell_text(value):
+    return str(value).strip() if value is not None else ''
+
+
+def _find_header(rows):
+    """(row offset, header cells) of the first row naming all HEADER_MARKERS, else (None, None)"""
+    for offset, row in enumerate(rows):
+        if offset >= HEADER_SEARCH_ROWS:
+            break
+        cells = [_cell_text(value) for value in row]
+        if all(marker in cells for marker in HEADER_MARKERS):
+            return offset, cells
+    return None, None
+
+
+def count_workbook_sheets(path):
+    """Number of team sheets in a workbook (reads only the first rows of each sheet)"""
+    workbook = _open_workbook(path)
+    try:
+        return sum(_find_header(sheet.iter_rows(max_row=HEADER_SEARCH_ROWS, values_only=True))[0] is not None
+                   for sheet in workbook.worksheets)
+    finally:
+        workbook.close()
+
+
+def read_sheet_frame(sheet):
+    """Stream one worksheet's rows into a DataFrame of its named columns; None if not a team sheet"""
+    rows = sheet.iter_rows(values_only=True)
+    offset, header = _find_header(rows)
+    if header is None:
+        return None
+
+    # Keep named columns only (drops the trailing unnamed columns exports carry)
+    keep = [index for index, name in enumerate(header) if name]
+    records = []
+    for row in rows:
+        values = [row[index] if index < len(row) else None for index in keep]
+        if any(value is not None and _cell_text(value) != '' for value in values):
+            records.append(values)
+    return pd.DataFrame(records, columns=[header[index] for index in keep], dtype=object)
+
+
+def iter_workbook_sheets(path):
+    """Yield (label, DataFrame) for every team sheet of a workbook, one sheet at a time"""
+    workbook = _open_workbook(path)
+    try:
+        for sheet in workbook.worksheets:
+            frame = read_sheet_frame(sheet)
+            if frame is not None:
+                label = f'{path}:{sheet.title}'
+                frame.attrs['source'] = label
+                yield label, frame
+    finally:
+        workbook.close()